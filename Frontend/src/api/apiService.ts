@@ -31,7 +31,10 @@ export interface WorkflowEvent {
   message?: string;
 }
 
-const API_BASE_URL = 'http://localhost:8000';
+export const API_BASE_URL = 'http://localhost:8000';
+
+// Step outputs that are stored blobs (generated images) are sent as a reference to GET /api/blobs/{hash}
+export const isBlobRef = (output: string): boolean => output.startsWith('/api/blobs/');
 
 // Helper function to make API calls
 async function apiCall<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
@@ -60,10 +63,22 @@ async function apiCall<T>(endpoint: string, options: RequestInit = {}): Promise<
   }
 }
 
-// Get all threads
-export async function getThreads(): Promise<ThreadInfo[]> {
-  const response = await apiCall<{ threads: ThreadInfo[] }>('/api/threads');
-  return response.threads;
+export interface ThreadPage {
+  threads: ThreadInfo[];
+  next_cursor: string | null;
+}
+
+// Only the thread fields the thread list shows
+const THREAD_LIST_FIELDS = 'thread_id,name,status,workflow_type,progress,created_at,updated_at';
+export const THREAD_PAGE_SIZE = 50;
+
+// Get one page of threads, most recently updated first; pass next_cursor back to load the next page
+export async function getThreads(cursor: string | null = null, limit: number = THREAD_PAGE_SIZE): Promise<ThreadPage> {
+  const params = new URLSearchParams({ limit: String(limit), fields: THREAD_LIST_FIELDS });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  return await apiCall<ThreadPage>(`/api/threads?${params}`);
 }
 
 // Get specific thread info
@@ -92,69 +107,132 @@ export async function resumeThread(threadId: string): Promise<{ message: string
   });
 }
 
-// Start a new workflow with real-time streaming
+// Start a new workflow: the backend queues the run and returns right away,
+// then we follow its Server-Sent Events stream until the run ends.
 export async function startWorkflow(
   prompt: string, 
   threadId: string,
   onMessage: (event: WorkflowEvent) => void,
   onError: (error: string) => void,
-  onClose: () => void
+  onClose: () => void,
+  onResync?: (thread: ThreadInfo) => void
 ): Promise<void> {
   console.log(`🚀 Starting workflow: ${prompt} (Thread: ${threadId})`);
   
   try {
-    const response = await fetch(`${API_BASE_URL}/api/run`, {
+    const params = new URLSearchParams({ prompt, thread_id: threadId });
+    const response = await fetch(`${API_BASE_URL}/api/run?${params}`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ prompt, thread_id: threadId }),
     });
 
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    if (!response.body) {
-      throw new Error('No response body');
-    }
+    const { thread_id } = await response.json();
+    await subscribeToWorkflow(thread_id, onMessage, onError, onClose, onResync);
+  } catch (error) {
+    console.error('❌ Workflow error:', error);
+    onError(error instanceof Error ? error.message : 'Unknown error');
+  }
+}
+
+const TERMINAL_EVENT_TYPES = ['workflow_complete', 'workflow_paused', 'error'];
+const MAX_RECONNECTS = 5;
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
+// Follow a workflow's event stream. If the connection drops before the run ends,
+// reconnect with Last-Event-ID so only the missed events are replayed. When some of
+// them are no longer kept by the server, the thread's current state goes to onResync.
+export async function subscribeToWorkflow(
+  threadId: string,
+  onMessage: (event: WorkflowEvent) => void,
+  onError: (error: string) => void,
+  onClose: () => void,
+  onResync?: (thread: ThreadInfo) => void
+): Promise<void> {
+  let lastEventId: string | null = null;
+  let reconnects = 0;
 
+  while (true) {
     try {
-      while (true) {
-        const { done, value } = await reader.read();
-        
-        if (done) {
-          console.log('📡 Workflow stream completed');
-          onClose();
-          break;
-        }
+      const headers: Record<string, string> = { Accept: 'text/event-stream' };
+      if (lastEventId) {
+        headers['Last-Event-ID'] = lastEventId;
+      }
+      const response = await fetch(`${API_BASE_URL}/api/threads/${threadId}/events`, { headers });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      if (!response.body) {
+        throw new Error('No response body');
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let finished = false;
+
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) {
+            break;
+          }
 
-        const chunk = decoder.decode(value);
-        const lines = chunk.split('\n');
+          // Frames are separated by a blank line and may be split across chunks
+          buffer += decoder.decode(value, { stream: true });
+          const frames = buffer.split('\n\n');
+          buffer = frames.pop() ?? '';
 
-        for (const line of lines) {
-          if (line.startsWith('data: ')) {
+          for (const frame of frames) {
+            let data = '';
+            for (const line of frame.split('\n')) {
+              if (line.startsWith('id: ')) {
+                lastEventId = line.slice(4);
+              } else if (line.startsWith('data: ')) {
+                data += line.slice(6);
+              }
+            }
+            if (!data) {
+              continue; // heartbeat comment
+            }
             try {
-              const eventData = line.slice(6); // Remove 'data: ' prefix
-              const event: WorkflowEvent = JSON.parse(eventData);
+              const event: WorkflowEvent = JSON.parse(data);
               console.log('🔄 Workflow event received:', event);
+              if (event.type === 'replay_truncated') {
+                // The events replayed next are only part of the history: catch up from the thread itself
+                getThreadInfo(threadId)
+                  .then((thread) => onResync?.(thread))
+                  .catch((error) => console.error('❌ Failed to refetch thread state:', error));
+                continue;
+              }
               onMessage(event);
+              finished = finished || TERMINAL_EVENT_TYPES.includes(event.type);
             } catch (parseError) {
               console.error('❌ Failed to parse event:', parseError);
             }
           }
         }
+      } finally {
+        reader.releaseLock();
+      }
+
+      if (finished || reconnects >= MAX_RECONNECTS) {
+        console.log('📡 Workflow stream completed');
+        onClose();
+        return;
+      }
+    } catch (error) {
+      if (reconnects >= MAX_RECONNECTS) {
+        console.error('❌ Workflow stream error:', error);
+        onError(error instanceof Error ? error.message : 'Unknown error');
+        return;
       }
-    } finally {
-      reader.releaseLock();
     }
 
-  } catch (error) {
-    console.error('❌ Workflow error:', error);
-    onError(error instanceof Error ? error.message : 'Unknown error');
+    reconnects += 1;
+    console.log(`🔌 Workflow stream dropped, reconnecting after event ${lastEventId ?? 'none'}...`);
+    await new Promise((resolve) => setTimeout(resolve, 1000 * reconnects));
   }
 }
 
@@ -12,8 +12,8 @@ const DebugPanel: React.FC = () => {
   const testBackendConnection = async () => {
     try {
       addLog('🧪 Testing backend connection...');
-      const threads = await getThreads();
-      addLog(`✅ Backend connected! Found ${threads.length} threads`);
+      const { threads, next_cursor } = await getThreads();
+      addLog(`✅ Backend connected! Found ${threads.length}${next_cursor ? '+' : ''} threads`);
       addLog(`📊 Threads: ${JSON.stringify(threads.map(t => ({ id: t.thread_id, name: t.name, status: t.status })), null, 2)}`);
     } catch (error) {
       addLog(`❌ Backend connection failed: ${error}`);
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useLocation, useNavigate } from 'react-router-dom';
-import { startWorkflow } from '../api/apiService';
+import { startWorkflow, API_BASE_URL, isBlobRef } from '../api/apiService';
 import { useWorkflow, WorkflowThread } from './WorkflowProvider';
 import { marked } from 'marked';
 import { LuCheck, LuLoader, LuFeather, LuLinkedin, LuImage, LuFilm, LuYoutube, LuInstagram, LuArrowLeft, LuPause, LuPlay, LuRefreshCw, LuMessageSquare, LuSend } from 'react-icons/lu';
@@ -40,7 +40,15 @@ const WorkflowStep: React.FC<WorkflowStepProps> = ({ step, name, status, output,
                 {status === 'pending' && 'Waiting...'}
                 {status === 'error' && 'Error occurred'}
             </p>
-            {output && (
+            {output && isBlobRef(output) && (
+                <img
+                    src={`${API_BASE_URL}${output}`}
+                    alt={name}
+                    loading="lazy"
+                    className="rounded-lg mt-2 border border-gray-700 max-w-full"
+                />
+            )}
+            {output && !isBlobRef(output) && (
                 <div 
                     className="bg-gray-800 p-4 rounded-lg text-sm text-gray-300 mt-2 border border-gray-700"
                     dangerouslySetInnerHTML={{ __html: marked.parse(output) }}
@@ -54,7 +62,7 @@ const WorkflowPage: React.FC = () => {
     const { threadId } = useParams<{ threadId: string }>();
     const location = useLocation();
     const navigate = useNavigate();
-    const { threads, updateThread, getThreadById, refreshThreads, addConversationMessage, getConversationHistory } = useWorkflow();
+    const { threads, updateThread, applyThreadInfo, getThreadById, refreshThreads, addConversationMessage, getConversationHistory } = useWorkflow();
     const thread = getThreadById(threadId as string);
     const [isWorkflowRunning, setIsWorkflowRunning] = useState(false);
     const [workflowMessages, setWorkflowMessages] = useState<any[]>([]);
@@ -225,7 +233,8 @@ const WorkflowPage: React.FC = () => {
                                                 updateThread(threadId, event);
                                             },
                                             (error) => console.error('Workflow error:', error),
-                                            () => setIsWorkflowRunning(false)
+                                            () => setIsWorkflowRunning(false),
+                                            (threadInfo) => applyThreadInfo(threadInfo)
                                         );
                                     }
                                 }}
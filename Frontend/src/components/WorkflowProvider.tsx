@@ -1,4 +1,4 @@
-import React, { createContext, useState, useContext, ReactNode, useCallback, useEffect } from 'react';
+import React, { createContext, useState, useContext, ReactNode, useCallback, useEffect, useRef } from 'react';
 import { getThreads, ThreadInfo as ApiThreadInfo } from '../api/apiService';
 
 // Define the shape of a single workflow thread
@@ -24,10 +24,13 @@ interface WorkflowContextType {
   threads: { [key: string]: WorkflowThread };
   addThread: (threadId: string, name: string, workflowType?: string) => void;
   updateThread: (threadId: string, newEvent: any) => void;
+  applyThreadInfo: (apiThread: ApiThreadInfo) => void;
   getThreadById: (threadId: string) => WorkflowThread | undefined;
   deleteThread: (threadId: string) => void;
   refreshThreads: () => Promise<void>;
   syncWithBackend: () => Promise<void>;
+  hasMoreThreads: boolean;
+  loadMoreThreads: () => Promise<void>;
   addConversationMessage: (threadId: string, message: any) => void;
   getConversationHistory: (threadId: string) => any[];
 }
@@ -40,6 +43,9 @@ interface WorkflowProviderProps {
 
 export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children }) => {
   const [threads, setThreads] = useState<{ [key: string]: WorkflowThread }>({});
+  // Threads past the first page, loaded on demand; the periodic sync only refetches the first page
+  const olderThreads = useRef<{ [key: string]: WorkflowThread }>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   // Convert API thread info to local thread format
   const convertApiThreadToLocal = (apiThread: ApiThreadInfo): WorkflowThread => {
@@ -65,14 +71,23 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
   const syncWithBackend = useCallback(async () => {
     try {
       console.log('🔄 Syncing threads with backend...');
-      const apiThreads = await getThreads();
-      console.log('📡 Received threads from backend:', apiThreads);
+      const page = await getThreads();
+      console.log('📡 Received threads from backend:', page.threads);
       
       const localThreads: { [key: string]: WorkflowThread } = {};
       
-      apiThreads.forEach(apiThread => {
+      page.threads.forEach(apiThread => {
         localThreads[apiThread.thread_id] = convertApiThreadToLocal(apiThread);
       });
+      // Threads loaded with "load more" stay listed below the first page
+      Object.values(olderThreads.current).forEach(thread => {
+        if (!localThreads[thread.id]) {
+          localThreads[thread.id] = thread;
+        }
+      });
+      if (Object.keys(olderThreads.current).length === 0) {
+        setNextCursor(page.next_cursor);
+      }
       
       console.log('🔄 Converting to local format:', localThreads);
       setThreads(localThreads);
@@ -82,6 +97,34 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
     }
   }, []);
 
+  // Load the next page of older threads
+  const loadMoreThreads = useCallback(async () => {
+    if (!nextCursor) {
+      return;
+    }
+    try {
+      const page = await getThreads(nextCursor);
+      const loaded: { [key: string]: WorkflowThread } = {};
+      page.threads.forEach(apiThread => {
+        loaded[apiThread.thread_id] = convertApiThreadToLocal(apiThread);
+      });
+      olderThreads.current = { ...olderThreads.current, ...loaded };
+      setNextCursor(page.next_cursor);
+      setThreads(prev => {
+        const merged = { ...prev };
+        Object.values(loaded).forEach(thread => {
+          // Threads already listed (e.g. updated since) keep their fresher entry
+          if (!merged[thread.id]) {
+            merged[thread.id] = thread;
+          }
+        });
+        return merged;
+      });
+    } catch (error) {
+      console.error('❌ Failed to load more threads:', error);
+    }
+  }, [nextCursor]);
+
   // Refresh threads from backend
   const refreshThreads = useCallback(async () => {
     await syncWithBackend();
@@ -134,6 +177,8 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
         newStatus = 'complete';
       } else if (newEvent.type === 'error') {
         newStatus = 'error';
+      } else if (newEvent.type === 'workflow_paused') {
+        newStatus = 'paused';
       } else if (newEvent.type === 'progress') {
         newStatus = 'running';
       }
@@ -186,6 +231,25 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
     });
   }, []);
 
+  // Take status and progress from the backend's copy of a thread, keeping its event history
+  const applyThreadInfo = useCallback((apiThread: ApiThreadInfo) => {
+    setThreads(prev => {
+      const thread = prev[apiThread.thread_id];
+      if (!thread) return prev;
+      const fresh = convertApiThreadToLocal(apiThread);
+      return {
+        ...prev,
+        [apiThread.thread_id]: {
+          ...thread,
+          status: fresh.status,
+          lastUpdated: fresh.lastUpdated,
+          progress: fresh.progress,
+          currentAgent: fresh.currentAgent
+        }
+      };
+    });
+  }, []);
+
   const getConversationHistory = useCallback((threadId: string) => {
     const thread = threads[threadId];
     return thread?.conversationMemory || [];
@@ -196,6 +260,7 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
   }, [threads]);
 
   const deleteThread = useCallback((threadId: string) => {
+    delete olderThreads.current[threadId];
     setThreads(prev => {
       const newThreads = { ...prev };
       delete newThreads[threadId];
@@ -208,10 +273,13 @@ export const WorkflowProvider: React.FC<WorkflowProviderProps> = ({ children })
       threads, 
       addThread, 
       updateThread, 
+      applyThreadInfo,
       getThreadById, 
       deleteThread,
       refreshThreads,
       syncWithBackend,
+      hasMoreThreads: nextCursor !== null,
+      loadMoreThreads,
       addConversationMessage,
       getConversationHistory
     }}>
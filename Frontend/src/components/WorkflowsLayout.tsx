@@ -6,7 +6,7 @@ import { LuLinkedin, LuImage, LuFilm, LuYoutube, LuInstagram, LuTrash2, LuPause,
 import { deleteThread, pauseThread, resumeThread } from '../api/apiService';
 
 const WorkflowsLayout: React.FC = () => {
-    const { threads, refreshThreads, syncWithBackend } = useWorkflow();
+    const { threads, refreshThreads, syncWithBackend, deleteThread: removeThread, hasMoreThreads, loadMoreThreads } = useWorkflow();
     const [selectedThreadId, setSelectedThreadId] = useState<string | null>(null);
     const navigate = useNavigate();
 
@@ -31,6 +31,7 @@ const WorkflowsLayout: React.FC = () => {
         e.stopPropagation();
         try {
             await deleteThread(threadId);
+            removeThread(threadId);
             await refreshThreads();
         } catch (error) {
             console.error('Failed to delete thread:', error);
@@ -196,6 +197,14 @@ const WorkflowsLayout: React.FC = () => {
                                     </div>
                                 </div>
                             ))}
+                            {hasMoreThreads && (
+                                <button
+                                    onClick={loadMoreThreads}
+                                    className="w-full py-2 text-sm text-gray-300 bg-gray-800 rounded-lg hover:bg-gray-700 transition-colors"
+                                >
+                                    Load more
+                                </button>
+                            )}
                         </div>
                     )}
                 </div>
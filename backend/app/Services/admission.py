@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional
+from app.Services.step_metrics import record_queue_time
+from app.config import (
+    GEMINI_TEXT_CONCURRENCY, GEMINI_TEXT_RPM, GEMINI_TEXT_TPM,
+    GEMINI_IMAGE_CONCURRENCY, GEMINI_IMAGE_RPM, GEMINI_IMAGE_TPM,
+    STUB_CONCURRENCY, STUB_RPM, STUB_TPM,
+)
+
+# Priority lanes, highest first: interactive requests (e.g. /api/chat) jump ahead of batch workflow steps
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+_current_lane: ContextVar[str] = ContextVar("admission_lane", default=BATCH)
+
+@contextmanager
+def use_lane(lane: str) -> Iterator[None]:
+    """Runs every model call made inside the block in the given priority lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown admission lane: '{lane}'")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt or completion (about four characters per token)."""
+    return max(1, len(text or "") // 4)
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute` units per minute, holding up to one
+    minute's worth. `charge` may drive it negative, which delays later takers
+    until the debt is paid back. A limit of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units can be taken (0 if they can be taken now)."""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if self.per_minute > 0:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def charge(self, amount: float) -> None:
+        if self.per_minute > 0:
+            self._refill()
+            self.level -= amount
+
+class Lease:
+    """An admitted call; `charge` bills tokens only known once it completed (e.g. the completion)."""
+
+    def __init__(self, limiter: "EndpointLimiter", wait_time: float):
+        self.limiter = limiter
+        self.wait_time = wait_time
+
+    def charge(self, tokens: int) -> None:
+        self.limiter.tokens.charge(tokens)
+
+class EndpointLimiter:
+    """
+    Admission control for one upstream endpoint.
+
+    A call is admitted when a concurrency slot is free and both the request
+    (RPM) and token (TPM) buckets can cover it. Waiting calls are admitted
+    strictly by lane priority, then in arrival order. A concurrency of 0 means
+    unlimited.
+    """
+
+    def __init__(self, name: str, concurrency: int, rpm: float, tpm: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.in_flight = 0
+        self._queue: List[list] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {lane: {"admitted": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in LANES}
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 1, lane: Optional[str] = None) -> AsyncIterator[Lease]:
+        """Waits for admission, holds a concurrency slot for the duration of the block."""
+        lane = lane or _current_lane.get()
+        wait_time = await self._admit(tokens, lane)
+        try:
+            yield Lease(self, wait_time)
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def _admit(self, tokens: int, lane: str) -> float:
+        waiter = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        heapq.heappush(self._queue, [LANES.index(lane), next(self._sequence), tokens, waiter])
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the caller was cancelled: hand the slot back.
+                self.in_flight -= 1
+            self._dispatch()
+            raise
+
+        wait_time = time.monotonic() - queued_at
+        stats = self._stats[lane]
+        stats["admitted"] += 1
+        stats["wait_total"] += wait_time
+        stats["wait_max"] = max(stats["wait_max"], wait_time)
+        record_queue_time(wait_time)
+        return wait_time
+
+    def _dispatch(self) -> None:
+        """Admits waiting calls in priority order for as long as slots and budget allow."""
+        while self._queue:
+            priority, _, tokens, waiter = self._queue[0]
+            if waiter.done():
+                heapq.heappop(self._queue)
+                continue
+            if 0 < self.concurrency <= self.in_flight:
+                return
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if delay > 0:
+                self._wake_after(delay)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _wake_after(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is loop and not self._timer.cancelled():
+            return
+
+        def wake() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_later(delay, wake)
+        self._timer_loop = loop
+
+    def stats(self) -> Dict[str, Any]:
+        depth = {lane: 0 for lane in LANES}
+        for priority, _, _, waiter in self._queue:
+            if not waiter.done():
+                depth[LANES[priority]] += 1
+        return {
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "queue_depth": depth,
+            "lanes": {
+                lane: {
+                    "admitted": stats["admitted"],
+                    "wait_avg": round(stats["wait_total"] / stats["admitted"], 4) if stats["admitted"] else 0.0,
+                    "wait_max": round(stats["wait_max"], 4),
+                }
+                for lane, stats in self._stats.items()
+            },
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+        }
+
+class AdmissionController:
+    """Shared admission control for every upstream model endpoint."""
+
+    def __init__(self, limiters: Dict[str, EndpointLimiter]):
+        self.limiters = limiters
+
+    def limit(self, endpoint: str, tokens: int = 1, lane: Optional[str] = None):
+        """`async with admission.limit(endpoint, tokens) as lease:` around one upstream call."""
+        return self.limiters[endpoint].limit(tokens, lane)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+# The text endpoint is shared by the LangChain chat model and the image prompt model (same quota).
+admission = AdmissionController({
+    "gemini_text": EndpointLimiter("gemini_text", GEMINI_TEXT_CONCURRENCY, GEMINI_TEXT_RPM, GEMINI_TEXT_TPM),
+    "gemini_image": EndpointLimiter("gemini_image", GEMINI_IMAGE_CONCURRENCY, GEMINI_IMAGE_RPM, GEMINI_IMAGE_TPM),
+    # Synthetic load from the stub provider never uses up the Gemini quotas
+    "stub_text": EndpointLimiter("stub_text", STUB_CONCURRENCY, STUB_RPM, STUB_TPM),
+    "stub_image": EndpointLimiter("stub_image", STUB_CONCURRENCY, STUB_RPM, STUB_TPM),
+})
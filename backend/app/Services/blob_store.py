@@ -0,0 +1,83 @@
+import base64
+import hashlib
+import os
+import re
+import threading
+from typing import Optional, Tuple
+from app.config import BLOB_DIR
+
+# Workflow state holds this URL instead of the blob's bytes; GET /api/blobs/{digest} serves them
+BLOB_URL_PREFIX = "/api/blobs/"
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DATA_URL_PATTERN = re.compile(r"^data:([\w.+-]+/[\w.+-]+);base64,", re.IGNORECASE)
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_URL_PREFIX)
+
+class BlobStore:
+    """
+    Content-addressed store for binary payloads (generated images).
+
+    A blob is written once under the SHA-256 of its bytes, so storing the same
+    content again is free and a reference never goes stale. Workflow state,
+    checkpoints and events only carry the reference URL; the bytes are read
+    when a client requests them.
+    """
+
+    def __init__(self, root: str = BLOB_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Stores the bytes (unless already present) and returns their reference URL."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Written aside and renamed, so a reader never sees a partial blob
+                tmp_file = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_file, "wb") as f:
+                    f.write(data)
+                with open(f"{path}.type", "w") as f:
+                    f.write(content_type)
+                os.replace(tmp_file, path)
+        return BLOB_URL_PREFIX + digest
+
+    def put_data_url(self, data_url: str) -> str:
+        """Decodes a base64 data: URL once and stores its bytes."""
+        match = DATA_URL_PATTERN.match(data_url)
+        if not match:
+            raise ValueError("Not a base64 data: URL")
+        return self.put(base64.b64decode(data_url[match.end():]), match.group(1).lower())
+
+    def stat(self, digest: str) -> Optional[Tuple[int, str]]:
+        """(size, content type) of a stored blob, or None if there is none."""
+        if not DIGEST_PATTERN.match(digest):
+            return None
+        path = self.path(digest)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        try:
+            with open(f"{path}.type", "r") as f:
+                content_type = f.read().strip()
+        except OSError:
+            content_type = "application/octet-stream"
+        return size, content_type
+
+    def read(self, ref_or_digest: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Bytes `start`..`end` (inclusive) of a blob, given its digest or reference URL."""
+        digest = ref_or_digest[len(BLOB_URL_PREFIX):] if is_blob_ref(ref_or_digest) else ref_or_digest
+        if not DIGEST_PATTERN.match(digest):
+            raise KeyError(ref_or_digest)
+        with open(self.path(digest), "rb") as f:
+            f.seek(start)
+            return f.read() if end is None else f.read(end - start + 1)
+
+# Shared store; BLOB_DIR is relative to the backend's working directory like the other data files.
+blob_store = BlobStore()
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple
+from app.Services.event_hub import EventHub, TRANSIENT_EVENTS, event_hub
+from app.Services.progress_tracker import progress_tracker
+from app.Services.run_leases import PROCESS_ID
+from app.config import EVENT_BUS_BACKEND, EVENT_BUS_DB_FILE, EVENT_BUS_POLL_INTERVAL, EVENT_BUS_RETENTION
+
+EventItem = Tuple[int, Dict[str, Any]]
+
+# Stored events read back per query when a subscriber catches up
+HISTORY_PAGE_SIZE = 256
+
+class InProcessEventBus:
+    """
+    Delivers workflow events to subscribers of the same process.
+
+    Every event bus hands the events it carries to the local EventHub, which
+    keeps the recent events of each thread for replay and fans them out to
+    the SSE streams of this process.
+    """
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    def start(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+    def open(self, thread_id: str) -> None:
+        """Marks a thread as about to run, so its stream can be subscribed to before the first event."""
+        self.hub.open(thread_id)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.hub.publish(event)
+
+    def has_events(self, thread_id: str) -> bool:
+        return self.hub.has_events(thread_id)
+
+    def subscribe(self, thread_id: str, last_event_id: int = 0,
+                  heartbeat: Optional[float] = None) -> AsyncGenerator[Optional[EventItem], None]:
+        """Yields (id, event) after `last_event_id`, then live events until the run ends (see EventHub.subscribe)."""
+        return self.hub.subscribe(thread_id, last_event_id, heartbeat)
+
+class SqliteEventBus(InProcessEventBus):
+    """
+    Shares workflow events between the server processes on one machine.
+
+    Events are appended to a table of a SQLite file; the row id is the event
+    id, so it grows across processes and a resumed run continues where its
+    previous process stopped. Each process tails the table every
+    `poll_interval` seconds and feeds the events other processes wrote into
+    its own hub. A subscriber first reads the thread's events after its last
+    id back from the table, so any worker can serve any thread's stream.
+
+    Once started, published events are queued and inserted in batches in a
+    worker thread, and reach the local hub once they have their ids; the table
+    is tailed from a worker thread as well. Until `start()` is called (e.g. in
+    scripts) every event is written through synchronously.
+    """
+
+    def __init__(self, hub: EventHub, db_file: str = EVENT_BUS_DB_FILE,
+                 poll_interval: float = EVENT_BUS_POLL_INTERVAL, retention: float = EVENT_BUS_RETENTION,
+                 origin: str = PROCESS_ID):
+        super().__init__(hub)
+        self.db_file = db_file
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = origin
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                event TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_thread_id ON events (thread_id, id);
+        """)
+        # Only events written after this process started are tailed; older ones are read on demand
+        self._last_seen = self._execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        self._task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._dirty: Optional[asyncio.Event] = None
+        # Inserting and handing events to the hub is not interleaved with a poll, so ids reach the hub in order
+        self._io_lock: Optional[asyncio.Lock] = None
+        self._pending: List[Tuple[Dict[str, Any], tuple]] = []
+        self._pruned_at = 0.0
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def start(self) -> None:
+        """Starts the batched writer and tailing the events of other processes on the running event loop."""
+        if self._task is None or self._task.done():
+            self._dirty = asyncio.Event()
+            self._io_lock = asyncio.Lock()
+            self._writer = asyncio.create_task(self._write())
+            self._task = asyncio.create_task(self._tail())
+            if self._pending:
+                self._dirty.set()
+
+    async def aclose(self) -> None:
+        """Writes the queued events and stops; later events (e.g. of runs finishing during shutdown) are written through."""
+        tasks = [task for task in (self._task, self._writer) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._writer = None
+        if self._pending and not await self._flush():
+            print(f"Warning: {len(self._pending)} workflow events could not be written to the event bus")
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        thread_id = event.get("thread_id")
+        if not thread_id:
+            return
+        row = (thread_id, self.origin, json.dumps(event, default=str), time.time())
+        if self._writer is None:
+            self.hub.publish(event, self._insert([row])[0])
+            return
+        self._pending.append((event, row))
+        self._dirty.set()
+
+    def _insert(self, rows: List[tuple]) -> List[int]:
+        """Inserts events in one transaction and returns their ids."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [self._conn.execute(
+                    "INSERT INTO events (thread_id, origin, event, created_at) VALUES (?, ?, ?, ?)", row
+                ).lastrowid for row in rows]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    async def _flush(self) -> bool:
+        """Writes the queued events in a worker thread, then hands them to the hub; False if the write failed."""
+        async with self._io_lock:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    ids = await asyncio.get_running_loop().run_in_executor(
+                        None, self._insert, [row for _, row in batch])
+                except sqlite3.Error as e:
+                    print(f"Warning: event bus write failed, will retry: {e}")
+                    self._pending[:0] = batch
+                    return False
+                for (event, _), event_id in zip(batch, ids):
+                    self.hub.publish(event, event_id)
+        return True
+
+    async def _write(self) -> None:
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            # Shielded so that stopping the writer never drops a batch that is being inserted
+            if not await asyncio.shield(self._flush()):
+                await asyncio.sleep(self.poll_interval)
+                self._dirty.set()
+
+    def has_events(self, thread_id: str) -> bool:
+        return self.hub.has_events(thread_id) or self._execute(
+            "SELECT 1 FROM events WHERE thread_id = ? LIMIT 1", (thread_id,)
+        ).fetchone() is not None
+
+    async def subscribe(self, thread_id: str, last_event_id: int = 0,
+                        heartbeat: Optional[float] = None) -> AsyncGenerator[Optional[EventItem], None]:
+        """Yields the stored events after `last_event_id` page by page, then follows the hub (see EventHub.subscribe)."""
+        last, tail = last_event_id, []
+        while True:
+            page = await asyncio.get_running_loop().run_in_executor(
+                None, self.history, thread_id, last, HISTORY_PAGE_SIZE)
+            for event_id, event in page:
+                last = event_id
+                if event.get("type") not in TRANSIENT_EVENTS:
+                    tail.append((event_id, event))
+                    yield event_id, event
+            tail = tail[-self.hub.buffer_size:]
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
+        # Opens the channel of a thread this process has not seen, knowing whether its run has ended
+        self.hub.backfill(thread_id, tail)
+        async for item in self.hub.subscribe(thread_id, last, heartbeat):
+            yield item
+
+    def history(self, thread_id: str, after_id: int = 0, limit: int = HISTORY_PAGE_SIZE) -> List[EventItem]:
+        """The first `limit` stored events of a thread after `after_id`, oldest first; page on from the last id."""
+        rows = self._execute(
+            "SELECT id, event FROM events WHERE thread_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (thread_id, after_id, limit)
+        ).fetchall()
+        return [(event_id, json.loads(event)) for event_id, event in rows]
+
+    def _read_new(self) -> List[Tuple[int, str, str]]:
+        rows = self._execute(
+            "SELECT id, origin, event FROM events WHERE id > ? ORDER BY id",
+            (self._last_seen,)
+        ).fetchall()
+        if rows:
+            self._last_seen = rows[-1][0]
+        return rows
+
+    def _deliver(self, rows: List[Tuple[int, str, str]]) -> None:
+        for event_id, origin, event in rows:
+            if origin != self.origin:
+                self.hub.publish(json.loads(event), event_id)
+
+    def poll(self) -> int:
+        """Feeds the events other processes wrote since the last poll into the hub."""
+        rows = self._read_new()
+        self._deliver(rows)
+        return len(rows)
+
+    def prune(self) -> None:
+        """Drops events older than the retention period."""
+        self._execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.retention,))
+        self._pruned_at = time.monotonic()
+
+    async def _tail(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                async with self._io_lock:
+                    self._deliver(await loop.run_in_executor(None, self._read_new))
+                if time.monotonic() - self._pruned_at > 60:
+                    await loop.run_in_executor(None, self.prune)
+            except sqlite3.Error as e:
+                print(f"Warning: event bus poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+def create_event_bus(backend: str = EVENT_BUS_BACKEND):
+    """Builds the event bus selected by EVENT_BUS_BACKEND ("memory" or "sqlite")."""
+    if backend == "memory":
+        return InProcessEventBus(event_hub)
+    if backend == "sqlite":
+        return SqliteEventBus(event_hub)
+    raise ValueError(f"Unknown event bus backend: '{backend}'")
+
+# Every event that goes through the progress tracker is published on the bus.
+event_bus = create_event_bus()
+progress_tracker.subscribe(event_bus.publish)
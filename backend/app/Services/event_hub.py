@@ -0,0 +1,169 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from typing import AsyncGenerator, Dict, Any, Iterable, Optional, Set, Tuple
+from app.config import EVENT_BUFFER_SIZE, EVENT_HUB_MAX_THREADS
+
+# Events after which a run emits nothing more (a resumed run reopens the channel)
+TERMINAL_EVENTS = ("workflow_complete", "workflow_paused", "error")
+# Events only delivered live, never replayed: streamed model chunks would push the
+# step events out of the buffer, and each step's full output follows in step_complete
+TRANSIENT_EVENTS = ("step_delta",)
+
+class ThreadChannel:
+    """Recent events of one thread plus the queues of its live subscribers."""
+
+    def __init__(self, buffer_size: int):
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.last_id = 0
+        # Id of the newest event pushed out of the buffer
+        self.dropped_id = 0
+        self.closed = False
+        self.subscribers: Set[asyncio.Queue] = set()
+
+class EventHub:
+    """
+    Per-thread fan-out of workflow events with replay.
+
+    Every event published for a thread gets the next id of that thread
+    (1, 2, 3, ...), unless the event bus delivering it assigned one, and is
+    kept in a ring buffer of the last `buffer_size` events. A subscriber
+    passing the last id it saw gets only the buffered events after it and
+    then follows the live stream, until the run ends.
+    Channels of finished runs are kept (least recently used first out) up to
+    `max_threads`, so late reconnects can still replay the tail of a run.
+
+    Transient events (step_delta) get ids but are not buffered. A subscriber
+    whose last id is older than the buffer first gets a `replay_truncated`
+    event (without an id) telling it to reload the thread instead.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE, max_threads: int = EVENT_HUB_MAX_THREADS):
+        self.buffer_size = buffer_size
+        self.max_threads = max_threads
+        self._channels: "OrderedDict[str, ThreadChannel]" = OrderedDict()
+
+    def open(self, thread_id: str) -> ThreadChannel:
+        """Returns the channel of a thread, (re)opening it for a new run."""
+        channel = self._channels.get(thread_id)
+        if channel is None:
+            channel = ThreadChannel(self.buffer_size)
+            self._channels[thread_id] = channel
+            self._evict()
+        channel.closed = False
+        self._channels.move_to_end(thread_id)
+        return channel
+
+    def is_live(self, thread_id: str) -> bool:
+        channel = self._channels.get(thread_id)
+        return channel is not None and not channel.closed
+
+    def has_events(self, thread_id: str) -> bool:
+        return thread_id in self._channels
+
+    def publish(self, event: Dict[str, Any], event_id: Optional[int] = None) -> None:
+        """Stores an event in its thread's buffer and hands it to the live subscribers."""
+        thread_id = event.get("thread_id")
+        if not thread_id:
+            return
+        channel = self._channels.get(thread_id) or self.open(thread_id)
+        if event_id is None:
+            event_id = channel.last_id + 1
+        elif event_id <= channel.last_id:
+            # Already delivered (e.g. backfilled from the event bus before it arrived live)
+            return
+        item = (event_id, event)
+        channel.last_id = event_id
+        if event.get("type") not in TRANSIENT_EVENTS:
+            if len(channel.buffer) == channel.buffer.maxlen:
+                channel.dropped_id = channel.buffer[0][0]
+            channel.buffer.append(item)
+        for queue in channel.subscribers:
+            queue.put_nowait(item)
+        # A run resumed in another process reopens the channel with its first event
+        channel.closed = event.get("type") in TERMINAL_EVENTS
+        if channel.closed:
+            for queue in channel.subscribers:
+                queue.put_nowait(None)
+
+    def backfill(self, thread_id: str, items: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        """Adds stored events older than the buffered ones (ids ascending), e.g. read back from the event bus."""
+        channel = self._channels.get(thread_id) or self.open(thread_id)
+        first_id = channel.buffer[0][0] if channel.buffer else None
+        older = [item for item in items if (first_id is None or item[0] < first_id)
+                 and item[1].get("type") not in TRANSIENT_EVENTS]
+        if not older:
+            return
+        if first_id is None:
+            channel.last_id = max(channel.last_id, older[-1][0])
+            channel.closed = older[-1][1].get("type") in TERMINAL_EVENTS
+        room = channel.buffer.maxlen - len(channel.buffer)
+        kept = older[-room:] if room else []
+        if len(kept) < len(older):
+            channel.dropped_id = max(channel.dropped_id, older[-len(kept) - 1][0])
+        channel.buffer.extendleft(reversed(kept))
+
+    async def subscribe(self, thread_id: str, last_event_id: int = 0,
+                        heartbeat: Optional[float] = None) -> AsyncGenerator[Optional[Tuple[int, Dict[str, Any]]], None]:
+        """
+        Yields (id, event) for every event after `last_event_id`: first the
+        buffered ones, then live ones until the run ends. When `heartbeat` is
+        set, None is yielded after that many idle seconds. If events after
+        `last_event_id` are no longer buffered, (None, replay_truncated event)
+        comes first.
+        """
+        channel = self._channels.get(thread_id)
+        if channel is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        if channel.closed:
+            queue.put_nowait(None)
+        try:
+            # Events published while the backlog is replayed also land in the queue; ids dedupe them.
+            last = last_event_id
+            if last < channel.dropped_id:
+                yield None, {
+                    "type": "replay_truncated",
+                    "thread_id": thread_id,
+                    "first_event_id": channel.buffer[0][0] if channel.buffer else None,
+                }
+            for event_id, event in list(channel.buffer):
+                if event_id > last:
+                    last = event_id
+                    yield event_id, event
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    return
+                if item[0] > last:
+                    last = item[0]
+                    yield item
+        finally:
+            channel.subscribers.discard(queue)
+
+    def _evict(self) -> None:
+        while len(self._channels) > self.max_threads:
+            for thread_id, channel in self._channels.items():
+                if channel.closed and not channel.subscribers:
+                    del self._channels[thread_id]
+                    break
+            else:
+                return
+
+def format_sse(item: Optional[Tuple[int, Dict[str, Any]]]) -> str:
+    """Encodes a hub item as a text/event-stream frame (None becomes a heartbeat comment)."""
+    if item is None:
+        return ": heartbeat\n\n"
+    event_id, event = item
+    if event_id is None:
+        # Leaves the client's Last-Event-ID as it is
+        return f"data: {json.dumps(event)}\n\n"
+    return f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+# Shared hub of this process; the event bus feeds it every workflow event.
+event_hub = EventHub()
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Optional
+import aiohttp
+from app.config import HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT
+
+class HttpClientManager:
+    """
+    Application-scoped aiohttp session shared by every outbound HTTP call.
+
+    The session keeps a pooled connector (bounded overall and per host) with
+    keep-alive and DNS caching, so repeated and concurrent calls to the same
+    API reuse TCP/TLS connections instead of handshaking every time. The
+    FastAPI lifespan starts and closes it; scripts that never call `start()`
+    get a session created lazily on their event loop.
+    """
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 dns_cache_ttl: int = HTTP_DNS_CACHE_TTL, keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        """Creates the shared session on the running event loop."""
+        self.session()
+
+    def session(self) -> aiohttp.ClientSession:
+        """Returns the shared session, creating it on first use (or after its loop went away)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    async def aclose(self) -> None:
+        """Closes the session and every pooled connection."""
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+# Shared client used by the agents; started and closed by the FastAPI lifespan.
+http_client = HttpClientManager()
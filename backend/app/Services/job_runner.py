@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional, List
+from app.config import WORKFLOW_WORKERS
+
+JobFactory = Callable[[], Awaitable[Any]]
+
+class JobRunner:
+    """
+    In-process pool of asyncio workers executing queued jobs (workflow runs).
+
+    Jobs run independently of the request that submitted them, and at most
+    `workers` of them run at once; the rest wait in a FIFO queue. Like the
+    other shared services it is started by the FastAPI lifespan, and lazily on
+    the first submit when used outside the app.
+    """
+
+    def __init__(self, workers: int = WORKFLOW_WORKERS):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._started_at = 0.0
+        self._busy_time = 0.0
+        self._started_jobs = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def start(self) -> None:
+        """Starts the workers on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        # First start, or the previous loop went away (scripts, tests) together with its workers
+        self._loop = loop
+        self._jobs = {}
+        self._queue = asyncio.Queue()
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+
+    def submit(self, job_id: str, factory: JobFactory) -> bool:
+        """Queues a job; returns False if a job with the same id is already queued or running."""
+        if job_id in self._jobs:
+            return False
+        self.start()
+        self._jobs[job_id] = {"state": "queued", "queued_at": time.monotonic(), "task": None}
+        self._queue.put_nowait((job_id, factory))
+        self.counters["submitted"] += 1
+        return True
+
+    def is_active(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job["task"] is not None:
+            job["task"].cancel()
+        else:
+            # Still queued: the worker skips it when it comes up.
+            job["state"] = "cancelled"
+        return True
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, factory = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] == "cancelled":
+                self._finish(job_id, "cancelled")
+                continue
+
+            job["started_at"] = time.monotonic()
+            wait = job["started_at"] - job["queued_at"]
+            self._started_jobs += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            job["state"] = "running"
+            job["task"] = asyncio.ensure_future(factory())
+            try:
+                # Shielded so that stopping the worker and cancelling the job are told apart
+                await asyncio.shield(job["task"])
+                self._finish(job_id, "completed")
+            except asyncio.CancelledError:
+                self._finish(job_id, "cancelled")
+                if not job["task"].cancelled():
+                    # The worker itself is being stopped: stop the job with it.
+                    job["task"].cancel()
+                    await asyncio.gather(job["task"], return_exceptions=True)
+                    raise
+            except Exception as e:
+                print(f"Warning: job {job_id} failed: {e}")
+                self._finish(job_id, "failed")
+            finally:
+                self._busy_time += time.monotonic() - job["started_at"]
+
+    def _finish(self, job_id: str, outcome: str) -> None:
+        self._jobs.pop(job_id, None)
+        self.counters[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        running = [job_id for job_id, job in self._jobs.items() if job["state"] == "running"]
+        uptime = now - self._started_at if self._started_at else 0.0
+        busy = self._busy_time + sum(now - self._jobs[job_id]["started_at"] for job_id in running)
+        return {
+            "workers": self.workers,
+            "busy_workers": len(running),
+            "queue_depth": self.queue_depth(),
+            "running": running,
+            **self.counters,
+            "wait_avg": round(self._wait_total / self._started_jobs, 4) if self._started_jobs else 0.0,
+            "wait_max": round(self._wait_max, 4),
+            "utilization": round(busy / (uptime * self.workers), 4) if uptime else 0.0,
+        }
+
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._jobs.values() if job["state"] == "queued")
+
+    async def aclose(self) -> None:
+        """Stops the workers, cancelling queued and running jobs."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._jobs = {}
+        self._queue = None
+        self._loop = None
+
+# Shared pool running workflow jobs; started and stopped by the FastAPI lifespan.
+job_runner = JobRunner()
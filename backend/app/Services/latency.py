@@ -0,0 +1,62 @@
+import asyncio
+import random
+from typing import Dict, Optional
+from app.Services.step_metrics import record_injected_delay
+from app.Services.tracing import tracer
+from app.config import LATENCY_MODE, LATENCY_SCALE, LATENCY_SEED
+
+# Mean delay (seconds) of every simulated operation, used by the "fixed" and "sampled" modes
+DEFAULT_DELAYS: Dict[str, float] = {
+    "linkedin_post": 4.0,
+    "social_post": 4.0,
+    "video_processing": 5.0,
+    "image_api": 5.0,
+    # Whole-step delays of the synthetic agent backend
+    "synthetic_ideation": 2.0,
+    "synthetic_image": 3.0,
+    "synthetic_video": 4.0,
+    "synthetic_posting": 1.0,
+}
+
+LATENCY_MODES = ("none", "fixed", "sampled")
+
+class LatencyPolicy:
+    """
+    Artificial latency injected in place of work the prototype does not really do.
+
+    "none" (production) never sleeps, "fixed" sleeps the configured delay of an
+    operation scaled by `scale`, and "sampled" draws it from an exponential
+    distribution with that mean (seeded, so load tests are repeatable). Every
+    injected delay is added to the metrics of the current step so it can be
+    told apart from real latency.
+    """
+
+    def __init__(self, mode: str = "none", scale: float = 1.0, delays: Optional[Dict[str, float]] = None,
+                 seed: Optional[int] = None):
+        if mode not in LATENCY_MODES:
+            raise ValueError(f"Unknown latency mode: '{mode}'")
+        self.mode = mode
+        self.scale = scale
+        self.delays = {**DEFAULT_DELAYS, **(delays or {})}
+        self._random = random.Random(seed)
+
+    def delay_for(self, operation: str) -> float:
+        """Returns the delay (seconds) to inject for one occurrence of an operation."""
+        if self.mode == "none":
+            return 0.0
+        mean = self.delays.get(operation, 0.0) * self.scale
+        if self.mode == "sampled" and mean > 0:
+            return self._random.expovariate(1 / mean)
+        return mean
+
+    async def wait(self, operation: str) -> float:
+        """Sleeps for the operation's delay and records it in the step metrics and the trace."""
+        seconds = self.delay_for(operation)
+        if seconds > 0:
+            with tracer.span("latency.injected", {"latency.operation": operation, "latency.seconds": seconds}):
+                await asyncio.sleep(seconds)
+            record_injected_delay(seconds)
+        return seconds
+
+# Shared policy configured from the environment (zero latency unless LATENCY_MODE says otherwise).
+latency_policy = LatencyPolicy(LATENCY_MODE, LATENCY_SCALE, seed=LATENCY_SEED)
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from app.config import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_DB_FILE, LLM_CACHE_MAX_DISK_ENTRIES
+
+def normalize_text(text: str) -> str:
+    """Normalizes line endings and surrounding/trailing whitespace, which never change a prompt's meaning."""
+    lines = str(text).replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def cache_key(model: str, params: Dict[str, Any], messages: List[Tuple[str, str]]) -> str:
+    """Content address of a model call: sha256 over the model, its generation parameters and the normalized messages."""
+    material = {
+        "model": model,
+        "params": {key: params[key] for key in sorted(params) if params[key] is not None},
+        "messages": [[role, normalize_text(content)] for role, content in messages],
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+class LLMCache:
+    """
+    Two-tier cache of model responses keyed by `cache_key`.
+
+    The memory tier is an LRU bounded to `max_entries`. The optional disk tier
+    is a SQLite table bounded to `max_disk_entries` (least recently used rows
+    are evicted), so cached answers survive restarts. Entries older than `ttl`
+    seconds are treated as misses and dropped. Disk access runs in a worker
+    thread so lookups never block the event loop.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400, db_file: Optional[str] = None,
+                 max_disk_entries: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db_file = db_file or None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    # --- Public API ---
+
+    async def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for a key, or None on a miss."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if now - created_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.counters["hits"] += 1
+                self.counters["memory_hits"] += 1
+                return value
+            del self._memory[key]
+            self.counters["expired"] += 1
+
+        if self._db_file:
+            entry = await asyncio.get_running_loop().run_in_executor(None, self._disk_get, key, now)
+            if entry is not None:
+                value, created_at = entry
+                self._remember(key, value, created_at)
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: str) -> None:
+        """Stores a response in both tiers."""
+        if not self.enabled:
+            return
+        created_at = time.time()
+        self._remember(key, value, created_at)
+        self.counters["stores"] += 1
+        if self._db_file:
+            await asyncio.get_running_loop().run_in_executor(None, self._disk_put, key, value, created_at)
+
+    def record_bypass(self) -> None:
+        self.counters["bypassed"] += 1
+
+    def clear(self) -> None:
+        """Drops every cached response from both tiers."""
+        self._memory.clear()
+        if self._db_file:
+            with self._db_lock:
+                db = self._connect()
+                db.execute("DELETE FROM llm_cache")
+                db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_enabled": bool(self._db_file),
+            "ttl": self.ttl,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- Tiers ---
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self._db_file, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        return self._db
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        with self._db_lock:
+            db = self._connect()
+            row = db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                db.commit()
+                self.counters["expired"] += 1
+                return None
+            db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+            return row[0], row[1]
+
+    def _disk_put(self, key: str, value: str, created_at: float) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, created_at, created_at)
+            )
+            overflow = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_disk_entries
+            if overflow > 0:
+                db.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                self.counters["evictions"] += overflow
+            db.commit()
+
+# Shared response cache used by llm_service.
+llm_cache = LLMCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_DB_FILE, LLM_CACHE_MAX_DISK_ENTRIES,
+                     enabled=LLM_CACHE_ENABLED)
@@ -1,34 +1,205 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from ..config import GOOGLE_API_KEY
-from langchain_core.messages import HumanMessage, SystemMessage
-from typing import List, Union
+from typing import Any, AsyncGenerator, Dict, List, Sequence, Union
+from .step_metrics import record_llm_call, record_cache_hit, record_first_token
+from .metrics import llm_call_duration, llm_tokens, errors_total
+from .tracing import tracer
+from .llm_cache import llm_cache, cache_key
+from .single_flight import flight_group
+from .admission import admission, estimate_tokens, use_lane, BATCH
+from .token_stream import stream_to, streaming_enabled, emit_token
+from ..providers.base import LLMProvider, Messages
+from ..providers.registry import get_provider
+import asyncio
+import contextvars
+import time
 
-# Initialize a stable Google Gemini model
-try:
-    chat_model = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=GOOGLE_API_KEY)
-except Exception as e:
-    raise ValueError(f"Failed to initialize ChatGoogleGenerativeAI: {e}. Please check your GOOGLE_API_KEY.")
+# A prompt: plain text, (role, text) pairs or LangChain messages
+Prompt = Union[str, Sequence[Any]]
 
-async def generate_text(prompt: Union[str, List[Union[HumanMessage, SystemMessage]]]) -> str:
+# Identical prompts already on their way to the model are sent only once
+llm_flights = flight_group("llm")
+
+class SharedStream:
+    """
+    The streamed chunks of one shared model call, forwarded to every caller
+    waiting on it.
+
+    Each caller listens from its own context, so the chunks reach its token
+    sink and its first-token step metric as if it had made the call itself.
+    A caller joining late first gets the chunks streamed so far.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.listeners: List[contextvars.Context] = []
+
+    def listen(self) -> contextvars.Context:
+        listener = contextvars.copy_context()
+        self.listeners.append(listener)
+        for text in self.parts:
+            listener.run(_receive, text)
+        return listener
+
+    def wants_chunks(self) -> bool:
+        return any(listener.run(streaming_enabled) for listener in self.listeners)
+
+    def emit(self, text: str) -> None:
+        self.parts.append(text)
+        for listener in list(self.listeners):
+            listener.run(_receive, text)
+
+def _receive(text: str) -> None:
+    record_first_token()
+    emit_token(text)
+
+# Shared streams of the model calls in flight, by cache key
+_streams: Dict[str, SharedStream] = {}
+
+def to_messages(prompt: Prompt) -> Messages:
+    """The prompt as (role, text) pairs."""
+    if isinstance(prompt, str):
+        return [("human", prompt)]
+    return [tuple(message) if isinstance(message, (tuple, list)) else (message.type, message.content)
+            for message in prompt]
+
+def model_params() -> dict:
+    """Generation parameters of the current provider that change what it answers (part of the cache key)."""
+    return get_provider().params()
+
+async def generate_text(prompt: Prompt, fresh: bool = False) -> str:
     """
-    Asynchronously generates text from the Google Gemini model.
+    Asynchronously generates text with the current model provider (see providers/registry.py).
+
+    Identical requests are answered from the response cache; failed calls are never cached.
+    Concurrent identical requests share a single model call and its stream. Inside
+    `stream_to(...)` the answer is also streamed to the sink as it is generated.
 
     Args:
-        prompt: The text prompt or a list of messages for the LLM.
+        prompt: The text prompt, or a list of messages for the LLM.
+        fresh: Skip the cache lookup and always call the model (the new answer is still cached).
 
     Returns:
         The generated text response from the LLM.
     """
     try:
-        if isinstance(prompt, str):
-            messages = [HumanMessage(content=prompt)]
-        else:
-            messages = prompt
-            
-        response = await chat_model.ainvoke(messages)
-    
-        return response.content
+        with tracer.span("llm.generate_text") as span:
+            provider = get_provider()
+            messages = to_messages(prompt)
+            span.set_attribute("llm.provider", provider.name)
+
+            key = cache_key(provider.text_model(), provider.params(), messages)
+            if fresh:
+                llm_cache.record_bypass()
+                span.set_attribute("llm.cache", "bypass")
+            else:
+                cached = await llm_cache.get(key)
+                if cached is not None:
+                    span.set_attribute("llm.cache", "hit")
+                    record_cache_hit()
+                    emit_token(cached)
+                    return cached
+                span.set_attribute("llm.cache", "miss")
+
+            return await _shared_call(key, provider, messages)
         
     except Exception as e:
+        errors_total.inc(component="llm")
         print(f"Error during LLM invocation: {e}")
-        return "An error occurred while communicating with the LLM."
\ No newline at end of file
+        return "An error occurred while communicating with the LLM."
+
+async def _shared_call(key: str, provider: LLMProvider, messages: Messages) -> str:
+    """
+    Calls the model, or joins the identical call already in flight.
+
+    A caller joining a call gets its chunks (see SharedStream) and has the time
+    it waited recorded as one model call of its step.
+    """
+    joined = llm_flights.is_in_flight(key)
+    stream = _streams.get(key) if joined else None
+    if stream is None:
+        stream = _streams[key] = SharedStream()
+    listener = stream.listen()
+    start = time.perf_counter()
+    try:
+        content = await llm_flights.do(key, lambda: _invoke(key, provider, messages, stream))
+    finally:
+        stream.listeners.remove(listener)
+        if not stream.listeners and _streams.get(key) is stream:
+            del _streams[key]
+    if joined:
+        record_llm_call(time.perf_counter() - start)
+        if not stream.parts:
+            # The call was not streamed: the answer arrives as one chunk, like a cached one
+            emit_token(content)
+    return content
+
+async def _invoke(key: str, provider: LLMProvider, messages: Messages, stream: SharedStream) -> str:
+    """Calls the model once (within the provider's text quota) and caches the answer."""
+    prompt_tokens = sum(estimate_tokens(text) for _, text in messages)
+    async with admission.limit(provider.text_endpoint, prompt_tokens) as lease:
+        start = time.perf_counter()
+        try:
+            # Time spent waiting for admission is the gap before this span
+            with tracer.span("llm.model_call", {"llm.model": provider.text_model(),
+                                                "llm.prompt_tokens": prompt_tokens}) as span:
+                if stream.wants_chunks():
+                    content = await _stream(provider, messages, stream)
+                else:
+                    content = await provider.generate(messages)
+                span.set_attribute("llm.completion_tokens", estimate_tokens(content))
+        finally:
+            elapsed = time.perf_counter() - start
+            record_llm_call(elapsed)
+            llm_call_duration.observe(elapsed, provider=provider.name, call="chat")
+        completion_tokens = estimate_tokens(content)
+        lease.charge(completion_tokens)
+    llm_tokens.observe(prompt_tokens, provider=provider.name, direction="prompt")
+    llm_tokens.observe(completion_tokens, provider=provider.name, direction="completion")
+
+    await llm_cache.put(key, content)
+    return content
+
+async def _stream(provider: LLMProvider, messages: Messages, stream: SharedStream) -> str:
+    """Streams the answer chunk by chunk to every caller of the call and returns the whole text."""
+    async for text in provider.stream(messages):
+        if text:
+            stream.emit(text)
+    return "".join(stream.parts)
+
+async def stream_text(prompt: Prompt, fresh: bool = False,
+                      lane: str = BATCH) -> AsyncGenerator[str, None]:
+    """
+    Streaming variant of `generate_text`: yields the answer in chunks as the model produces them.
+
+    Goes through the same cache, single-flight and admission layers (in the given
+    priority lane); a cached answer arrives as one chunk.
+    """
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> str:
+        with use_lane(lane), stream_to(chunks.put_nowait):
+            return await generate_text(prompt, fresh)
+
+    task = asyncio.create_task(produce())
+    streamed = []
+    try:
+        while True:
+            getter = asyncio.ensure_future(chunks.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                streamed.append(getter.result())
+                yield streamed[-1]
+                continue
+            getter.cancel()
+            break
+        while not chunks.empty():
+            streamed.append(chunks.get_nowait())
+            yield streamed[-1]
+        text = task.result()
+        if not streamed:
+            yield text
+        elif not text.startswith("".join(streamed)):
+            # The stream broke off; generate_text answered with its error message instead
+            yield f"\n\n{text}"
+    finally:
+        if not task.done():
+            task.cancel()
\ No newline at end of file
@@ -0,0 +1,226 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds of the histograms below
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric:
+    """A named metric with one series per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"Metric '{self.name}' takes the labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = [(key, self._snapshot(value)) for key, value in sorted(self._series.items())]
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _snapshot(self, value):
+        return value
+
+    def _render_series(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. the number of retries."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. the number of open streams."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0)
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets.
+
+    Each series keeps a count per bucket (made cumulative only when rendered),
+    the sum and the count, so an observation is a bisect and three additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts (the last one is +Inf), sum, count]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the seconds spent inside the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0.0
+
+    def _snapshot(self, value):
+        return list(value[0]), value[1], value[2]
+
+    def _render_series(self, key: Tuple[str, ...], value) -> List[str]:
+        counts, total, count = value
+        names = self.labels + ("le",)
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """The process's metrics, rendered for Prometheus by GET /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def reset(self) -> None:
+        """Drops every recorded series (e.g. between tests)."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# --- Workflows ---
+step_duration = metrics.histogram(
+    "orchestro_step_duration_seconds", "Wall time of workflow steps", ("agent", "workflow_type"))
+
+# --- Model calls ---
+llm_call_duration = metrics.histogram(
+    "orchestro_llm_call_duration_seconds", "Latency of text model calls (cache hits excluded)", ("provider", "call"))
+llm_tokens = metrics.histogram(
+    "orchestro_llm_tokens", "Estimated tokens per text model call", ("provider", "direction"), TOKEN_BUCKETS)
+image_call_duration = metrics.histogram(
+    "orchestro_image_api_duration_seconds", "Latency of image API calls", ("provider",))
+image_payload_bytes = metrics.histogram(
+    "orchestro_image_api_payload_bytes", "Size of the images returned by the image API", ("provider",), BYTE_BUCKETS)
+
+# --- Thread store ---
+store_write_duration = metrics.histogram(
+    "orchestro_store_write_duration_seconds", "Latency of thread store writes (one flushed batch)", ("backend",))
+store_file_write_duration = metrics.histogram(
+    "orchestro_store_file_write_duration_seconds", "Latency of JSON thread store file writes", ("file",))
+store_write_bytes = metrics.histogram(
+    "orchestro_store_write_bytes", "Bytes written per thread store file write", ("file",), BYTE_BUCKETS)
+store_file_bytes = metrics.gauge(
+    "orchestro_store_file_bytes", "Current size of the thread store files", ("file",))
+
+# --- Streams ---
+sse_streams_active = metrics.gauge(
+    "orchestro_sse_streams_active", "Open Server-Sent Events streams of workflow threads")
+
+# --- Failures ---
+retries_total = metrics.counter(
+    "orchestro_retries_total", "Retried calls", ("operation",))
+errors_total = metrics.counter(
+    "orchestro_errors_total", "Failures by component", ("component",))
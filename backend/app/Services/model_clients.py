@@ -0,0 +1,71 @@
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+from app.config import GOOGLE_API_KEY
+
+class LazyClient:
+    """
+    A model client that is built by `factory` the first time it is used.
+
+    The provider SDKs take most of the backend's import time and their clients
+    refuse to build without GOOGLE_API_KEY, so nothing is imported or built
+    until a request actually needs the model (or the lifespan warms it up).
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> Any:
+        """The client, built on first use; concurrent first calls build it once."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.factory()
+        return self._client
+
+    def reset(self) -> None:
+        """Drops the client; the next `get()` builds a new one."""
+        with self._lock:
+            self._client = None
+
+# Every lazy client of the app, by name
+_clients: Dict[str, LazyClient] = {}
+
+def lazy_client(name: str, factory: Callable[[], Any]) -> LazyClient:
+    """Registers a lazily built client, so the lifespan can warm it up and drop it."""
+    client = LazyClient(name, factory)
+    _clients[name] = client
+    return client
+
+def warm_clients(modules: Iterable[str] = ()) -> None:
+    """
+    Imports `modules` (which register their clients) and builds every registered client.
+
+    Blocking; the lifespan runs it in a worker thread so startup does not wait for it.
+    Without GOOGLE_API_KEY only the imports happen, and a failed build is left to
+    the first request that needs the client.
+    """
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Warning: could not preload {module_name}: {e}")
+    if not GOOGLE_API_KEY:
+        return
+    for client in list(_clients.values()):
+        try:
+            client.get()
+        except Exception as e:
+            print(f"Warning: could not initialize the {client.name} client: {e}")
+
+def reset_clients() -> None:
+    """Drops every built client (on shutdown: their async transports belong to the closing loop)."""
+    for client in list(_clients.values()):
+        client.reset()
@@ -0,0 +1,125 @@
+import time
+from typing import Callable, Dict, Any, List, Optional
+from app.jsonsaver import json_saver
+from app.Schemas.workflow_schema import ThreadStatus, ThreadInfo
+
+EventSubscriber = Callable[[Dict[str, Any]], None]
+
+TERMINAL_STATUSES = (ThreadStatus.COMPLETED, ThreadStatus.FAILED)
+
+class ProgressTracker:
+    """
+    Single owner of workflow thread state transitions.
+
+    Every workflow event goes through `emit`, which turns it into at most one
+    store write (transitions that change nothing are skipped) and then hands
+    the event to every subscriber (SSE streams, metrics, ...).
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else json_saver
+        self._subscribers: List[EventSubscriber] = []
+        # Last persisted status/progress values per thread, used to drop no-op writes
+        self._known: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, subscriber: EventSubscriber) -> Callable[[], None]:
+        """Registers a callback for every emitted event and returns its unsubscribe function."""
+        self._subscribers.append(subscriber)
+        return lambda: self._subscribers.remove(subscriber)
+
+    def create(self, thread_id: str, name: str, workflow_type: str) -> ThreadInfo:
+        """Creates the thread record a workflow run reports into."""
+        thread = self.store.create_thread(thread_id, name, workflow_type)
+        self._known[thread_id] = {
+            "status": ThreadStatus.PENDING,
+            "completed_steps": 0,
+            "total_steps": 0,
+            "current_step": "initializing",
+        }
+        return thread
+
+    def emit(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Persists the transition an event implies and fans the event out to subscribers."""
+        event.setdefault("timestamp", time.time())
+        thread_id = event.get("thread_id")
+        changes = self._transition(event)
+        if thread_id and changes:
+            self._persist(thread_id, changes)
+        self._publish(event)
+        return event
+
+    def set_status(self, thread_id: str, status: ThreadStatus, current_step: Optional[str] = None) -> bool:
+        """Moves a thread to a new status outside of a workflow event (e.g. pause/resume)."""
+        if not self.store.has_thread(thread_id):
+            return False
+        changes = {"status": status}
+        if current_step:
+            changes["current_step"] = current_step
+        self._persist(thread_id, changes)
+        self._publish({
+            "type": "status",
+            "status": status.value,
+            "current_step": current_step,
+            "thread_id": thread_id,
+            "timestamp": time.time()
+        })
+        return True
+
+    def _transition(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Maps a workflow event to the thread fields it changes."""
+        event_type = event.get("type")
+        progress = event.get("progress") or {}
+
+        if event_type == "workflow_start":
+            return {
+                "status": ThreadStatus.RUNNING,
+                "total_steps": event.get("total_steps", 0),
+                "current_step": "starting"
+            }
+        if event_type == "progress":
+            return {
+                "completed_steps": progress.get("completed", 0),
+                "total_steps": progress.get("total", 0),
+                "current_step": progress.get("current_step", "running")
+            }
+        if event_type == "workflow_paused":
+            return {
+                "status": ThreadStatus.PAUSED,
+                "completed_steps": progress.get("completed"),
+                "current_step": "paused"
+            }
+        if event.get("node") == "__end__":
+            return {
+                "status": ThreadStatus.COMPLETED,
+                "completed_steps": progress.get("completed"),
+                "total_steps": progress.get("total"),
+                "current_step": "completed"
+            }
+        if event_type == "error":
+            return {
+                "status": ThreadStatus.FAILED,
+                "current_step": "error",
+                "error_message": event.get("message")
+            }
+        # step_start / step_complete only matter to live subscribers.
+        return {}
+
+    def _persist(self, thread_id: str, changes: Dict[str, Any]) -> None:
+        known = self._known.setdefault(thread_id, {})
+        changed = {key: value for key, value in changes.items() if value is not None and known.get(key) != value}
+        if not changed:
+            return
+        if self.store.update_thread(thread_id, **changed):
+            known.update(changed)
+        if changed.get("status") in TERMINAL_STATUSES:
+            self._known.pop(thread_id, None)
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber(event)
+            except Exception as e:
+                print(f"Warning: progress subscriber failed: {e}")
+
+# Shared tracker used by the workflow service and routes.
+progress_tracker = ProgressTracker()
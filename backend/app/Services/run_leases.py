@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import os
+import socket
+import uuid
+from typing import Any, Callable, List, Set
+from app.jsonsaver import json_saver
+from app.config import RUN_LEASE_TTL
+
+# Identifies this server process in the run leases of the shared store
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class RunLeases:
+    """
+    Cross-process ownership of workflow runs, kept in the thread store.
+
+    A process takes the lease of a run before queueing it and renews it while
+    the run is queued or executing. Another process (e.g. one recovering
+    interrupted runs) can only take the run over once the lease expired, so
+    with several server processes on one store a run executes in one of them.
+
+    A process asked to pause a run that another process holds leaves the
+    request in the store; the holder takes it when it renews its leases.
+
+    Every lease operation writes the store, so async callers use the `a...`
+    variants, which do that in a worker thread and update `held` on the loop.
+    """
+
+    def __init__(self, store, owner: str = PROCESS_ID, ttl: float = RUN_LEASE_TTL):
+        self.store = store
+        self.owner = owner
+        self.ttl = ttl
+        self.held: Set[str] = set()
+
+    def acquire(self, thread_id: str) -> bool:
+        """Takes the lease of a run; False if another live process holds it."""
+        if not self.store.claim_run(thread_id, self.owner, self.ttl):
+            return False
+        self.held.add(thread_id)
+        return True
+
+    def release(self, thread_id: str) -> None:
+        if thread_id in self.held:
+            self.held.discard(thread_id)
+            self.store.release_run(thread_id, self.owner)
+
+    def renew(self) -> List[str]:
+        """Extends every held lease; returns the runs whose lease another process took over."""
+        if not self.held:
+            return []
+        kept = set(self.store.renew_runs(sorted(self.held), self.owner, self.ttl))
+        lost = sorted(self.held - kept)
+        self.held = kept
+        return lost
+
+    def request_pause(self, thread_id: str) -> bool:
+        """Asks the process holding a run to pause it; False unless another live process holds the run."""
+        return self.store.request_run_pause(thread_id, self.owner)
+
+    def withdraw_pause(self, thread_id: str) -> bool:
+        """Withdraws a pause request the process holding the run has not taken yet."""
+        return self.store.withdraw_run_pause(thread_id)
+
+    def take_pause_requests(self) -> List[str]:
+        """Pause requests other processes left for the runs this process holds."""
+        if not self.held:
+            return []
+        return [thread_id for thread_id in self.store.take_run_pauses(self.owner) if thread_id in self.held]
+
+
+    async def _store_call(self, method: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args))
+
+    async def aacquire(self, thread_id: str) -> bool:
+        """`acquire` with the store write in a worker thread."""
+        if not await self._store_call(self.store.claim_run, thread_id, self.owner, self.ttl):
+            return False
+        self.held.add(thread_id)
+        return True
+
+    async def arelease(self, thread_id: str) -> None:
+        """`release` with the store write in a worker thread."""
+        if thread_id in self.held:
+            self.held.discard(thread_id)
+            await self._store_call(self.store.release_run, thread_id, self.owner)
+
+    async def arenew(self) -> List[str]:
+        """`renew` with the store write in a worker thread."""
+        renewing = sorted(self.held)
+        if not renewing:
+            return []
+        kept = set(await self._store_call(self.store.renew_runs, renewing, self.owner, self.ttl))
+        lost = sorted(set(renewing) - kept)
+        # Leases taken meanwhile stay held
+        self.held.difference_update(lost)
+        return lost
+
+    async def arequest_pause(self, thread_id: str) -> bool:
+        """`request_pause` with the store write in a worker thread."""
+        return await self._store_call(self.store.request_run_pause, thread_id, self.owner)
+
+    async def awithdraw_pause(self, thread_id: str) -> bool:
+        """`withdraw_pause` with the store write in a worker thread."""
+        return await self._store_call(self.store.withdraw_run_pause, thread_id)
+
+    async def atake_pause_requests(self) -> List[str]:
+        """`take_pause_requests` with the store write in a worker thread."""
+        if not self.held:
+            return []
+        taken = await self._store_call(self.store.take_run_pauses, self.owner)
+        return [thread_id for thread_id in taken if thread_id in self.held]
+
+# Leases of the runs this process queued or is executing.
+run_leases = RunLeases(json_saver)
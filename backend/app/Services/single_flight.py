@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one.
+
+    The first caller for a key starts the call in its own task; callers that
+    arrive while it is still running await the same task and get the same
+    result (or exception). Each caller awaits through `asyncio.shield`, so a
+    cancelled caller only stops waiting: the shared call keeps running for the
+    others and is cancelled only once every caller has gone away.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self.counters = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "cancelled_waiters": 0,
+            "abandoned": 0,
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn()` unless an identical call (same key) is already in flight, then awaits its result."""
+        self.counters["calls"] += 1
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = {"task": task, "waiters": 0}
+            self._calls[key] = call
+            task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+
+        call["waiters"] += 1
+        try:
+            return await asyncio.shield(call["task"])
+        except asyncio.CancelledError:
+            if not call["task"].done():
+                self.counters["cancelled_waiters"] += 1
+                if call["waiters"] == 1:
+                    # Last interested caller left: nobody needs the result any more.
+                    call["task"].cancel()
+                    self.counters["abandoned"] += 1
+            raise
+        finally:
+            call["waiters"] -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def is_in_flight(self, key: str) -> bool:
+        """Whether a call for `key` is running, i.e. `do(key, ...)` would join it instead of starting one."""
+        return key in self._calls
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": self.in_flight()}
+
+    def _forget(self, key: str, call: Dict[str, Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call["task"].cancelled():
+            # Mark any error retrieved: callers that went away must not trigger asyncio warnings.
+            call["task"].exception()
+
+# Named single-flight groups, so their counters can be reported together.
+_groups: Dict[str, SingleFlight] = {}
+
+def flight_group(name: str) -> SingleFlight:
+    """Returns the shared single-flight group with the given name, creating it on first use."""
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,80 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional
+
+class StepMetrics:
+    """Latency accounting for one workflow step."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall_time = 0.0
+        # Seconds from the start of the step to the first streamed model token (None if nothing streamed)
+        self.first_token_time: Optional[float] = None
+        self.llm_time = 0.0
+        self.llm_calls = 0
+        # Time spent waiting for admission to a rate-limited model endpoint
+        self.queue_time = 0.0
+        # Model calls answered from the response cache instead
+        self.cache_hits = 0
+        self.bytes_produced = 0
+        # Artificial latency from the latency policy, already included in wall_time
+        self.injected_delay = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": round(self.wall_time, 3),
+            "first_token_time": None if self.first_token_time is None else round(self.first_token_time, 3),
+            "llm_time": round(self.llm_time, 3),
+            "llm_calls": self.llm_calls,
+            "queue_time": round(self.queue_time, 3),
+            "cache_hits": self.cache_hits,
+            "bytes_produced": self.bytes_produced,
+            "injected_delay": round(self.injected_delay, 3),
+        }
+
+# Metrics of the step running in the current task. Each step runs in its own
+# asyncio task, so concurrent steps never see each other's metrics.
+_current_step: ContextVar[Optional[StepMetrics]] = ContextVar("current_step_metrics", default=None)
+
+@contextmanager
+def measure_step() -> Iterator[StepMetrics]:
+    """Collects the metrics of everything awaited inside the block."""
+    metrics = StepMetrics()
+    token = _current_step.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.wall_time = time.perf_counter() - metrics.started
+        _current_step.reset(token)
+
+def record_llm_call(seconds: float) -> None:
+    """Adds one model call (text or image) to the metrics of the current step, if any."""
+    metrics = _current_step.get()
+    if metrics is not None:
+        metrics.llm_time += seconds
+        metrics.llm_calls += 1
+
+def record_first_token() -> None:
+    """Marks the arrival of the first streamed model token of the current step, if any."""
+    metrics = _current_step.get()
+    if metrics is not None and metrics.first_token_time is None:
+        metrics.first_token_time = time.perf_counter() - metrics.started
+
+def record_queue_time(seconds: float) -> None:
+    """Adds time spent waiting for model endpoint admission to the metrics of the current step, if any."""
+    metrics = _current_step.get()
+    if metrics is not None:
+        metrics.queue_time += seconds
+
+def record_cache_hit() -> None:
+    """Counts a model call answered from the response cache in the metrics of the current step, if any."""
+    metrics = _current_step.get()
+    if metrics is not None:
+        metrics.cache_hits += 1
+
+def record_injected_delay(seconds: float) -> None:
+    """Adds artificial latency slept by the latency policy to the metrics of the current step, if any."""
+    metrics = _current_step.get()
+    if metrics is not None:
+        metrics.injected_delay += seconds
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+TokenSink = Callable[[str], None]
+
+# Where model output of the current task is streamed to while it is generated.
+# Set per workflow step (step_delta events) or per streaming chat request.
+_current_sink: ContextVar[Optional[TokenSink]] = ContextVar("token_sink", default=None)
+
+@contextmanager
+def stream_to(sink: TokenSink) -> Iterator[None]:
+    """Streams the text of every model call made inside the block to `sink` as it arrives."""
+    token = _current_sink.set(sink)
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
+
+def streaming_enabled() -> bool:
+    return _current_sink.get() is not None
+
+def emit_token(text: str) -> None:
+    """Forwards a chunk of generated text to the current sink, if any."""
+    sink = _current_sink.get()
+    if sink is not None and text:
+        sink(text)
@@ -0,0 +1,350 @@
+import hashlib
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import TRACING_ENABLED, TRACE_MAX_TRACES, TRACE_MAX_SPANS, TRACE_EXPORT_FILE, TRACE_SERVICE_NAME
+
+# OTLP span kind and status codes
+SPAN_KIND_INTERNAL = 1
+STATUS_CODES = {"UNSET": 0, "OK": 1, "ERROR": 2}
+
+def trace_id_for(thread_id: str) -> str:
+    """Trace id of a thread: every run of the thread (including resumed ones) belongs to one trace."""
+    return hashlib.sha256(f"thread:{thread_id}".encode()).hexdigest()[:32]
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+class Span:
+    """One timed operation of a trace, in the OpenTelemetry data model."""
+
+    def __init__(self, name: str, trace_id: str, thread_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, tracer: "Tracer" = None, start_ns: Optional[int] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.thread_id = thread_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._started = time.perf_counter()
+        self._tracer = tracer
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+        self.add_event("exception", {"exception.type": type(error).__name__, "exception.message": str(error)})
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        """Ends the span (once) and hands it to the exporters."""
+        if self.end_ns is not None:
+            return
+        # Durations come from the monotonic clock, so they never go negative
+        self.end_ns = end_ns or self.start_ns + int((time.perf_counter() - self._started) * 1e9)
+        if self._tracer is not None:
+            self._tracer._export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span as an OTLP/JSON span."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes({"thread.id": self.thread_id, **self.attributes}),
+            "events": [
+                {"timeUnixNano": str(event["time_ns"]), "name": event["name"],
+                 "attributes": _otlp_attributes(event["attributes"])}
+                for event in self.events
+            ],
+            "status": {"code": STATUS_CODES[self.status]},
+        }
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+    def as_dict(self, origin_ns: int, now_ns: int) -> Dict[str, Any]:
+        """The span for the trace API: times in milliseconds since the start of the trace."""
+        end_ns = self.end_ns or now_ns
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_ms": round((self.start_ns - origin_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "in_progress": self.end_ns is None,
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+            "events": [
+                {"name": event["name"], "time_ms": round((event["time_ns"] - origin_ns) / 1e6, 3),
+                 "attributes": event["attributes"]}
+                for event in self.events
+            ],
+            "children": [],
+        }
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or there is no trace to join."""
+
+    trace_id = None
+    span_id = None
+    thread_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class InMemoryCollector:
+    """
+    Keeps the spans of the `max_traces` most recently active traces, for the
+    trace API. Spans that have started but not ended yet are kept too, so a
+    run can be inspected while it is still going.
+    """
+
+    def __init__(self, max_traces: int = 500, max_spans: int = 10000):
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _trace(self, trace_id: str) -> Dict[str, Any]:
+        trace = self._traces.get(trace_id)
+        if trace is None:
+            trace = self._traces[trace_id] = {"spans": [], "open": {}, "dropped": 0}
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        self._traces.move_to_end(trace_id)
+        return trace
+
+    def start(self, span: Span) -> None:
+        with self._lock:
+            self._trace(span.trace_id)["open"][span.span_id] = span
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            trace = self._trace(span.trace_id)
+            trace["open"].pop(span.span_id, None)
+            if len(trace["spans"]) < self.max_spans:
+                trace["spans"].append(span)
+            else:
+                trace["dropped"] += 1
+
+    def spans(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """The finished and open spans of a trace, or None if it is not (or no longer) kept."""
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return None
+            return {"spans": trace["spans"] + list(trace["open"].values()), "dropped": trace["dropped"]}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+class FileExporter:
+    """
+    Appends every finished span to a file as one OTLP/JSON export request per
+    line, the format the OpenTelemetry Collector's file receiver reads.
+    Lines are buffered and flushed whenever a root span (a workflow run) ends.
+    """
+
+    def __init__(self, path: str, service_name: str = "orchestro-backend"):
+        self.path = path
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        request = {"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "orchestro"}, "spans": [span.to_otlp()]}],
+        }]}
+        line = json.dumps(request, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")
+            self._file.write(line)
+            if span.parent_id is None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+# Span of the operation running in the current task; new spans become its children
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class Tracer:
+    """
+    Records the spans of workflow runs: the run, each step, each model and
+    image API attempt, retry backoffs, injected delays and store writes.
+
+    The thread_id is the correlation key: a thread's spans share the trace id
+    `trace_id_for(thread_id)`. Spans are only recorded within a thread's trace
+    (e.g. not for /api/chat calls), and go to the in-memory collector behind
+    GET /api/threads/{id}/trace and, with TRACE_EXPORT_FILE, to an OTLP/JSON file.
+    """
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, max_traces: int = TRACE_MAX_TRACES,
+                 max_spans: int = TRACE_MAX_SPANS, export_file: str = TRACE_EXPORT_FILE,
+                 service_name: str = TRACE_SERVICE_NAME):
+        self.enabled = enabled
+        self.collector = InMemoryCollector(max_traces, max_spans)
+        self.file_exporter = FileExporter(export_file, service_name) if export_file else None
+        # Open root span (the running workflow run) of each trace; spans are also recorded from worker threads
+        self._roots: Dict[str, Span] = {}
+        self._roots_lock = threading.Lock()
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, parent: Optional[Span] = None,
+                   thread_id: Optional[str] = None, start_ns: Optional[int] = None):
+        """
+        Starts a span: a child of `parent` (by default the current span) or,
+        with `thread_id`, a root span of that thread's trace. End it with `end()`.
+        """
+        return self._start(name, attributes, parent, thread_id, start_ns, open_root=True)
+
+    def _start(self, name: str, attributes: Optional[Dict[str, Any]], parent: Optional[Span],
+               thread_id: Optional[str], start_ns: Optional[int], open_root: bool):
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None and thread_id is None:
+            parent = _current_span.get()
+        if parent is not None and parent.trace_id is not None:
+            span = Span(name, parent.trace_id, parent.thread_id, parent.span_id, attributes, self, start_ns)
+        elif thread_id is not None:
+            span = Span(name, trace_id_for(thread_id), thread_id, None, attributes, self, start_ns)
+        else:
+            return NOOP_SPAN
+        if span.parent_id is None and open_root:
+            with self._roots_lock:
+                self._roots[span.trace_id] = span
+        self.collector.start(span)
+        return span
+
+    def run_span(self, thread_id: str) -> Optional[Span]:
+        """The open root span of a thread's trace (its running workflow run), if any."""
+        with self._roots_lock:
+            return self._roots.get(trace_id_for(thread_id))
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, parent: Optional[Span] = None,
+             thread_id: Optional[str] = None) -> Iterator[Span]:
+        """Traces the block as a span, which is the current span inside it; an exception marks it failed."""
+        span = self.start_span(name, attributes, parent, thread_id)
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def record_span(self, name: str, start_ns: int, end_ns: int, attributes: Optional[Dict[str, Any]] = None,
+                    parent: Optional[Span] = None, thread_id: Optional[str] = None,
+                    error: Optional[BaseException] = None) -> None:
+        """
+        Records an operation that has already happened (or whose end is known
+        in advance). Never becomes the open root span of its trace, so a run
+        starting meanwhile keeps its children.
+        """
+        span = self._start(name, attributes, parent, thread_id, start_ns, open_root=False)
+        if error is not None:
+            span.set_error(error)
+        span.end(end_ns)
+
+    def _export(self, span: Span) -> None:
+        if span.parent_id is None:
+            with self._roots_lock:
+                if self._roots.get(span.trace_id) is span:
+                    del self._roots[span.trace_id]
+        self.collector.export(span)
+        if self.file_exporter is not None:
+            try:
+                self.file_exporter.export(span)
+            except OSError as e:
+                print(f"Warning: could not export span '{span.name}': {e}")
+
+    def trace(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """The span tree of a thread's trace with timings, or None if no spans of it are kept."""
+        trace_id = trace_id_for(thread_id)
+        recorded = self.collector.spans(trace_id)
+        if not recorded or not recorded["spans"]:
+            return None
+        spans = sorted(recorded["spans"], key=lambda span: span.start_ns)
+        now_ns = time.time_ns()
+        origin_ns = spans[0].start_ns
+        nodes = {span.span_id: span.as_dict(origin_ns, now_ns) for span in spans}
+        roots = []
+        time_by_span: Dict[str, float] = {}
+        for span in spans:
+            node = nodes[span.span_id]
+            # Spans whose parent was dropped are shown at the top level
+            parent = nodes.get(span.parent_id)
+            (parent["children"] if parent else roots).append(node)
+            time_by_span[span.name] = round(time_by_span.get(span.name, 0.0) + node["duration_ms"], 3)
+        end_ns = max((span.end_ns or now_ns) for span in spans)
+        return {
+            "thread_id": thread_id,
+            "trace_id": trace_id,
+            "span_count": len(spans),
+            "dropped_spans": recorded["dropped"],
+            "duration_ms": round((end_ns - origin_ns) / 1e6, 3),
+            # Total time spent in each kind of span (nested spans are also counted in their parents)
+            "time_by_span": time_by_span,
+            "spans": roots,
+        }
+
+    def close(self) -> None:
+        if self.file_exporter is not None:
+            self.file_exporter.close()
+
+def current_span():
+    """The span of the operation running in the current task (a no-op span outside of any)."""
+    return _current_span.get() or NOOP_SPAN
+
+tracer = Tracer()
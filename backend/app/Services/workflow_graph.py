@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Any, Iterable, List, Optional, Tuple
+from app.Services.step_metrics import measure_step
+from app.Services.token_stream import stream_to
+
+NodeRunner = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class WorkflowGraph:
+    """
+    A workflow as a dependency graph of agents.
+
+    Edges come from the state keys each agent reads and writes: a step depends
+    on every earlier step that writes one of the keys it reads (or a key it
+    overwrites). Steps are declared in a valid execution order, so the graph
+    can never contain a cycle.
+    """
+
+    def __init__(self, steps: List[str], agents: Dict[str, Dict[str, Any]]):
+        self.steps = list(steps)
+        self.dependencies: Dict[str, List[str]] = {}
+        writers: Dict[str, str] = {}
+
+        for step in self.steps:
+            spec = agents[step]
+            dependencies = []
+            for key in [*spec.get('reads', []), *spec.get('writes', [])]:
+                writer = writers.get(key)
+                if writer and writer not in dependencies:
+                    dependencies.append(writer)
+            for key in spec.get('writes', []):
+                writers[key] = step
+            self.dependencies[step] = dependencies
+
+    def ready(self, done: set, started: set) -> List[str]:
+        """Steps whose dependencies have all finished and which have not been started yet."""
+        return [
+            step for step in self.steps
+            if step not in started and all(dependency in done for dependency in self.dependencies[step])
+        ]
+
+    def critical_path(self, durations: Dict[str, float]) -> Tuple[List[str], float]:
+        """Returns the chain of dependent steps with the longest total duration."""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, str] = {}
+        for step in self.steps:
+            dependencies = [dependency for dependency in self.dependencies[step] if dependency in finish]
+            before = max(dependencies, key=finish.get, default=None)
+            finish[step] = durations.get(step, 0.0) + (finish[before] if before else 0.0)
+            previous[step] = before
+
+        if not finish:
+            return [], 0.0
+        last = max(finish, key=finish.get)
+        path, step = [], last
+        while step:
+            path.append(step)
+            step = previous[step]
+        return path[::-1], finish[last]
+
+    async def run(self, state: Dict[str, Any], run_node: NodeRunner, completed: Iterable[str] = (),
+                  should_stop: Optional[Callable[[], bool]] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Executes the graph, starting every ready step concurrently.
+
+        Steps in `completed` already ran (their outputs are in `state`) and are
+        skipped. Whenever `should_stop()` is true no further steps are started;
+        once the running ones have finished a {"kind": "stopped", "completed"}
+        record is yielded and the run ends early.
+
+        Yields {"kind": "start", "step"} when a step starts, {"kind": "delta",
+        "step", "text"} for every chunk of model output a step streams,
+        {"kind": "complete", "step", "output", "duration", "metrics"} when it
+        finishes (its output is merged into `state`; metrics hold wall/LLM time
+        and bytes produced), and a final {"kind": "finished", "timing"} record
+        with wall time and critical-path timing. The first failing step cancels
+        the rest and its exception is raised.
+        """
+        finished: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+        durations: Dict[str, float] = {}
+        done, started = set(completed), set(completed)
+        run_start = time.perf_counter()
+
+        async def run_step(step: str) -> None:
+            try:
+                with measure_step() as metrics, stream_to(lambda text: finished.put_nowait(("delta", step, text, None))):
+                    output = await run_node(step, dict(state)) or {}
+                metrics.bytes_produced = len(json.dumps(output, default=str).encode())
+                await finished.put(("complete", step, output, metrics))
+            except Exception as e:
+                await finished.put(("error", step, e, None))
+
+        try:
+            while len(done) < len(self.steps):
+                if should_stop is None or not should_stop():
+                    for step in self.ready(done, started):
+                        started.add(step)
+                        yield {"kind": "start", "step": step}
+                        tasks[step] = asyncio.create_task(run_step(step))
+                if started == done:
+                    # Stopped at a step boundary: nothing running and nothing more to start
+                    yield {"kind": "stopped", "completed": [step for step in self.steps if step in done]}
+                    return
+
+                kind, step, output, metrics = await finished.get()
+                if kind == "error":
+                    raise output
+                if kind == "delta":
+                    yield {"kind": "delta", "step": step, "text": output}
+                    continue
+                state.update(output)
+                durations[step] = metrics.wall_time
+                done.add(step)
+                yield {
+                    "kind": "complete",
+                    "step": step,
+                    "output": output,
+                    "duration": metrics.wall_time,
+                    "metrics": metrics.as_dict()
+                }
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+        wall_time = time.perf_counter() - run_start
+        path, path_time = self.critical_path(durations)
+        yield {
+            "kind": "finished",
+            "timing": {
+                "wall_time": round(wall_time, 3),
+                "critical_path": path,
+                "critical_path_time": round(path_time, 3),
+                "step_time_total": round(sum(durations.values()), 3),
+                "step_durations": {step: round(duration, 3) for step, duration in durations.items()},
+            }
+        }
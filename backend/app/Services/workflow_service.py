@@ -1,11 +1,35 @@
 import asyncio
-from typing import AsyncGenerator, Dict, Any
-from app.jsonsaver import json_saver
-from app.Schemas.workflow_schema import ThreadStatus, ThreadProgress
+import copy
+from typing import AsyncGenerator, Dict, Any, List, Optional
+from app.Services.progress_tracker import ProgressTracker, progress_tracker
+from app.Services.workflow_graph import WorkflowGraph
+from app.Services.latency import LatencyPolicy, latency_policy
+from app.Services.metrics import step_duration, errors_total
+from app.Services.tracing import tracer
+from app.agents.registry import AGENTS, get_agent, synthetic_output, interrupted_output
+from app.providers.registry import PROVIDERS, use_provider, provider_for_workflow, configured_providers
+from app.Schemas.workflow_schema import ThreadStatus, WorkflowState
+from app.config import AGENT_BACKEND
+from datetime import datetime
 import time
 
 class WorkflowService:
-    def __init__(self):
+    def __init__(self, tracker: ProgressTracker = None, agent_backend: str = AGENT_BACKEND,
+                 latency: LatencyPolicy = None):
+        # Every thread status/progress change goes through the tracker
+        self.tracker = tracker or progress_tracker
+        if agent_backend not in ('real', 'synthetic'):
+            raise ValueError(f"Unknown agent backend: '{agent_backend}'")
+        self.agent_backend = agent_backend
+        for provider in configured_providers():
+            if provider not in PROVIDERS:
+                raise ValueError(f"Unknown LLM provider: '{provider}'")
+        # Artificial latency of simulated work (zero in production)
+        self.latency = latency or latency_policy
+        # Checkpoints of running workflows go to the same store as the thread records
+        self.store = self.tracker.store
+        # Threads whose runs should stop at the next step boundary
+        self.pause_requests = set()
         self.workflows = {
             'linkedin_blog': {
                 'name': 'LinkedIn Blog Creation',
@@ -23,6 +47,11 @@ class WorkflowService:
                 'total_steps': 3
             }
         }
+        # Each workflow runs as a dependency graph derived from what its agents read and write
+        self.graphs = {
+            workflow_type: WorkflowGraph(config['steps'], AGENTS)
+            for workflow_type, config in self.workflows.items()
+        }
 
     def detect_workflow_type(self, prompt: str) -> str:
         """Detect workflow type based on prompt content"""
@@ -37,83 +66,159 @@ class WorkflowService:
         else:
             return 'linkedin_blog'  # default
 
-    async def orchestrate_workflow(self, prompt: str, thread_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Orchestrate workflow execution with real-time updates"""
+    async def orchestrate_workflow(self, prompt: str, thread_id: str, resume: bool = False) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Orchestrate workflow execution with real-time updates.
+
+        With `resume`, the run continues from the thread's last checkpoint and
+        skips every step that already completed. The run is traced as one span
+        of the thread's trace, with a child span per step.
+        """
+        run_span = tracer.start_span("workflow.run", {"workflow.resumed": resume}, thread_id=thread_id)
         try:
-            # Detect workflow type
-            workflow_type = self.detect_workflow_type(prompt)
+            checkpoint = self.load_checkpoint(thread_id) if resume else None
+            interrupted = []
+            if checkpoint:
+                state = checkpoint
+                workflow_type = state['progress']['workflow_type']
+                done_steps = list(state['progress']['completed_steps'])
+                side_effects_started = list(state['progress'].get('side_effects_started', []))
+                # At most once: a side-effect step that started but never finished is not repeated
+                interrupted = [step for step in side_effects_started if step not in done_steps]
+                for step in interrupted:
+                    state.update(interrupted_output(step))
+            else:
+                # Detect workflow type
+                workflow_type = self.detect_workflow_type(prompt)
+                state = self.initial_state(prompt, thread_id)
+                done_steps = []
+                side_effects_started = []
             workflow_config = self.workflows[workflow_type]
-            
-            # Update thread with workflow type
-            json_saver.update_thread_status(thread_id, ThreadStatus.RUNNING, 'starting')
+            # Model provider answering this workflow's calls (WORKFLOW_PROVIDERS / LLM_PROVIDER)
+            provider = provider_for_workflow(workflow_type)
+            run_span.set_attribute("workflow.type", workflow_type)
+            run_span.set_attribute("llm.provider", provider)
             
             # Initialize progress
-            completed_steps = 0
+            completed_steps = len(done_steps)
             total_steps = workflow_config['total_steps']
             
             # Send workflow start event
-            yield {
+            yield self.tracker.emit({
                 "type": "workflow_start",
                 "workflow_type": workflow_type,
                 "total_steps": total_steps,
+                "resumed_from": list(done_steps) if checkpoint else None,
+                "provider": provider,
                 "thread_id": thread_id,
                 "timestamp": time.time()
-            }
+            })
             
-            # Execute each step
-            for step_index, step_name in enumerate(workflow_config['steps'], 1):
-                # Update progress
-                completed_steps = step_index - 1
-                current_step = step_name
-                
-                # Send progress update
-                yield {
-                    "type": "progress",
-                    "progress": {
-                        "completed": completed_steps,
-                        "total": total_steps,
-                        "current_step": current_step,
-                        "percentage": round((completed_steps / total_steps) * 100, 1)
-                    },
-                    "thread_id": thread_id,
-                    "timestamp": time.time()
-                }
-                
-                # Update thread progress
-                json_saver.update_thread_progress(thread_id, completed_steps, total_steps, current_step)
-                
-                # Send step start event
-                yield {
-                    "type": "step_start",
+            # Execute the workflow graph; independent steps run concurrently and the
+            # run stops at the next step boundary once a pause has been requested
+            graph = self.graphs[workflow_type]
+            for step_name in interrupted:
+                completed_steps += 1
+                done_steps.append(step_name)
+                yield self.tracker.emit({
+                    "type": "step_complete",
                     "node": step_name,
-                    "step_number": step_index,
-                    "step_name": step_name.replace('_', ' ').title(),
+                    "output": self.describe_output(step_name, state),
+                    "step_number": graph.steps.index(step_name) + 1,
+                    "interrupted": True,
                     "thread_id": thread_id,
                     "timestamp": time.time()
-                }
+                })
+            self.checkpoint(thread_id, state, workflow_type, done_steps, side_effects_started)
+            timing = None
+            run_step = lambda step_name, step_state: self.run_agent(step_name, step_state, provider, run_span)
+            async for record in graph.run(state, run_step, done_steps,
+                                          should_stop=lambda: thread_id in self.pause_requests):
+                step_name = record.get("step")
+                step_index = graph.steps.index(step_name) + 1 if step_name else None
                 
-                # Simulate agent work (replace with actual agent calls)
-                await self.simulate_agent_work(step_name)
+                if record["kind"] == "start":
+                    if AGENTS[step_name].get('side_effect'):
+                        # Durably note the step before it starts, so a crash mid-step never repeats it
+                        side_effects_started.append(step_name)
+                        self.checkpoint(thread_id, state, workflow_type, done_steps, side_effects_started)
+                        await self.flush_checkpoints()
+                    
+                    # Send progress update
+                    yield self.tracker.emit({
+                        "type": "progress",
+                        "progress": {
+                            "completed": completed_steps,
+                            "total": total_steps,
+                            "current_step": step_name,
+                            "percentage": round((completed_steps / total_steps) * 100, 1)
+                        },
+                        "thread_id": thread_id,
+                        "timestamp": time.time()
+                    })
+                    
+                    # Send step start event
+                    yield self.tracker.emit({
+                        "type": "step_start",
+                        "node": step_name,
+                        "step_number": step_index,
+                        "step_name": step_name.replace('_', ' ').title(),
+                        "thread_id": thread_id,
+                        "timestamp": time.time()
+                    })
                 
-                # Send step completion event
-                yield {
-                    "type": "step_complete",
-                    "node": step_name,
-                    "output": f"Completed {step_name.replace('_', ' ').title()} successfully",
-                    "step_number": step_index,
-                    "thread_id": thread_id,
-                    "timestamp": time.time()
-                }
+                elif record["kind"] == "delta":
+                    # Forward model output while the step is still generating it
+                    yield self.tracker.emit({
+                        "type": "step_delta",
+                        "node": step_name,
+                        "delta": record["text"],
+                        "step_number": step_index,
+                        "thread_id": thread_id,
+                        "timestamp": time.time()
+                    })
+                
+                elif record["kind"] == "complete":
+                    completed_steps += 1
+                    done_steps.append(step_name)
+                    self.checkpoint(thread_id, state, workflow_type, done_steps, side_effects_started)
+                    step_duration.observe(record["duration"], agent=step_name, workflow_type=workflow_type)
+                    
+                    # Send step completion event
+                    yield self.tracker.emit({
+                        "type": "step_complete",
+                        "node": step_name,
+                        "output": self.describe_output(step_name, record["output"]),
+                        "step_number": step_index,
+                        "duration": round(record["duration"], 3),
+                        "metrics": record["metrics"],
+                        "thread_id": thread_id,
+                        "timestamp": time.time()
+                    })
                 
-                # Update progress
-                completed_steps = step_index
-                json_saver.update_thread_progress(thread_id, completed_steps, total_steps, current_step)
+                elif record["kind"] == "stopped":
+                    run_span.set_attribute("workflow.outcome", "paused")
+                    # Paused between steps; the checkpoint holds everything needed to resume
+                    yield self.tracker.emit({
+                        "type": "workflow_paused",
+                        "completed_steps": record["completed"],
+                        "progress": {
+                            "completed": completed_steps,
+                            "total": total_steps,
+                            "current_step": "paused",
+                            "percentage": round((completed_steps / total_steps) * 100, 1)
+                        },
+                        "thread_id": thread_id,
+                        "timestamp": time.time()
+                    })
+                    return
                 
-                # Small delay between steps
-                await asyncio.sleep(0.5)
+                elif record["kind"] == "finished":
+                    timing = record["timing"]
             
             # Send workflow completion event
-            yield {
+            run_span.set_attribute("workflow.outcome", "completed")
+            yield self.tracker.emit({
                 "type": "workflow_complete",
                 "node": "__end__",
                 "output": f"Workflow '{workflow_config['name']}' completed successfully!",
@@ -123,39 +228,112 @@ class WorkflowService:
                     "current_step": "completed",
                     "percentage": 100
                 },
+                "timing": timing,
                 "thread_id": thread_id,
                 "timestamp": time.time()
-            }
-            
-            # Update final status
-            json_saver.update_thread_status(thread_id, ThreadStatus.COMPLETED, 'completed')
+            })
             
         except Exception as e:
-            # Send error event
-            yield {
+            errors_total.inc(component="workflow")
+            run_span.set_error(e)
+            # Send error event (this also marks the thread as failed)
+            yield self.tracker.emit({
                 "type": "error",
                 "message": str(e),
                 "thread_id": thread_id,
                 "timestamp": time.time()
-            }
-            
-            # Update thread status to failed
-            json_saver.update_thread_status(thread_id, ThreadStatus.FAILED, 'error')
+            })
             raise
+        finally:
+            self.pause_requests.discard(thread_id)
+            run_span.end()
+
+    def request_pause(self, thread_id: str) -> None:
+        """Asks the thread's run to stop before it starts another step"""
+        self.pause_requests.add(thread_id)
+
+    def cancel_pause(self, thread_id: str) -> bool:
+        """Withdraws a pause request the run has not acted on yet"""
+        if thread_id in self.pause_requests:
+            self.pause_requests.discard(thread_id)
+            return True
+        return False
+
+    def checkpoint(self, thread_id: str, state: WorkflowState, workflow_type: str, done_steps: List[str],
+                   side_effects_started: List[str] = ()) -> None:
+        """Save the accumulated state, the completed steps and the side-effect steps started so far"""
+        snapshot = copy.copy(state)
+        snapshot['progress'] = {
+            'workflow_type': workflow_type,
+            'completed_steps': list(done_steps),
+            'side_effects_started': list(side_effects_started),
+            'checkpointed_at': time.time()
+        }
+        snapshot['updated_at'] = datetime.now()
+        self.store.put_by_thread_id(thread_id, snapshot)
+
+    async def flush_checkpoints(self) -> None:
+        """Wait until queued checkpoints are written (stores without a write queue write immediately)"""
+        flush = getattr(self.store, 'flush', None)
+        if flush is not None:
+            await flush()
+
+    def load_checkpoint(self, thread_id: str) -> Optional[WorkflowState]:
+        """Last checkpoint of a thread's run, or None if it has none"""
+        state = self.store.get_by_thread_id(thread_id)
+        if not state or state.get('progress', {}).get('workflow_type') not in self.workflows:
+            return None
+        state = dict(state)
+        state['progress'] = dict(state['progress'])
+        return state
+
+    def initial_state(self, prompt: str, thread_id: str) -> WorkflowState:
+        """Build the WorkflowState shared by every step of a run"""
+        now = datetime.now()
+        return {
+            "topic": prompt,
+            "script": None,
+            "clips_info": None,
+            "posting_status": None,
+            "image_data": None,
+            "thread_id": thread_id,
+            "status": ThreadStatus.RUNNING,
+            "progress": {},
+            "created_at": now,
+            "updated_at": now
+        }
+
+    async def run_agent(self, step_name: str, state: WorkflowState, provider: Optional[str] = None,
+                        run_span=None) -> Dict[str, Any]:
+        """Run one workflow step against the current state (its model calls go to `provider`) and return the state updates"""
+        with tracer.span(f"step.{step_name}", {"agent.name": step_name}, parent=run_span):
+            if self.agent_backend == 'synthetic':
+                await self.simulate_agent_work(step_name)
+                return synthetic_output(step_name)
+            agent = get_agent(step_name)
+            if provider is None:
+                return await agent(state)
+            with use_provider(provider):
+                return await agent(state)
+
+    def describe_output(self, step_name: str, output: Dict[str, Any]) -> str:
+        """Text shown for a finished step: what the agent wrote, or a generic message"""
+        for key in AGENTS[step_name]['writes']:
+            if isinstance(output.get(key), str) and output[key]:
+                return output[key]
+        return f"Completed {step_name.replace('_', ' ').title()} successfully"
 
     async def simulate_agent_work(self, agent_name: str):
-        """Simulate agent work (replace with actual agent implementations)"""
+        """Simulate agent work for the synthetic backend (delays come from the latency policy)"""
         # Simulate different types of work based on agent
         if 'ideation' in agent_name:
-            await asyncio.sleep(2)  # Simulate thinking time
+            await self.latency.wait('synthetic_ideation')  # Thinking time
         elif 'image' in agent_name:
-            await asyncio.sleep(3)  # Simulate image generation
+            await self.latency.wait('synthetic_image')  # Image generation
         elif 'video' in agent_name:
-            await asyncio.sleep(4)  # Simulate video processing
-        elif 'posting' in agent_name or 'linkedin' in agent_name:
-            await asyncio.sleep(1)  # Simulate posting
+            await self.latency.wait('synthetic_video')  # Video processing
         else:
-            await asyncio.sleep(1)  # Default
+            await self.latency.wait('synthetic_posting')  # Posting and default
 
     def get_workflow_app(self, workflow_type: str = None):
         """Get workflow configuration"""
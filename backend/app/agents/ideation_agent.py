@@ -1,7 +1,6 @@
 from ..Services.llm_service import generate_text
 from ..Schemas.workflow_schema import WorkflowState
 from typing import Dict, Any
-from langchain_core.messages import HumanMessage, SystemMessage
 
 async def ideation_agent(state: WorkflowState) -> Dict[str, Any]:
     """
@@ -20,8 +19,8 @@ async def ideation_agent(state: WorkflowState) -> Dict[str, Any]:
     # Define a detailed prompt for the LLM to act as a creative agent.
     # We use a list of messages to handle persona better with conversational models.
     prompt_messages = [
-        SystemMessage(content="You are a creative ideation agent for a content creator. Your task is to generate a concise video concept and a brief script outline. The script outline should include key talking points and a call-to-action. Format the output with clear headings."),
-        HumanMessage(content=f"Generate a video idea and script outline for the following topic: '{topic}'.")
+        ("system", "You are a creative ideation agent for a content creator. Your task is to generate a concise video concept and a brief script outline. The script outline should include key talking points and a call-to-action. Format the output with clear headings."),
+        ("human", f"Generate a video idea and script outline for the following topic: '{topic}'.")
     ]
 
     try:
@@ -1,33 +1,47 @@
-import base64
+import hashlib
 import aiohttp
 import json
-from typing import Dict, Any
-import google.generativeai as genai
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Dict, Any, Tuple
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from ..Schemas.workflow_schema import WorkflowState
-from ..config import GOOGLE_API_KEY
+from ..Services.step_metrics import record_llm_call
+from ..Services.metrics import llm_call_duration, llm_tokens, image_call_duration, image_payload_bytes, retries_total, errors_total
+from ..Services.latency import latency_policy
+from ..Services.tracing import tracer, current_span
+from ..Services.single_flight import flight_group
+from ..Services.admission import admission, estimate_tokens
+from ..Services.blob_store import blob_store
+from ..providers.base import ProviderError
+from ..providers.registry import get_provider
 import asyncio
+import time
 
-# Configure the API key globally
-genai.configure(api_key=GOOGLE_API_KEY)
-
-# Initialize model with custom configuration
-try:
-    generation_config = {
-        "temperature": 0.7,
-        "top_p": 0.95,
-    }
-    gemini_text_model = genai.GenerativeModel(
-        "gemini-1.5-flash",
-        generation_config=generation_config
-    )
-except Exception as e:
-    raise ValueError(f"Failed to initialize Gemini Text Model: {e}")
-
-IMAGE_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-preview-image-generation:generateContent?key={GOOGLE_API_KEY}"
-HEADERS = {'Content-Type': 'application/json'}
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+# Identical prompt/image requests that are already in flight are sent only once
+prompt_flights = flight_group("image_prompt")
+image_flights = flight_group("image_api")
+
+# Network failures are retried; an error answer from the provider is not
+retry_on_failure = retry_if_not_exception_type(ProviderError)
+
+def request_key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def count_retry(retry_state) -> None:
+    """
+    Counts an attempt that failed and is about to be retried, and traces the
+    backoff before the next attempt (tenacity `before_sleep` hook).
+    """
+    operation = retry_state.fn.__name__
+    retries_total.inc(operation=operation)
+    start_ns = time.time_ns()
+    tracer.record_span("retry.backoff", start_ns, start_ns + int(retry_state.next_action.sleep * 1e9), {
+        "retry.operation": operation,
+        "retry.attempt": retry_state.attempt_number,
+        "retry.error": str(retry_state.outcome.exception()),
+    }, parent=current_span())
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_on_failure,
+       before_sleep=count_retry)
 async def generate_image_prompt(script: str) -> str:
     """Generate an image prompt with enhanced instructions."""
     prompt_template = """
@@ -44,27 +58,64 @@ async def generate_image_prompt(script: str) -> str:
     Prompt:
     """
     
-    response = await gemini_text_model.generate_content_async(
-        prompt_template.format(script=script)
-    )
-    return response.text.strip()
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def call_image_api(payload: dict) -> Dict[str, Any]:
-    """Call image generation API with retry logic."""
-    timeout = aiohttp.ClientTimeout(total=120)
-    
-    # Increase the delay to give the API more time to process requests
-    await asyncio.sleep(5) 
-    
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with session.post(
-            IMAGE_API_URL,
-            headers=HEADERS,
-            data=json.dumps(payload)
-        ) as response:
-            response.raise_for_status()
-            return await response.json()
+    prompt = prompt_template.format(script=script)
+
+    provider = get_provider()
+
+    async def generate() -> str:
+        prompt_tokens = estimate_tokens(prompt)
+        async with admission.limit(provider.text_endpoint, prompt_tokens) as lease:
+            start = time.perf_counter()
+            try:
+                with tracer.span("llm.model_call", {"llm.model": provider.prompt_model(),
+                                                    "llm.prompt_tokens": prompt_tokens}):
+                    text = await provider.complete(prompt)
+            except Exception:
+                errors_total.inc(component="llm")
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                record_llm_call(elapsed)
+                llm_call_duration.observe(elapsed, provider=provider.name, call="image_prompt")
+            completion_tokens = estimate_tokens(text)
+            lease.charge(completion_tokens)
+        llm_tokens.observe(prompt_tokens, provider=provider.name, direction="prompt")
+        llm_tokens.observe(completion_tokens, provider=provider.name, direction="completion")
+        return text.strip()
+
+    # One span per attempt; retried attempts show up as siblings with the backoff between them
+    with tracer.span("llm.image_prompt", {"llm.provider": provider.name}):
+        return await prompt_flights.do(request_key(provider.prompt_model(), prompt), generate)
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_on_failure,
+       before_sleep=count_retry)
+async def call_image_api(image_prompt: str) -> Tuple[bytes, str]:
+    """Generate an image with the current provider, with retry logic; returns (bytes, content type)."""
+    provider = get_provider()
+
+    async def generate() -> Tuple[bytes, str]:
+        # Simulated API processing time (zero unless a latency mode is configured)
+        await latency_policy.wait("image_api")
+
+        async with admission.limit(provider.image_endpoint, estimate_tokens(image_prompt)):
+            start = time.perf_counter()
+            try:
+                with tracer.span("image.model_call", {"image.model": provider.image_model()}):
+                    image, content_type = await provider.generate_image(image_prompt)
+            except Exception:
+                errors_total.inc(component="image_api")
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                record_llm_call(elapsed)
+                image_call_duration.observe(elapsed, provider=provider.name)
+        image_payload_bytes.observe(len(image), provider=provider.name)
+        return image, content_type
+
+    with tracer.span("image.call_image_api", {"image.provider": provider.name}) as span:
+        image, content_type = await image_flights.do(request_key(provider.image_model(), image_prompt), generate)
+        span.set_attribute("image.bytes", len(image))
+        return image, content_type
 
 async def image_generation_agent(state: WorkflowState) -> Dict[str, Any]:
     """
@@ -82,30 +133,18 @@ async def image_generation_agent(state: WorkflowState) -> Dict[str, Any]:
         image_prompt = await generate_image_prompt(script)
         print(f"Generated prompt: {image_prompt}")
 
-        # Prepare payload with enhanced configuration
-        image_payload = {
-            "contents": [{"parts": [{"text": image_prompt}]}],
-            "generationConfig": {
-                "responseModalities": ["IMAGE"],
-                "responseMimeType": "image/png",
-                "aspectRatio": "16:9"
-            }
-        }
-
         # Call API
-        result = await call_image_api(image_payload)
-
-        # Process response
-        if "error" in result:
-            error_message = result["error"]["message"]
-            print(f"API returned error: {error_message}")
-            return {"image_data": f"Error: {error_message}"}
-        
-        base64_data = result['candidates'][0]['content']['parts'][0]['inlineData']['data']
-        image_data_url = f"data:image/png;base64,{base64_data}"
-        
-        return {"image_data": image_data_url}
+        image, content_type = await call_image_api(image_prompt)
+
+        # Stored by hash; state, checkpoints and events only carry the /api/blobs URL
+        image_ref = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: blob_store.put(image, content_type)
+        )
+        return {"image_data": image_ref}
 
+    except ProviderError as e:
+        print(f"API returned error: {e}")
+        return {"image_data": f"Error: {e}"}
     except aiohttp.ClientError as e:
         print(f"Network error: {e}")
         return {"image_data": f"Error: Network failure - {e}"}
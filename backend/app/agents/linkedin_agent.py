@@ -1,7 +1,7 @@
-import asyncio
 from typing import Dict, Any
 from ..Schemas.workflow_schema import WorkflowState
 from ..Services.llm_service import generate_text
+from ..Services.latency import latency_policy
 
 async def linkedin_posting_agent(state: WorkflowState) -> Dict[str, Any]:
     """
@@ -33,7 +33,7 @@ async def linkedin_posting_agent(state: WorkflowState) -> Dict[str, Any]:
 
     try:
         print("Running LinkedIn Posting Agent...")
-        await asyncio.sleep(4)  # Simulate the time needed to post
+        await latency_policy.wait("linkedin_post")  # Simulated time needed to post
 
         # Use the LLM to generate the LinkedIn post text based on the script
         post_prompt = (
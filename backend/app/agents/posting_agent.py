@@ -1,6 +1,6 @@
-import asyncio
 from typing import Dict, Any
 from ..Services.llm_service import generate_text
+from ..Services.latency import latency_policy
 from ..Schemas.workflow_schema import WorkflowState # ✅ Corrected import path
 
 async def posting_agent(state: WorkflowState) -> Dict[str, Any]:
@@ -16,22 +16,23 @@ async def posting_agent(state: WorkflowState) -> Dict[str, Any]:
     For this prototype, we'll simulate these steps and return a success message.
 
     Args:
-        state: The current state of the workflow, containing the topic and clip info.
+        state: The current state of the workflow, containing the topic and clip info (or script).
 
     Returns:
         A dictionary with the new `posting_status` to update the state.
     """
-    # Check if the previous agent successfully completed its task
-    clips_info = state.get("clips_info")
+    # Check if the previous agent successfully completed its task. In the video
+    # workflow that is the clipping agent; campaigns post straight from the script.
+    source_content = state.get("clips_info") or state.get("script")
     topic = state.get("topic")
 
-    if not clips_info or not topic:
+    if not source_content or not topic:
         # If prerequisites aren't met, return an error and halt the workflow
-        return {"posting_status": "Error: Missing video clips or topic. Cannot proceed with posting."}
+        return {"posting_status": "Error: Missing video clips or script, or topic. Cannot proceed with posting."}
 
     # Simulate the work of generating captions and scheduling posts
     print("Running Cross-Platform Posting Agent...")
-    await asyncio.sleep(4)  # Simulate a posting/scheduling task
+    await latency_policy.wait("social_post")  # Simulated posting/scheduling task
 
     # Use the LLM to generate platform-specific content
     posting_prompt = (
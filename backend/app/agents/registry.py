@@ -0,0 +1,71 @@
+import importlib
+from typing import Awaitable, Callable, Dict, Any, List
+from ..Schemas.workflow_schema import WorkflowState
+
+AgentFn = Callable[[WorkflowState], Awaitable[Dict[str, Any]]]
+
+# Every workflow step names the agent coroutine that implements it (imported
+# lazily, so the synthetic backend never loads the model clients) and declares
+# which WorkflowState keys it reads and writes. Workflow graphs are derived from
+# these declarations: a step becomes ready as soon as every earlier step
+# writing one of its inputs has finished. Steps with 'side_effect' publish
+# something outside the app and are never run twice for the same thread.
+AGENTS: Dict[str, Dict[str, Any]] = {
+    'ideation_agent': {
+        'agent': 'app.agents.ideation_agent:ideation_agent',
+        'reads': ['topic'],
+        'writes': ['script'],
+    },
+    'image_agent': {
+        'agent': 'app.agents.image_agent:image_generation_agent',
+        'reads': ['script'],
+        'writes': ['image_data'],
+    },
+    'linkedin_agent': {
+        'agent': 'app.agents.linkedin_agent:linkedin_posting_agent',
+        'reads': ['script', 'image_data'],
+        'writes': ['posting_status'],
+        'side_effect': True,
+    },
+    'video_clipping_agent': {
+        'agent': 'app.agents.video_clipping_agent:video_clipping_agent',
+        'reads': ['topic'],
+        'writes': ['clips_info'],
+    },
+    'video_posting_agent': {
+        'agent': 'app.agents.posting_agent:posting_agent',
+        'reads': ['topic', 'clips_info'],
+        'writes': ['posting_status'],
+        'side_effect': True,
+    },
+    # Campaign captions only need the script, so they are written while the image is generated.
+    'posting_agent': {
+        'agent': 'app.agents.posting_agent:posting_agent',
+        'reads': ['topic', 'script'],
+        'writes': ['posting_status'],
+        'side_effect': True,
+    },
+}
+
+def get_agent(step_name: str) -> AgentFn:
+    """Imports and returns the agent coroutine registered for a workflow step."""
+    module_name, function_name = AGENTS[step_name]['agent'].split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def agent_modules() -> List[str]:
+    """Modules implementing the registered agents, e.g. to preload them."""
+    return list(dict.fromkeys(entry['agent'].split(':')[0] for entry in AGENTS.values()))
+
+def interrupted_output(step_name: str) -> Dict[str, Any]:
+    """State updates for a side-effect step that was cut off mid-run and is not repeated."""
+    title = step_name.replace('_', ' ').title()
+    message = (
+        f"## {title} Interrupted ⚠️\n\nThe workflow stopped while this step was running. "
+        f"It was not run again so that nothing is published twice; please check whether it went through."
+    )
+    return {key: message for key in AGENTS[step_name]['writes']}
+
+def synthetic_output(step_name: str) -> Dict[str, Any]:
+    """Placeholder state updates for the synthetic backend, one per key the step writes."""
+    title = step_name.replace('_', ' ').title()
+    return {key: f"Synthetic {key} from {title}" for key in AGENTS[step_name]['writes']}
@@ -1,7 +1,7 @@
-import asyncio
 from typing import Dict, Any
 from ..Schemas.workflow_schema import WorkflowState
 from ..Services.llm_service import generate_text
+from ..Services.latency import latency_policy
 
 async def video_clipping_agent(state: WorkflowState) -> Dict[str, Any]:
     """
@@ -24,7 +24,7 @@ async def video_clipping_agent(state: WorkflowState) -> Dict[str, Any]:
 
     try:
         print("Running Video Clipping Agent...")
-        await asyncio.sleep(5)  # Simulate a longer task for video processing
+        await latency_policy.wait("video_processing")  # Simulated video processing
 
         # Use the LLM to generate descriptions for the clips
         clip_prompt = (
@@ -5,4 +5,120 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 HF_TOKEN=os.getenv("HF_TOKEN")
-GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY")
\ No newline at end of file
+GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY")
+
+# --- Model providers ---
+# Provider answering model calls: "gemini" (Google APIs) or "stub" (local and deterministic, for offline
+# load tests). WORKFLOW_PROVIDERS picks one per workflow type, e.g. "social_media=stub,video_clipping=gemini".
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+WORKFLOW_PROVIDERS = dict(
+    entry.strip().split("=", 1) for entry in os.getenv("WORKFLOW_PROVIDERS", "").split(",") if "=" in entry
+)
+# Stub provider: the first token arrives after a delay drawn from STUB_LATENCY_DISTRIBUTION ("fixed",
+# "exponential" or "lognormal" with STUB_LATENCY_SIGMA) with mean STUB_LATENCY_MEAN seconds, then
+# STUB_OUTPUT_TOKENS tokens follow at STUB_TOKENS_PER_SECOND. Images take STUB_IMAGE_LATENCY_MEAN seconds.
+# STUB_ERROR_RATE of the calls fail; STUB_SEED makes latencies and failures repeatable.
+STUB_LATENCY_DISTRIBUTION = os.getenv("STUB_LATENCY_DISTRIBUTION", "lognormal")
+STUB_LATENCY_MEAN = float(os.getenv("STUB_LATENCY_MEAN", "0.5"))
+STUB_LATENCY_SIGMA = float(os.getenv("STUB_LATENCY_SIGMA", "0.5"))
+STUB_IMAGE_LATENCY_MEAN = float(os.getenv("STUB_IMAGE_LATENCY_MEAN", "3.0"))
+STUB_TOKENS_PER_SECOND = float(os.getenv("STUB_TOKENS_PER_SECOND", "50"))
+STUB_OUTPUT_TOKENS = int(os.getenv("STUB_OUTPUT_TOKENS", "200"))
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0.0"))
+STUB_SEED = int(os.getenv("STUB_SEED")) if os.getenv("STUB_SEED") else None
+# Admission limits of the stub's text and image calls (0 = unlimited), apart from the Gemini quotas
+STUB_CONCURRENCY = int(os.getenv("STUB_CONCURRENCY", "0"))
+STUB_RPM = float(os.getenv("STUB_RPM", "0"))
+STUB_TPM = float(os.getenv("STUB_TPM", "0"))
+
+# --- Model clients ---
+# The Gemini clients and the agent modules are loaded on first use. With PREWARM_MODEL_CLIENTS the
+# lifespan loads them in the background right after startup, so the first workflow does not wait for them.
+PREWARM_MODEL_CLIENTS = os.getenv("PREWARM_MODEL_CLIENTS", "true").lower() in ("1", "true", "yes")
+
+# --- Thread store ---
+# "sqlite" keeps threads and workflow states in SQLITE_DB_FILE, "json" uses the JSON files.
+THREAD_STORE_BACKEND = os.getenv("THREAD_STORE_BACKEND", "sqlite")
+SQLITE_DB_FILE = os.getenv("SQLITE_DB_FILE", "orchestro.db")
+# Upper bound (seconds) on how long thread changes wait in memory before the background writer flushes them
+STORE_FLUSH_INTERVAL = float(os.getenv("STORE_FLUSH_INTERVAL", "0.2"))
+# With the "json" backend, "snapshot" rewrites threads.json on every change, "log" appends each change
+# to threads.log and folds it into threads.json once it passes the threshold.
+THREADS_STORAGE_MODE = os.getenv("THREADS_STORAGE_MODE", "snapshot")
+THREADS_LOG_COMPACT_BYTES = int(os.getenv("THREADS_LOG_COMPACT_BYTES", str(4 * 1024 * 1024)))
+# Set when several server processes (uvicorn --workers N) share the "json" backend: every access then
+# takes a file lock and re-reads the files other processes changed (snapshot mode only).
+# The "sqlite" backend is always safe to share between processes.
+THREADS_SHARED = os.getenv("THREADS_SHARED", "false").lower() in ("1", "true", "yes")
+# Generated images and other binary payloads are stored here by content hash, outside of workflow state
+BLOB_DIR = os.getenv("BLOB_DIR", "blobs")
+
+# --- Workflow execution ---
+# "real" runs the agents in app/agents, "synthetic" only simulates their latency (for load tests)
+AGENT_BACKEND = os.getenv("AGENT_BACKEND", "real")
+# Artificial latency injected for simulated work: "none" (production), "fixed" or "sampled" (demo/load tests).
+# LATENCY_SCALE multiplies every configured delay, LATENCY_SEED makes "sampled" delays repeatable.
+LATENCY_MODE = os.getenv("LATENCY_MODE", "none")
+LATENCY_SCALE = float(os.getenv("LATENCY_SCALE", "1.0"))
+LATENCY_SEED = int(os.getenv("LATENCY_SEED")) if os.getenv("LATENCY_SEED") else None
+
+# --- Outbound HTTP ---
+# Connection pool of the shared aiohttp session: total and per-host connection limits,
+# DNS cache lifetime (seconds) and how long idle keep-alive connections are kept (seconds).
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+
+# --- LLM response cache ---
+# Responses are cached in memory (LRU, LLM_CACHE_MAX_ENTRIES) and, when LLM_CACHE_DB_FILE is set,
+# in a SQLite file bounded to LLM_CACHE_MAX_DISK_ENTRIES. Entries expire after LLM_CACHE_TTL seconds.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 60 * 60)))
+LLM_CACHE_DB_FILE = os.getenv("LLM_CACHE_DB_FILE", "")
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000"))
+
+# --- Gemini admission control ---
+# Concurrent calls, requests per minute and tokens per minute allowed per endpoint (0 = unlimited).
+# The text limits cover both text models, the image limits the image generation endpoint.
+GEMINI_TEXT_CONCURRENCY = int(os.getenv("GEMINI_TEXT_CONCURRENCY", "8"))
+GEMINI_TEXT_RPM = float(os.getenv("GEMINI_TEXT_RPM", "60"))
+GEMINI_TEXT_TPM = float(os.getenv("GEMINI_TEXT_TPM", "1000000"))
+GEMINI_IMAGE_CONCURRENCY = int(os.getenv("GEMINI_IMAGE_CONCURRENCY", "4"))
+GEMINI_IMAGE_RPM = float(os.getenv("GEMINI_IMAGE_RPM", "10"))
+GEMINI_IMAGE_TPM = float(os.getenv("GEMINI_IMAGE_TPM", "0"))
+
+# --- Workflow event streams ---
+# Events kept per thread for Last-Event-ID replay (streamed step_delta chunks are not kept),
+# threads whose events are kept, and seconds between heartbeat comments on an idle stream.
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+EVENT_HUB_MAX_THREADS = int(os.getenv("EVENT_HUB_MAX_THREADS", "1000"))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# "memory" delivers events within one process; "sqlite" shares them between the server processes of a
+# machine through EVENT_BUS_DB_FILE, tailed every EVENT_BUS_POLL_INTERVAL seconds and kept for
+# EVENT_BUS_RETENTION seconds, so any worker can stream any thread.
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "memory")
+EVENT_BUS_DB_FILE = os.getenv("EVENT_BUS_DB_FILE", "orchestro_events.db")
+EVENT_BUS_POLL_INTERVAL = float(os.getenv("EVENT_BUS_POLL_INTERVAL", "0.1"))
+EVENT_BUS_RETENTION = float(os.getenv("EVENT_BUS_RETENTION", str(24 * 60 * 60)))
+# Workflow runs executing at once; further runs wait in the job queue
+WORKFLOW_WORKERS = int(os.getenv("WORKFLOW_WORKERS", "4"))
+# Re-queue runs left RUNNING or still queued (PENDING) by a process that is gone (at startup, then
+# whenever a run lease expires), continuing from their last checkpoint
+RECOVER_INTERRUPTED_RUNS = os.getenv("RECOVER_INTERRUPTED_RUNS", "true").lower() in ("1", "true", "yes")
+# Runs are leased to the process executing them; leases are renewed every RUN_LEASE_INTERVAL seconds and
+# a run whose lease was not renewed for RUN_LEASE_TTL seconds is taken over by another process.
+RUN_LEASE_TTL = float(os.getenv("RUN_LEASE_TTL", "30"))
+RUN_LEASE_INTERVAL = float(os.getenv("RUN_LEASE_INTERVAL", "10"))
+
+# --- Tracing ---
+# Spans of workflow runs (run, steps, model and image API attempts, retry backoffs, injected delays, store
+# writes), traced per thread. The spans of the TRACE_MAX_TRACES most recent threads (at most TRACE_MAX_SPANS
+# each) are kept in memory for GET /api/threads/{id}/trace; with TRACE_EXPORT_FILE set, every span is also
+# appended to that file as OTLP/JSON, e.g. for the OpenTelemetry Collector's file receiver.
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_MAX_TRACES = int(os.getenv("TRACE_MAX_TRACES", "500"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "10000"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "orchestro-backend")
@@ -1,25 +1,94 @@
+import itertools
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from .Schemas.workflow_schema import ThreadStatus, ThreadProgress, ThreadInfo
+from .thread_query import ThreadIndex, new_thread_info, status_patch, progress_patch, thread_patch, validate_listing, decode_cursor, encode_cursor, parse_fields, project_thread, status_value
+from .Services.metrics import store_file_write_duration, store_write_bytes, store_file_bytes
+from .config import THREAD_STORE_BACKEND, STORE_FLUSH_INTERVAL, THREADS_STORAGE_MODE, THREADS_LOG_COMPACT_BYTES, THREADS_SHARED
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): the files cannot be shared between processes
+    fcntl = None
 
 # Define the file paths for our local state storage
 STATE_FILE = "workflows.json"
 THREADS_FILE = "threads.json"
+THREADS_LOG_FILE = "threads.log"
+# The log is renamed to this while a compaction folds it into THREADS_FILE
+THREADS_COMPACTING_FILE = "threads.log.compacting"
+# Lock file serializing access to the files between processes, and the run leases of shared mode
+THREADS_LOCK_FILE = "threads.lock"
+RUN_LEASES_FILE = "run_leases.json"
+
+def parse_thread_dates(thread_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts the string dates of a serialized thread back to datetime objects."""
+    for key in ('created_at', 'updated_at'):
+        if isinstance(thread_info.get(key), str):
+            thread_info[key] = datetime.fromisoformat(thread_info[key])
+    progress = thread_info.get('progress', {})
+    for key in ('start_time', 'last_updated'):
+        if isinstance(progress.get(key), str):
+            progress[key] = datetime.fromisoformat(progress[key])
+    return thread_info
 
 class JsonSaver:
     """
     Enhanced class to save and load workflow state and thread information to local JSON files.
-    
+
     This acts as a mock checkpoint saver to demonstrate state persistence
     without an external database.
+
+    Threads are persisted in one of two modes:
+    - "snapshot": every change rewrites the whole of threads.json.
+    - "log": every change is appended as one compact record to threads.log,
+      which is replayed on top of threads.json at startup and folded back
+      into it by a background compaction once it passes `compact_threshold` bytes.
+
+    With `shared` set, several processes can use the same files: every access
+    holds an advisory lock on THREADS_LOCK_FILE and first re-reads the files
+    another process replaced, so each change is a read-modify-write of the
+    current files and only touches the affected thread.
     """
 
-    def __init__(self):
+    # Label of the store in the thread store metrics
+    backend = "json"
+
+    def __init__(self, storage_mode: str = THREADS_STORAGE_MODE, compact_threshold: int = THREADS_LOG_COMPACT_BYTES,
+                 shared: bool = THREADS_SHARED):
         """Initializes the saver by loading existing state from the files."""
-        self.states = self.load_state()
-        self.threads = self.load_threads()
+        if storage_mode not in ("snapshot", "log"):
+            raise ValueError(f"Unknown thread storage mode: '{storage_mode}'")
+        if shared and storage_mode != "snapshot":
+            raise ValueError("Shared thread storage requires the 'snapshot' storage mode")
+        if shared and fcntl is None:
+            raise ValueError("Shared thread storage requires fcntl file locks, which this platform lacks")
+        self.storage_mode = storage_mode
+        self.compact_threshold = compact_threshold
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._log = None
+        self._log_bytes = 0
+        self._compaction: Optional[threading.Thread] = None
+        self._snapshot_sequence = itertools.count()
+
+        self.states: Dict[str, Any] = {}
+        self.threads: Dict[str, ThreadInfo] = {}
+        self.leases: Dict[str, Dict[str, Any]] = {}
+        self._index = ThreadIndex()
+        # (inode, mtime, size) of each file as last read or written by this process
+        self._file_stamps: Dict[str, Any] = {}
+        with self._files_locked(exclusive=False):
+            self._reload_changed_files()
+        if self.storage_mode == "log":
+            self._open_log()
+            self._rebuild_index()
 
     def load_state(self) -> Dict[str, Any]:
         """Loads the workflow states from the local JSON file."""
@@ -40,14 +109,7 @@ class JsonSaver:
                     data = json.load(f)
                     # Convert string dates back to datetime objects
                     for thread_id, thread_info in data.items():
-                        if isinstance(thread_info.get('created_at'), str):
-                            thread_info['created_at'] = datetime.fromisoformat(thread_info['created_at'])
-                        if isinstance(thread_info.get('updated_at'), str):
-                            thread_info['updated_at'] = datetime.fromisoformat(thread_info['updated_at'])
-                        if isinstance(thread_info.get('progress', {}).get('start_time'), str):
-                            thread_info['progress']['start_time'] = datetime.fromisoformat(thread_info['progress']['start_time'])
-                        if isinstance(thread_info.get('progress', {}).get('last_updated'), str):
-                            thread_info['progress']['last_updated'] = datetime.fromisoformat(thread_info['progress']['last_updated'])
+                        parse_thread_dates(thread_info)
                     return data
                 except json.JSONDecodeError:
                     print(f"Warning: '{THREADS_FILE}' is empty or invalid. Starting with new threads.")
@@ -56,101 +118,449 @@ class JsonSaver:
 
     def save_state(self) -> None:
         """Saves the current workflow states back to the local JSON file."""
-        with open(STATE_FILE, "w") as f:
-            json.dump(self.states, f, indent=4, default=str)
+        self._replace_file(STATE_FILE, self.states)
 
     def save_threads(self) -> None:
         """Saves the current thread information back to the local JSON file."""
-        with open(THREADS_FILE, "w") as f:
-            json.dump(self.threads, f, indent=4, default=str)
+        self._replace_file(THREADS_FILE, self.threads)
+
+    def _replace_file(self, path: str, data: Dict[str, Any]) -> None:
+        """Atomically replaces a JSON file, so other processes never read it half written."""
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with store_file_write_duration.time(file=path):
+            with open(tmp_file, "w") as f:
+                json.dump(data, f, indent=4, default=str)
+                size = f.tell()
+            os.replace(tmp_file, path)
+        store_write_bytes.observe(size, file=path)
+        store_file_bytes.set(size, file=path)
+        self._file_stamps[path] = self._stamp(path)
+
+    # --- Sharing the files between processes ---
+
+    @contextmanager
+    def _files_locked(self, exclusive: bool = True):
+        """
+        Runs the block under this saver's lock. In shared mode the block also
+        holds the cross-process file lock (exclusive for changes) and starts
+        from the files as other processes left them.
+        """
+        with self._lock:
+            if not self.shared:
+                yield
+                return
+            with open(THREADS_LOCK_FILE, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    self._reload_changed_files()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _reload_changed_files(self) -> None:
+        """Re-reads every file that changed since this process last read or wrote it."""
+        if self._changed(THREADS_FILE):
+            self.threads = self.load_threads()
+            self._rebuild_index()
+        if self._changed(STATE_FILE):
+            self.states = self.load_state()
+        if self.shared and self._changed(RUN_LEASES_FILE):
+            self.leases = {}
+            if os.path.exists(RUN_LEASES_FILE):
+                with open(RUN_LEASES_FILE, "r") as f:
+                    self.leases = json.load(f)
+
+    def _changed(self, path: str) -> bool:
+        stamp = self._stamp(path)
+        if path in self._file_stamps and stamp == self._file_stamps[path]:
+            return False
+        self._file_stamps[path] = stamp
+        return True
+
+    def _rebuild_index(self) -> None:
+        self._index = ThreadIndex()
+        for thread in self.threads.values():
+            self._index.add(thread)
+
+    # --- Append-only thread log ---
+
+    def _open_log(self) -> None:
+        """Replays any pending log records and opens the log for appending."""
+        replayed = 0
+        for path in (THREADS_COMPACTING_FILE, THREADS_LOG_FILE):
+            replayed += self._replay_log(path)
+
+        if replayed:
+            # Fold whatever was replayed into a fresh snapshot before accepting new records.
+            self._write_snapshot(self.threads)
+            for path in (THREADS_COMPACTING_FILE, THREADS_LOG_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+            print(f"Replayed {replayed} thread log records into '{THREADS_FILE}'")
+
+        self._log = open(THREADS_LOG_FILE, "a")
+        self._log_bytes = os.path.getsize(THREADS_LOG_FILE)
+
+    def _replay_log(self, path: str) -> int:
+        """Applies every record of a log file to the in-memory threads."""
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything before it is intact.
+                    print(f"Warning: skipping invalid record in '{path}'")
+                    continue
+                self._apply_record(record)
+                count += 1
+        return count
+
+    def _apply_record(self, record: Dict[str, Any]) -> None:
+        """Applies one log record. Records hold absolute values, so replaying twice is harmless."""
+        op = record.get("op")
+        thread_id = record.get("thread_id")
+        if op == "create":
+            self.threads[thread_id] = parse_thread_dates(record["thread"])
+        elif op == "update" and thread_id in self.threads:
+            thread = self.threads[thread_id]
+            thread.update(parse_thread_dates(record.get("fields", {})))
+            thread["progress"].update(parse_thread_dates({"progress": record.get("progress", {})})["progress"])
+        elif op == "delete":
+            self.threads.pop(thread_id, None)
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """Appends compact records to the log and triggers compaction when it grows too large."""
+        data = "".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records)
+        with self._lock:
+            with store_file_write_duration.time(file=THREADS_LOG_FILE):
+                self._log.write(data)
+                self._log.flush()
+            self._log_bytes += len(data)
+            store_write_bytes.observe(len(data), file=THREADS_LOG_FILE)
+            store_file_bytes.set(self._log_bytes, file=THREADS_LOG_FILE)
+            if self._log_bytes >= self.compact_threshold and not self._compaction_running():
+                self._start_compaction()
+
+    def _compaction_running(self) -> bool:
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def _start_compaction(self) -> threading.Thread:
+        """
+        Rotates the log and folds it into the snapshot on a background thread.
+        Called under `self._lock` with no compaction running.
+        """
+        with self._lock:
+            self._log.close()
+            os.replace(THREADS_LOG_FILE, THREADS_COMPACTING_FILE)
+            self._log = open(THREADS_LOG_FILE, "a")
+            self._log_bytes = 0
+            # Mutations replace values inside a thread (or its progress dict), so a
+            # two-level copy is a consistent snapshot of everything in the rotated log.
+            snapshot = {
+                thread_id: {**thread, "progress": dict(thread["progress"])}
+                for thread_id, thread in self.threads.items()
+            }
+            self._compaction = threading.Thread(target=self._compact, args=(snapshot,), daemon=True)
+            self._compaction.start()
+            return self._compaction
+
+    def _compact(self, snapshot: Dict[str, ThreadInfo]) -> None:
+        """Writes the snapshot and drops the log records it now contains."""
+        try:
+            self._write_snapshot(snapshot)
+            os.remove(THREADS_COMPACTING_FILE)
+        except OSError as e:
+            # The rotated log is kept and replayed on the next startup.
+            print(f"Warning: thread log compaction failed: {e}")
+
+    def _write_snapshot(self, threads: Dict[str, ThreadInfo]) -> None:
+        """Atomically replaces the threads snapshot file."""
+        tmp_file = f"{THREADS_FILE}.{os.getpid()}.{next(self._snapshot_sequence)}.tmp"
+        with store_file_write_duration.time(file=THREADS_FILE):
+            with open(tmp_file, "w") as f:
+                json.dump(threads, f, separators=(",", ":"), default=str)
+                size = f.tell()
+            os.replace(tmp_file, THREADS_FILE)
+        store_write_bytes.observe(size, file=THREADS_FILE)
+        store_file_bytes.set(size, file=THREADS_FILE)
+
+    def compact(self) -> None:
+        """Folds the current log into the snapshot and waits for it to finish."""
+        if self.storage_mode != "log":
+            return
+        while True:
+            # Checked and started under the lock, so an append crossing the threshold cannot start a second one
+            with self._lock:
+                running = self._compaction if self._compaction_running() else None
+                if running is None:
+                    compaction = self._start_compaction()
+                    break
+            running.join()
+        compaction.join()
+
+    def close(self) -> None:
+        """Waits for any running compaction and closes the log."""
+        if self._compaction_running():
+            self._compaction.join()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _persist(self, records: List[Dict[str, Any]]) -> None:
+        """Persists thread changes: appended to the log, or by rewriting the snapshot once."""
+        if not records:
+            return
+        if self.storage_mode == "log":
+            self._append_records(records)
+        else:
+            self.save_threads()
+
+    def _set_thread(self, thread_info: ThreadInfo) -> Dict[str, Any]:
+        self.threads[thread_info["thread_id"]] = thread_info
+        self._index.add(thread_info)
+        return {"op": "create", "thread_id": thread_info["thread_id"], "thread": thread_info}
+
+    def _patch_thread(self, thread_id: str, fields: Dict[str, Any], progress: Dict[str, Any]) -> Dict[str, Any]:
+        thread = self.threads[thread_id]
+        thread.update(fields)
+        thread["progress"].update(progress)
+        self._index.add(thread)
+        return {"op": "update", "thread_id": thread_id, "fields": fields, "progress": progress}
+
+    def _remove_thread(self, thread_id: str) -> Dict[str, Any]:
+        del self.threads[thread_id]
+        self._index.remove(thread_id)
+        return {"op": "delete", "thread_id": thread_id}
+
+    def apply_thread_changes(self, changes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Applies a batch of coalesced thread changes with a single save.
+
+        Each change is {"deleted": bool, "thread": full ThreadInfo or None,
+        "fields": {...}, "progress": {...}}, applied in that order, as queued
+        by WriteBehindSaver.
+        """
+        states_changed = False
+        with self._files_locked():
+            records = []
+            for thread_id, change in changes.items():
+                if change.get("deleted"):
+                    if thread_id in self.threads:
+                        records.append(self._remove_thread(thread_id))
+                    states_changed |= self.states.pop(thread_id, None) is not None
+                if change.get("thread"):
+                    records.append(self._set_thread(change["thread"]))
+                if (change.get("fields") or change.get("progress")) and thread_id in self.threads:
+                    records.append(self._patch_thread(thread_id, change.get("fields", {}), change.get("progress", {})))
+            self._persist(records)
+            if states_changed:
+                self.save_state()
+
+    def put_states(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Saves several workflow states with a single write."""
+        with self._files_locked():
+            self.states.update(states)
+            self.save_state()
+
+    # --- Public API ---
 
     def get_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """Retrieves a specific workflow state by its thread ID."""
-        return self.states.get(thread_id)
+        with self._files_locked(exclusive=False):
+            return self.states.get(thread_id)
 
     def put_by_thread_id(self, thread_id: str, state: Dict[str, Any]) -> None:
         """Saves a new or updated workflow state for a given thread ID."""
-        self.states[thread_id] = state
-        self.save_state()
+        with self._files_locked():
+            self.states[thread_id] = state
+            self.save_state()
         print(f"Workflow state saved for thread ID: {thread_id}")
 
     def create_thread(self, thread_id: str, name: str, workflow_type: str) -> ThreadInfo:
         """Creates a new thread with initial progress tracking."""
-        now = datetime.now()
-        thread_info: ThreadInfo = {
-            "thread_id": thread_id,
-            "name": name,
-            "status": ThreadStatus.PENDING,
-            "workflow_type": workflow_type,
-            "progress": {
-                "thread_id": thread_id,
-                "status": ThreadStatus.PENDING,
-                "current_step": "initializing",
-                "total_steps": 0,
-                "completed_steps": 0,
-                "start_time": now,
-                "last_updated": now,
-                "error_message": None
-            },
-            "created_at": now,
-            "updated_at": now
-        }
-        
-        self.threads[thread_id] = thread_info
-        self.save_threads()
+        thread_info = new_thread_info(thread_id, name, workflow_type)
+        with self._files_locked():
+            self._persist([self._set_thread(thread_info)])
         print(f"New thread created: {thread_id}")
         return thread_info
 
-    def update_thread_status(self, thread_id: str, status: ThreadStatus, current_step: str = None, error_message: str = None) -> None:
+    def update_thread_status(self, thread_id: str, status: ThreadStatus, current_step: str = None, error_message: str = None) -> bool:
         """Updates the status and progress of a thread."""
-        if thread_id in self.threads:
-            thread = self.threads[thread_id]
-            thread["status"] = status
-            thread["updated_at"] = datetime.now()
-            
-            if current_step:
-                thread["progress"]["current_step"] = current_step
-            
-            if error_message:
-                thread["progress"]["error_message"] = error_message
-            
-            thread["progress"]["status"] = status
-            thread["progress"]["last_updated"] = datetime.now()
-            
-            self.save_threads()
-            print(f"Thread {thread_id} status updated to: {status}")
+        with self._files_locked():
+            if thread_id in self.threads:
+                self._persist([self._patch_thread(thread_id, *status_patch(status, current_step, error_message))])
+                print(f"Thread {thread_id} status updated to: {status}")
+                return True
+        return False
 
-    def update_thread_progress(self, thread_id: str, completed_steps: int, total_steps: int, current_step: str) -> None:
+    def update_thread_progress(self, thread_id: str, completed_steps: int, total_steps: int, current_step: str) -> bool:
         """Updates the progress of a thread."""
-        if thread_id in self.threads:
-            thread = self.threads[thread_id]
-            thread["progress"]["completed_steps"] = completed_steps
-            thread["progress"]["total_steps"] = total_steps
-            thread["progress"]["current_step"] = current_step
-            thread["progress"]["last_updated"] = datetime.now()
-            thread["updated_at"] = datetime.now()
-            
-            self.save_threads()
+        with self._files_locked():
+            if thread_id in self.threads:
+                self._persist([self._patch_thread(thread_id, *progress_patch(completed_steps, total_steps, current_step))])
+                return True
+        return False
+
+    def update_thread(self, thread_id: str, **changes: Any) -> bool:
+        """Applies a combined status/progress update (see thread_patch) as one change."""
+        with self._files_locked():
+            if thread_id in self.threads:
+                self._persist([self._patch_thread(thread_id, *thread_patch(**changes))])
+                return True
+        return False
 
     def get_all_threads(self) -> List[ThreadInfo]:
         """Retrieves all threads."""
-        return list(self.threads.values())
+        with self._files_locked(exclusive=False):
+            return list(self.threads.values())
+
+    def list_threads(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                     workflow_type: Optional[str] = None, sort: str = "updated_at", order: str = "desc",
+                     fields: Optional[str] = None) -> Dict[str, Any]:
+        """Retrieves one page of threads, filtered and sorted through the thread index."""
+        validate_listing(sort, order, limit)
+        projection = parse_fields(fields)
+        after = decode_cursor(cursor, sort, order) if cursor else None
+
+        with self._files_locked(exclusive=False):
+            # Fetch one extra entry to know whether another page follows.
+            entries = self._index.page(sort, order, limit + 1, after, status_value(status), workflow_type)
+            threads = [project_thread(self.threads[thread_id], projection) for _, thread_id in entries[:limit]]
+
+        next_cursor = encode_cursor(sort, order, *entries[limit - 1]) if len(entries) > limit else None
+        return {"threads": threads, "next_cursor": next_cursor}
 
     def get_thread_info(self, thread_id: str) -> Optional[ThreadInfo]:
         """Retrieves thread information by ID."""
-        return self.threads.get(thread_id)
+        with self._files_locked(exclusive=False):
+            return self.threads.get(thread_id)
+
+    def has_thread(self, thread_id: str) -> bool:
+        """Whether a thread exists."""
+        with self._files_locked(exclusive=False):
+            return thread_id in self.threads
+
+    def thread_ids(self) -> List[str]:
+        """Ids of all threads."""
+        with self._files_locked(exclusive=False):
+            return list(self.threads)
 
     def delete_thread(self, thread_id: str) -> bool:
         """Deletes a thread and its associated state."""
-        if thread_id in self.threads:
-            del self.threads[thread_id]
-            if thread_id in self.states:
-                del self.states[thread_id]
-            self.save_threads()
-            self.save_state()
-            print(f"Thread {thread_id} deleted")
-            return True
+        with self._files_locked():
+            if thread_id in self.threads:
+                self._persist([self._remove_thread(thread_id)])
+                if thread_id in self.states:
+                    del self.states[thread_id]
+                self.save_state()
+                print(f"Thread {thread_id} deleted")
+                return True
         return False
 
+    # --- Run leases ---
+
+    def claim_run(self, thread_id: str, owner: str, ttl: float) -> bool:
+        """Leases a run to `owner` for `ttl` seconds, unless another owner holds an unexpired lease."""
+        now = time.time()
+        with self._files_locked():
+            lease = self.leases.get(thread_id)
+            if lease and lease["owner"] != owner and lease["expires_at"] > now:
+                return False
+            # A pause request stays with the run, whoever takes it over
+            self.leases[thread_id] = {**(lease or {}), "owner": owner, "expires_at": now + ttl}
+            self._save_leases()
+            return True
+
+    def renew_runs(self, thread_ids: List[str], owner: str, ttl: float) -> List[str]:
+        """Extends the leases `owner` still holds; returns the runs it holds."""
+        now = time.time()
+        with self._files_locked():
+            held = []
+            for thread_id in thread_ids:
+                lease = self.leases.get(thread_id)
+                if lease and lease["owner"] != owner and lease["expires_at"] > now:
+                    continue
+                self.leases[thread_id] = {**(lease or {}), "owner": owner, "expires_at": now + ttl}
+                held.append(thread_id)
+            self._save_leases()
+            return held
+
+    def release_run(self, thread_id: str, owner: str) -> None:
+        """Gives up the lease of a run, if `owner` holds it, with any pause request of the run."""
+        with self._files_locked():
+            if self.leases.get(thread_id, {}).get("owner") == owner:
+                del self.leases[thread_id]
+                self._save_leases()
+
+    def expired_runs(self) -> List[str]:
+        """Runs whose lease was not renewed in time: their process is gone."""
+        now = time.time()
+        with self._files_locked(exclusive=False):
+            return [thread_id for thread_id, lease in self.leases.items() if lease["expires_at"] <= now]
+
+    def request_run_pause(self, thread_id: str, requester: str) -> bool:
+        """Asks the process holding a run to pause it; False unless another live process holds the run."""
+        with self._files_locked():
+            lease = self.leases.get(thread_id)
+            if not lease or lease["owner"] == requester or lease["expires_at"] <= time.time():
+                return False
+            lease["pause_requested"] = True
+            self._save_leases()
+            return True
+
+    def withdraw_run_pause(self, thread_id: str) -> bool:
+        """Withdraws a pause request the process holding the run has not taken yet."""
+        with self._files_locked():
+            lease = self.leases.get(thread_id)
+            if not lease or not lease.pop("pause_requested", False):
+                return False
+            self._save_leases()
+            return True
+
+    def take_run_pauses(self, owner: str) -> List[str]:
+        """Returns (and clears) the pause requests of the runs `owner` holds."""
+        with self._files_locked():
+            taken = [thread_id for thread_id, lease in self.leases.items()
+                     if lease["owner"] == owner and lease.get("pause_requested")]
+            for thread_id in taken:
+                del self.leases[thread_id]["pause_requested"]
+            if taken:
+                self._save_leases()
+            return taken
+
+    def _save_leases(self) -> None:
+        # Only other processes need them; a single process keeps them in memory
+        if self.shared:
+            self._replace_file(RUN_LEASES_FILE, self.leases)
+
+def create_saver(backend: str = THREAD_STORE_BACKEND):
+    """
+    Builds the thread/state store selected by THREAD_STORE_BACKEND ("sqlite" or "json"),
+    wrapped in a WriteBehindSaver so request handlers never wait on disk I/O.
+    The store itself is opened on first use.
+    """
+    from .write_behind import WriteBehindSaver
+    if backend == "sqlite":
+        def open_store():
+            from .sqlitesaver import SqliteSaver
+            return SqliteSaver()
+    elif backend == "json":
+        open_store = JsonSaver
+    else:
+        raise ValueError(f"Unknown thread store backend: '{backend}'")
+    return WriteBehindSaver(flush_interval=STORE_FLUSH_INTERVAL, open_store=open_store)
+
 # Instantiate the saver. This object will be imported by other services.
-json_saver = JsonSaver()
\ No newline at end of file
+json_saver = create_saver()
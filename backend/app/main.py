@@ -1,9 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import chat, workflow
+from .routes import chat, workflow, blobs, metrics
+from .jsonsaver import json_saver
+from .Services.http_client import http_client
+from .Services.llm_cache import llm_cache
+from .Services.job_runner import job_runner
+from .Services.event_bus import event_bus
+from .Services.tracing import tracer
+from .Services.model_clients import warm_clients, reset_clients
+from .agents.registry import agent_modules
+from .providers.registry import provider_modules
+from .routes.workflow import recover_interrupted_runs, maintain_run_leases
+from .config import RECOVER_INTERRUPTED_RUNS, PREWARM_MODEL_CLIENTS, AGENT_BACKEND
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Thread changes are written by a background task; flush whatever is left on shutdown.
+    json_saver.start()
+    # One pooled HTTP session for every outbound call, closed with the app.
+    await http_client.start()
+    # Workflow runs execute in a worker pool, independent of the requests that start them.
+    job_runner.start()
+    # Workflow events reach the SSE streams of this process, and with a shared bus those of the others
+    event_bus.start()
+    if RECOVER_INTERRUPTED_RUNS:
+        # Runs cut off by a restart continue from their last completed step
+        await recover_interrupted_runs(startup=True)
+    # Keeps this process's runs leased, so other server processes on the same store leave them alone
+    lease_keeper = asyncio.create_task(maintain_run_leases())
+    if PREWARM_MODEL_CLIENTS and AGENT_BACKEND == "real":
+        # The agents, the providers in use and their model clients load in a worker thread; startup does not wait for them
+        asyncio.get_running_loop().run_in_executor(None, warm_clients, agent_modules() + provider_modules())
+    yield
+    lease_keeper.cancel()
+    await job_runner.aclose()
+    await event_bus.aclose()
+    await http_client.aclose()
+    await json_saver.aclose()
+    llm_cache.close()
+    reset_clients()
+    tracer.close()
 
 # Create the main FastAPI application instance
-app = FastAPI(title="Orchestro AI Backend")
+app = FastAPI(title="Orchestro AI Backend", lifespan=lifespan)
 
 # --- CORS Configuration ---
 # The frontend runs on a different port (3000) than the backend (8000),
@@ -25,6 +66,9 @@ app.add_middleware(
 # This is how we attach our API routes to the main application.
 app.include_router(chat.router, prefix="/api", tags=["Chat"])
 app.include_router(workflow.router, prefix="/api", tags=["Workflow"])
+app.include_router(blobs.router, prefix="/api", tags=["Blobs"])
+# Scraped by Prometheus, which expects it at the root
+app.include_router(metrics.router, tags=["Metrics"])
 
 # --- Root Endpoint ---
 # A simple endpoint to check if the backend is running
@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+# A chat prompt as (role, text) pairs; roles are "system", "human" and "ai"
+Messages = List[Tuple[str, str]]
+
+class ProviderError(Exception):
+    """The provider answered a request with an error instead of a result."""
+
+class LLMProvider(ABC):
+    """
+    Everything the orchestrator asks of a model provider: chat answers (whole or
+    streamed), one-shot prompt completions and image generation.
+
+    Providers only talk to their models. Caching, single-flight, admission
+    control and metrics stay with the callers (llm_service, image_agent), so
+    every provider is limited and measured the same way. A provider missing
+    one of the abstract methods fails when it is built.
+    """
+
+    name = "base"
+    # Admission quotas (see admission.py) the provider's text and image calls count against
+    text_endpoint = "gemini_text"
+    image_endpoint = "gemini_image"
+
+    @abstractmethod
+    def text_model(self) -> str:
+        """Identifier of the chat model (part of the response cache key)."""
+
+    @abstractmethod
+    def prompt_model(self) -> str:
+        """Identifier of the model answering `complete`."""
+
+    @abstractmethod
+    def image_model(self) -> str:
+        """Identifier of the image model."""
+
+    def params(self) -> Dict[str, Any]:
+        """Generation parameters that change what the chat model answers (part of the cache key)."""
+        return {}
+
+    @abstractmethod
+    async def generate(self, messages: Messages) -> str:
+        """The chat model's whole answer to `messages`."""
+
+    @abstractmethod
+    def stream(self, messages: Messages) -> AsyncIterator[str]:
+        """The chat model's answer to `messages`, chunk by chunk as it is generated."""
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> str:
+        """Answer of the prompt model to a single prompt (e.g. writing an image prompt)."""
+
+    @abstractmethod
+    async def generate_image(self, prompt: str) -> Tuple[bytes, str]:
+        """An image for `prompt`, as (bytes, content type)."""
@@ -0,0 +1,119 @@
+import asyncio
+import base64
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+import aiohttp
+from app.config import GOOGLE_API_KEY
+from app.providers.base import LLMProvider, Messages, ProviderError
+from app.Services.http_client import http_client
+from app.Services.model_clients import lazy_client
+
+TEXT_MODEL = "gemini-1.5-flash"
+IMAGE_MODEL = "gemini-2.0-flash-preview-image-generation"
+IMAGE_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{IMAGE_MODEL}:generateContent?key={GOOGLE_API_KEY}"
+HEADERS = {'Content-Type': 'application/json'}
+
+def _build_chat_model():
+    # Imported here: langchain and the Google SDK are only loaded once the model is needed
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    try:
+        return ChatGoogleGenerativeAI(model=TEXT_MODEL, google_api_key=GOOGLE_API_KEY)
+    except Exception as e:
+        raise ValueError(f"Failed to initialize ChatGoogleGenerativeAI: {e}. Please check your GOOGLE_API_KEY.")
+
+def _build_text_model():
+    import google.generativeai as genai
+    genai.configure(api_key=GOOGLE_API_KEY)
+    try:
+        generation_config = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+        }
+        return genai.GenerativeModel(
+            TEXT_MODEL,
+            generation_config=generation_config
+        )
+    except Exception as e:
+        raise ValueError(f"Failed to initialize Gemini Text Model: {e}")
+
+# Built on first use (or by the lifespan's warm-up), never at import
+chat_model = lazy_client("gemini_chat", _build_chat_model)
+prompt_model = lazy_client("gemini_image_prompt", _build_text_model)
+
+def _to_langchain(messages: Messages) -> list:
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    types = {"system": SystemMessage, "human": HumanMessage, "ai": AIMessage}
+    return [types[role](content=text) for role, text in messages]
+
+def _chunk_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini: the LangChain chat model for chat answers, the
+    google.generativeai model (more creative settings) for prompt completions,
+    and the image generation endpoint over the shared HTTP session.
+    """
+
+    name = "gemini"
+
+    def __init__(self):
+        self.chat_model = chat_model
+        self.prompt_client = prompt_model
+
+    def text_model(self) -> str:
+        return self.chat_model.get().model
+
+    def prompt_model(self) -> str:
+        return self.prompt_client.get().model_name
+
+    def image_model(self) -> str:
+        return IMAGE_MODEL
+
+    def params(self) -> Dict[str, Any]:
+        model = self.chat_model.get()
+        return {
+            key: getattr(model, key, None)
+            for key in ("temperature", "top_p", "top_k", "max_output_tokens", "n")
+        }
+
+    async def generate(self, messages: Messages) -> str:
+        return (await self.chat_model.get().ainvoke(_to_langchain(messages))).content
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        async for chunk in self.chat_model.get().astream(_to_langchain(messages)):
+            text = _chunk_text(chunk.content)
+            if text:
+                yield text
+
+    async def complete(self, prompt: str) -> str:
+        response = await self.prompt_client.get().generate_content_async(prompt)
+        return response.text
+
+    async def generate_image(self, prompt: str) -> Tuple[bytes, str]:
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "responseModalities": ["IMAGE"],
+                "responseMimeType": "image/png",
+                "aspectRatio": "16:9"
+            }
+        }
+        # Pooled, application-wide session: retries and concurrent steps reuse connections
+        async with http_client.session().post(
+            IMAGE_API_URL,
+            headers=HEADERS,
+            data=json.dumps(payload),
+            timeout=aiohttp.ClientTimeout(total=120)
+        ) as response:
+            response.raise_for_status()
+            result = await response.json()
+
+        if "error" in result:
+            raise ProviderError(result["error"]["message"])
+        image = result['candidates'][0]['content']['parts'][0]['inlineData']
+        # Decoded in a worker thread: the payload is several megabytes of base64
+        data = await asyncio.get_running_loop().run_in_executor(None, base64.b64decode, image['data'])
+        return data, image.get('mimeType', "image/png")
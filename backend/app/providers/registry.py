@@ -0,0 +1,49 @@
+import importlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set
+from app.config import LLM_PROVIDER, WORKFLOW_PROVIDERS
+from app.providers.base import LLMProvider
+
+# Provider implementations, imported on first use (the stub never loads the Google SDKs)
+PROVIDERS: Dict[str, str] = {
+    'gemini': 'app.providers.gemini_provider:GeminiProvider',
+    'stub': 'app.providers.stub_provider:StubProvider',
+}
+
+_instances: Dict[str, LLMProvider] = {}
+
+# Provider answering the model calls of the current task; set per workflow run
+_current_provider: ContextVar[str] = ContextVar("llm_provider", default=LLM_PROVIDER)
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """The named provider, or the one of the current task; one shared instance per provider."""
+    name = name or _current_provider.get()
+    if name not in _instances:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: '{name}'")
+        module_name, class_name = PROVIDERS[name].split(':')
+        _instances[name] = getattr(importlib.import_module(module_name), class_name)()
+    return _instances[name]
+
+@contextmanager
+def use_provider(name: str) -> Iterator[None]:
+    """Answers every model call made inside the block with the named provider."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: '{name}'")
+    token = _current_provider.set(name)
+    try:
+        yield
+    finally:
+        _current_provider.reset(token)
+
+def provider_for_workflow(workflow_type: str) -> str:
+    """Provider of a workflow type: its WORKFLOW_PROVIDERS entry, or LLM_PROVIDER."""
+    return WORKFLOW_PROVIDERS.get(workflow_type, LLM_PROVIDER)
+
+def configured_providers() -> Set[str]:
+    return {LLM_PROVIDER, *WORKFLOW_PROVIDERS.values()}
+
+def provider_modules() -> List[str]:
+    """Modules implementing the configured providers, e.g. to preload them."""
+    return [PROVIDERS[name].split(':')[0] for name in sorted(configured_providers()) if name in PROVIDERS]
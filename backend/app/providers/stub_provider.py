@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import struct
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.config import (
+    STUB_LATENCY_DISTRIBUTION, STUB_LATENCY_MEAN, STUB_LATENCY_SIGMA, STUB_IMAGE_LATENCY_MEAN,
+    STUB_TOKENS_PER_SECOND, STUB_OUTPUT_TOKENS, STUB_ERROR_RATE, STUB_SEED,
+)
+from app.providers.base import LLMProvider, Messages, ProviderError
+
+LATENCY_DISTRIBUTIONS = ("fixed", "exponential", "lognormal")
+
+# Words the stub's answers are made of
+VOCABULARY = (
+    "content", "audience", "video", "idea", "story", "brand", "growth", "launch", "creator", "insight",
+    "trend", "engage", "share", "clip", "visual", "moment", "strategy", "community", "value", "voice",
+    "hook", "script", "caption", "reach", "focus", "simple", "bold", "clear", "future", "today",
+)
+# Answers are streamed this many tokens (words) at a time
+CHUNK_TOKENS = 4
+
+def _png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """A valid single-colour PNG image."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    rows = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+class StubProvider(LLMProvider):
+    """
+    Local stand-in for a model provider, for load tests and capacity planning
+    without API keys or API costs.
+
+    Outputs are deterministic: the same prompt always gets the same answer (and
+    image), so response caches and single-flight behave as they do in
+    production. Latency is drawn from a configurable distribution (time to the
+    first token), the answer then arrives at `tokens_per_second`, and
+    `error_rate` of the calls fail. Latencies and failures come from a seeded
+    generator, so a load test can be repeated exactly.
+    """
+
+    name = "stub"
+    text_endpoint = "stub_text"
+    image_endpoint = "stub_image"
+
+    def __init__(self, distribution: str = STUB_LATENCY_DISTRIBUTION, latency_mean: float = STUB_LATENCY_MEAN,
+                 latency_sigma: float = STUB_LATENCY_SIGMA, image_latency_mean: float = STUB_IMAGE_LATENCY_MEAN,
+                 tokens_per_second: float = STUB_TOKENS_PER_SECOND, output_tokens: int = STUB_OUTPUT_TOKENS,
+                 error_rate: float = STUB_ERROR_RATE, seed: Optional[int] = STUB_SEED):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown stub latency distribution: '{distribution}'")
+        if not 0 <= error_rate <= 1:
+            raise ValueError("The stub error rate must be between 0 and 1")
+        self.distribution = distribution
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.image_latency_mean = image_latency_mean
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def text_model(self) -> str:
+        return "stub-text"
+
+    def prompt_model(self) -> str:
+        return "stub-text"
+
+    def image_model(self) -> str:
+        return "stub-image"
+
+    def params(self) -> Dict[str, Any]:
+        return {"output_tokens": self.output_tokens}
+
+    # --- Simulated behaviour ---
+
+    def sample_latency(self, mean: float) -> float:
+        """Seconds until the first token (or the image), drawn from the configured distribution."""
+        if mean <= 0:
+            return 0.0
+        if self.distribution == "exponential":
+            return self._random.expovariate(1 / mean)
+        if self.distribution == "lognormal":
+            # Parameterized so that the distribution's mean is `mean`
+            return self._random.lognormvariate(math.log(mean) - self.latency_sigma ** 2 / 2, self.latency_sigma)
+        return mean
+
+    async def _respond(self, mean: float) -> None:
+        """Waits for the sampled latency, then fails `error_rate` of the calls."""
+        await asyncio.sleep(self.sample_latency(mean))
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ProviderError("Stub provider: injected failure")
+
+    def answer(self, *parts: Any) -> List[str]:
+        """The deterministic answer to a request, as tokens."""
+        digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).digest()
+        words = random.Random(digest).choices(VOCABULARY, k=max(1, self.output_tokens))
+        return [word if index == 0 else f" {word}" for index, word in enumerate(words)]
+
+    async def _pace(self, tokens: int) -> None:
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(tokens / self.tokens_per_second)
+
+    # --- Provider interface ---
+
+    async def generate(self, messages: Messages) -> str:
+        await self._respond(self.latency_mean)
+        tokens = self.answer(self.text_model(), messages)
+        await self._pace(len(tokens))
+        return "".join(tokens)
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        await self._respond(self.latency_mean)
+        tokens = self.answer(self.text_model(), messages)
+        for start in range(0, len(tokens), CHUNK_TOKENS):
+            chunk = tokens[start:start + CHUNK_TOKENS]
+            if start:
+                await self._pace(len(chunk))
+            yield "".join(chunk)
+
+    async def complete(self, prompt: str) -> str:
+        return await self.generate([("human", prompt)])
+
+    async def generate_image(self, prompt: str) -> Tuple[bytes, str]:
+        await self._respond(self.image_latency_mean)
+        digest = hashlib.sha256(prompt.encode()).digest()
+        return _png(64, 36, (digest[0], digest[1], digest[2])), "image/png"
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Header, Response
+from typing import Optional, Tuple
+import re
+from app.Services.blob_store import blob_store
+
+router = APIRouter()
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of a single `bytes=` range; None if it cannot be satisfied"""
+    match = RANGE_PATTERN.match(value.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(match.group(2))), size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+@router.get("/blobs/{digest}")
+def get_blob(digest: str, range: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
+    """Serve a stored blob (e.g. a generated image); supports ETag revalidation and byte ranges"""
+    info = blob_store.stat(digest)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    size, content_type = info
+
+    # Content-addressed: the digest is a strong ETag and the content never changes
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if range:
+        byte_range = parse_range(range, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        return Response(
+            content=blob_store.read(digest, start, end),
+            status_code=206,
+            media_type=content_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+        )
+    return Response(content=blob_store.read(digest), media_type=content_type, headers=headers)
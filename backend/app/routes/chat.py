@@ -1,6 +1,13 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from typing import AsyncGenerator
+import json
+import time
 from ..Schemas.chat_schema import ChatRequest, ChatResponse
-from ..Services.llm_service import generate_text
+from ..Services.llm_service import generate_text, stream_text
+from ..Services.llm_cache import llm_cache
+from ..Services.single_flight import single_flight_stats
+from ..Services.admission import admission, use_lane, INTERACTIVE
 
 # Create a new router for the chat API
 router = APIRouter()
@@ -10,8 +17,49 @@ async def chat_endpoint(request: ChatRequest):
     """
     Handles a chat request, calls the LLM service, and returns a response.
     """
-    # Call the core LLM service with the user's message
-    response = await generate_text(request.message)
+    # Call the core LLM service with the user's message (ahead of queued workflow calls)
+    with use_lane(INTERACTIVE):
+        response = await generate_text(request.message)
     
     # Return the response wrapped in the Pydantic model
-    return ChatResponse(response=response)
\ No newline at end of file
+    return ChatResponse(response=response)
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streams the chat response as NDJSON while the model generates it.
+
+    Each line is {"type": "token", "content": ...}; the last line is
+    {"type": "done", "time_to_first_token": ..., "total_latency": ...} (seconds).
+    """
+    async def generate_lines() -> AsyncGenerator[str, None]:
+        start = time.perf_counter()
+        first_token = None
+        async for chunk in stream_text(request.message, lane=INTERACTIVE):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield json.dumps({"type": "token", "content": chunk}) + "\n"
+        yield json.dumps({
+            "type": "done",
+            "time_to_first_token": None if first_token is None else round(first_token, 3),
+            "total_latency": round(time.perf_counter() - start, 3)
+        }) + "\n"
+
+    return StreamingResponse(
+        generate_lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """
+    Returns the hit/miss counters of the LLM response cache, how many
+    identical in-flight model calls were coalesced, and the queue depth and
+    admission wait times of each rate-limited Gemini endpoint.
+    """
+    return {
+        "cache": llm_cache.stats(),
+        "single_flight": single_flight_stats(),
+        "admission": admission.stats()
+    }
\ No newline at end of file
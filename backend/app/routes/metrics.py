@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from app.Services.metrics import metrics, CONTENT_TYPE
+
+router = APIRouter()
+
+@router.get("/metrics")
+def get_metrics():
+    """Step, model call, image API, thread store, stream and failure metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
@@ -1,69 +1,217 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Header
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple
 import json
 import asyncio
 from app.Services.workflow_service import WorkflowService
+from app.Services.progress_tracker import progress_tracker
+from app.Services.event_bus import event_bus
+from app.Services.event_hub import format_sse
+from app.Services.job_runner import job_runner
+from app.Services.metrics import sse_streams_active
+from app.Services.tracing import tracer
+from app.Services.run_leases import run_leases
+from app.config import SSE_HEARTBEAT_INTERVAL, RUN_LEASE_INTERVAL, RECOVER_INTERRUPTED_RUNS
 from app.jsonsaver import json_saver
+from app.thread_query import status_value
 from app.Schemas.workflow_schema import ThreadStatus, ThreadProgress
 import uuid
 
 router = APIRouter()
 workflow_service = WorkflowService()
 
-@router.post("/run")
-async def run_workflow(prompt: str, thread_id: str = None):
-    """Run a workflow with real-time streaming updates"""
-    if not thread_id:
-        thread_id = str(uuid.uuid4())
-    
-    # Create or get thread
-    thread = json_saver.create_thread(thread_id, prompt)
-    
-    async def generate_events() -> AsyncGenerator[str, None]:
-        try:
-            # Start workflow execution
-            async for event in workflow_service.orchestrate_workflow(prompt, thread_id):
-                # Update thread progress in real-time
-                if event.get('type') == 'progress' and event.get('progress'):
-                    progress = event['progress']
-                    json_saver.update_thread_progress(
-                        thread_id, 
-                        progress.get('completed', 0), 
-                        progress.get('total', 0), 
-                        progress.get('current_step', 'running')
-                    )
-                
-                # Update thread status
-                if event.get('node') == '__end__':
-                    json_saver.update_thread_status(thread_id, ThreadStatus.COMPLETED, 'completed')
-                elif event.get('type') == 'error':
-                    json_saver.update_thread_status(thread_id, ThreadStatus.FAILED, 'error')
-                
-                # Yield the event as JSON
-                yield f"data: {json.dumps(event)}\n\n"
-                
-        except Exception as e:
-            error_event = {
+async def execute_workflow(prompt: str, thread_id: str, resume: bool = False):
+    """Run a workflow to completion (or until paused); its events reach clients through the event hub"""
+    failed = False
+    try:
+        async for event in workflow_service.orchestrate_workflow(prompt, thread_id, resume):
+            failed = failed or event.get('type') == 'error'
+    except Exception as e:
+        # The service already reported its own failure; only report errors it did not see
+        if not failed:
+            progress_tracker.emit({
                 "type": "error",
                 "message": str(e),
                 "thread_id": thread_id
-            }
-            json_saver.update_thread_status(thread_id, ThreadStatus.FAILED, 'error')
-            yield f"data: {json.dumps(error_event)}\n\n"
-    
+            })
+    finally:
+        await run_leases.arelease(thread_id)
+
+def find_interrupted_runs(startup: bool = False) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Runs to recover (thread ID -> prompt) and the expired leases of runs that are over.
+    Reads the store, so it is called in a worker thread.
+    """
+    interrupted, stale = {}, []
+    # A run queued or executing is leased, so a run whose process is gone has an expired lease
+    for thread_id in json_saver.expired_runs():
+        thread = json_saver.get_thread_info(thread_id)
+        if thread and status_value(thread["status"]) in (ThreadStatus.RUNNING.value, ThreadStatus.PENDING.value):
+            interrupted[thread_id] = thread["name"]
+        else:
+            stale.append(thread_id)
+    if startup:
+        # Runs without a lease (e.g. imported from threads.json) are only recovered from a checkpoint;
+        # without one nothing says they ever ran, and they would start over with real model calls
+        for status in (ThreadStatus.RUNNING, ThreadStatus.PENDING):
+            cursor = None
+            while True:
+                page = json_saver.list_threads(limit=200, cursor=cursor, status=status, fields="thread_id,name")
+                for thread in page["threads"]:
+                    if thread["thread_id"] not in interrupted and json_saver.get_by_thread_id(thread["thread_id"]) is not None:
+                        interrupted[thread["thread_id"]] = thread["name"]
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+    return interrupted, stale
+
+async def recover_interrupted_runs(startup: bool = False) -> List[str]:
+    """Re-queue runs left RUNNING or still queued by a process that is gone; each continues from its last checkpoint"""
+    try:
+        interrupted, stale = await asyncio.get_running_loop().run_in_executor(None, find_interrupted_runs, startup)
+    except Exception as e:
+        # Recovery must never keep the app from starting
+        print(f"Warning: could not look up interrupted workflow runs: {e}")
+        return []
+
+    recovered = []
+    try:
+        for thread_id in stale:
+            # The run finished or was deleted, but its process died before giving up the lease
+            if not job_runner.is_active(thread_id) and await run_leases.aacquire(thread_id):
+                await run_leases.arelease(thread_id)
+        for thread_id, prompt in interrupted.items():
+            # Runs of this process, or leased by another process that is still alive, are left alone
+            if job_runner.is_active(thread_id) or not await run_leases.aacquire(thread_id) or job_runner.is_active(thread_id):
+                continue
+            progress_tracker.set_status(thread_id, ThreadStatus.RUNNING, 'recovering')
+            event_bus.open(thread_id)
+            job_runner.submit(thread_id, lambda prompt=prompt, thread_id=thread_id: execute_workflow(prompt, thread_id, resume=True))
+            recovered.append(thread_id)
+    except Exception as e:
+        print(f"Warning: could not recover interrupted workflow runs: {e}")
+    if recovered:
+        print(f"Recovered {len(recovered)} interrupted workflow runs: {', '.join(recovered)}")
+    return recovered
+
+async def maintain_run_leases(interval: float = RUN_LEASE_INTERVAL) -> None:
+    """Renew the leases of this process's runs and take over runs whose process went away"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for thread_id in list(run_leases.held):
+                # Jobs cancelled while still queued never ran, so never released their lease
+                if not job_runner.is_active(thread_id):
+                    await run_leases.arelease(thread_id)
+            for thread_id in await run_leases.arenew():
+                # Another process took the run over after this one failed to renew in time
+                print(f"Warning: lease of thread {thread_id} was taken over, stopping its local run")
+                job_runner.cancel(thread_id)
+            await apply_pause_requests()
+        except Exception as e:
+            print(f"Warning: could not renew run leases: {e}")
+        if RECOVER_INTERRUPTED_RUNS:
+            await recover_interrupted_runs()
+
+async def apply_pause_requests() -> List[str]:
+    """Pause the local runs other server processes were asked to pause"""
+    paused = [thread_id for thread_id in await run_leases.atake_pause_requests() if job_runner.is_active(thread_id)]
+    for thread_id in paused:
+        workflow_service.request_pause(thread_id)
+    return paused
+
+def event_stream(thread_id: str, last_event_id: int = 0) -> StreamingResponse:
+    """SSE response replaying the thread's events after `last_event_id`, then following it live"""
+    async def generate_events() -> AsyncGenerator[str, None]:
+        sse_streams_active.inc()
+        try:
+            async for item in event_bus.subscribe(thread_id, last_event_id, heartbeat=SSE_HEARTBEAT_INTERVAL):
+                yield format_sse(item)
+        finally:
+            sse_streams_active.dec()
+
     return StreamingResponse(
         generate_events(),
-        media_type="text/plain",
-        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"}
     )
 
+def parse_last_event_id(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an integer")
+
+@router.post("/run")
+async def run_workflow(prompt: str, thread_id: str = None):
+    """Queue a workflow run and return its thread right away; follow it via /threads/{thread_id}/events"""
+    if not thread_id:
+        thread_id = str(uuid.uuid4())
+    # Checked again after the lease: another request for the thread may have queued it meanwhile
+    if job_runner.is_active(thread_id) or not await run_leases.aacquire(thread_id) or job_runner.is_active(thread_id):
+        raise HTTPException(status_code=409, detail="A run for this thread is already queued or running")
+    
+    # Create the thread; the workflow service reports all progress through the tracker
+    workflow_type = workflow_service.detect_workflow_type(prompt)
+    progress_tracker.create(thread_id, prompt, workflow_type)
+    event_bus.open(thread_id)
+    job_runner.submit(thread_id, lambda: execute_workflow(prompt, thread_id))
+    return {
+        "thread_id": thread_id,
+        "workflow_type": workflow_type,
+        "status": ThreadStatus.PENDING,
+        "events_url": f"/api/threads/{thread_id}/events"
+    }
+
+@router.get("/jobs/stats")
+async def get_job_stats():
+    """Queue depth, wait times and worker utilization of the workflow job runner"""
+    return job_runner.stats()
+
+@router.get("/threads/{thread_id}/events")
+async def get_thread_events(thread_id: str, last_event_id: Optional[str] = Header(None)):
+    """Stream a thread's workflow events; send Last-Event-ID to resume after a disconnect"""
+    if not event_bus.has_events(thread_id):
+        thread = await json_saver.aget_thread_info(thread_id)
+        if not thread or status_value(thread["status"]) in (ThreadStatus.COMPLETED.value, ThreadStatus.FAILED.value):
+            raise HTTPException(status_code=404, detail="No events for this thread")
+        # Queued in another server process and not started yet: wait for its first event
+        event_bus.open(thread_id)
+    return event_stream(thread_id, parse_last_event_id(last_event_id))
+
+@router.get("/threads/{thread_id}/trace")
+async def get_thread_trace(thread_id: str):
+    """Span tree of the thread's workflow runs with timings (spans recorded by this server process)"""
+    if await json_saver.aget_thread_info(thread_id) is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    trace = tracer.trace(thread_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace recorded for this thread")
+    return trace
+
 @router.get("/threads")
-async def get_threads():
-    """Get all workflow threads"""
+async def get_threads(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[ThreadStatus] = None,
+    workflow_type: Optional[str] = None,
+    sort: str = Query("updated_at", pattern="^(updated_at|created_at)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma separated thread fields to return")
+):
+    """Get one page of workflow threads; pass `next_cursor` back as `cursor` for the next page"""
     try:
-        threads = json_saver.get_all_threads()
-        return {"threads": threads}
+        return await json_saver.alist_threads(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            workflow_type=workflow_type,
+            sort=sort,
+            order=order,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -71,7 +219,7 @@ async def get_threads():
 async def get_thread(thread_id: str):
     """Get specific thread information"""
     try:
-        thread = json_saver.get_thread_info(thread_id)
+        thread = await json_saver.aget_thread_info(thread_id)
         if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
         return thread
@@ -82,7 +230,8 @@ async def get_thread(thread_id: str):
 async def delete_thread(thread_id: str):
     """Delete a workflow thread"""
     try:
-        success = json_saver.delete_thread(thread_id)
+        # Read first: a thread created by another server process is not known here until read
+        success = await json_saver.aget_thread_info(thread_id) is not None and json_saver.delete_thread(thread_id)
         if not success:
             raise HTTPException(status_code=404, detail="Thread not found")
         return {"message": "Thread deleted successfully"}
@@ -91,23 +240,60 @@ async def delete_thread(thread_id: str):
 
 @router.post("/threads/{thread_id}/pause")
 async def pause_thread(thread_id: str):
-    """Pause a running workflow thread"""
+    """Pause a running workflow thread at its next step boundary"""
     try:
-        success = json_saver.update_thread_status(thread_id, ThreadStatus.PAUSED, 'paused')
-        if not success:
+        thread = await json_saver.aget_thread_info(thread_id)
+        if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
+        if status_value(thread["status"]) in (ThreadStatus.COMPLETED.value, ThreadStatus.FAILED.value):
+            raise HTTPException(status_code=409, detail="Thread has already finished")
+        if job_runner.is_active(thread_id):
+            # Steps already running finish (and are checkpointed); no further step starts
+            workflow_service.request_pause(thread_id)
+            progress_tracker.set_status(thread_id, ThreadStatus.PAUSED, 'pausing')
+            return {"message": "Thread will pause after its running steps finish"}
+        if await run_leases.arequest_pause(thread_id):
+            # Running in another server process, which takes the request when it renews its leases
+            progress_tracker.set_status(thread_id, ThreadStatus.PAUSED, 'pausing')
+            return {"message": "Thread will pause after its running steps finish"}
+        # Not running anywhere: it stays paused until resumed
+        progress_tracker.set_status(thread_id, ThreadStatus.PAUSED, 'paused')
         return {"message": "Thread paused successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/threads/{thread_id}/resume")
 async def resume_thread(thread_id: str):
-    """Resume a paused workflow thread"""
+    """Resume a paused workflow thread from its last completed step"""
     try:
-        success = json_saver.update_thread_status(thread_id, ThreadStatus.RUNNING, 'running')
-        if not success:
+        thread = await json_saver.aget_thread_info(thread_id)
+        if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
-        return {"message": "Thread resumed successfully"}
+        if job_runner.is_active(thread_id):
+            # Still finishing its running steps: just withdraw the pause request
+            if workflow_service.cancel_pause(thread_id):
+                progress_tracker.set_status(thread_id, ThreadStatus.RUNNING, 'running')
+            return {"message": "Thread resumed successfully"}
+        if status_value(thread["status"]) != ThreadStatus.PAUSED.value:
+            raise HTTPException(status_code=409, detail="Only paused threads can be resumed")
+        if await run_leases.awithdraw_pause(thread_id):
+            # Its process has not taken the pause request yet, so the run never stopped
+            progress_tracker.set_status(thread_id, ThreadStatus.RUNNING, 'running')
+            return {"message": "Thread resumed successfully"}
+        if not await run_leases.aacquire(thread_id) or job_runner.is_active(thread_id):
+            raise HTTPException(status_code=409, detail="Thread is still running in another server process")
+
+        progress_tracker.set_status(thread_id, ThreadStatus.RUNNING, 'resuming')
+        event_bus.open(thread_id)
+        job_runner.submit(thread_id, lambda: execute_workflow(thread["name"], thread_id, resume=True))
+        return {
+            "message": "Thread resumed successfully",
+            "events_url": f"/api/threads/{thread_id}/events"
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
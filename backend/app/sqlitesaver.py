@@ -0,0 +1,379 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+from .Schemas.workflow_schema import ThreadStatus, ThreadInfo
+from .thread_query import new_thread_info, status_patch, progress_patch, thread_patch, validate_listing, decode_cursor, encode_cursor, parse_fields, project_thread, status_value
+from .config import SQLITE_DB_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    workflow_type TEXT,
+    progress TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_updated_at ON threads (updated_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_threads_created_at ON threads (created_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_threads_status_updated_at ON threads (status, updated_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_threads_status_created_at ON threads (status, created_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_threads_workflow_type_updated_at ON threads (workflow_type, updated_at, thread_id);
+CREATE INDEX IF NOT EXISTS idx_threads_workflow_type_created_at ON threads (workflow_type, created_at, thread_id);
+
+CREATE TABLE IF NOT EXISTS workflow_states (
+    thread_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS run_leases (
+    thread_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_leases_expires_at ON run_leases (expires_at);
+
+CREATE TABLE IF NOT EXISTS run_pause_requests (
+    thread_id TEXT PRIMARY KEY,
+    requested_at REAL NOT NULL
+);
+"""
+
+THREAD_COLUMNS = "thread_id, name, status, workflow_type, progress, created_at, updated_at"
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def _sql_value(value: Any) -> Any:
+    """Converts datetimes and ThreadStatus values to what the thread columns store."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=_json_default)
+
+class SqliteSaver:
+    """
+    Stores workflow state and thread information in a local SQLite database.
+
+    Exposes the same methods as JsonSaver, but every mutation only writes the
+    row it touches and reads go straight to the database, so neither memory
+    nor save time grows with the number of threads. The database runs in WAL
+    mode, so readers never block the writer, and every write is a single
+    statement or transaction on the rows it changes, so several server
+    processes can share the database without losing each other's updates.
+    """
+
+    # Label of the store in the thread store metrics
+    backend = "sqlite"
+
+    def __init__(self, db_file: str = SQLITE_DB_FILE):
+        """Opens (and if needed creates) the database."""
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._connect()
+        self._import_json_files()
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # Set first: other processes may hold the database while this one switches it to WAL
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._closed = False
+
+    def _reopen_if_closed(self) -> None:
+        # The app may be started again in the same process after a shutdown closed the store (tests)
+        if self._closed:
+            self._connect()
+
+    def _import_json_files(self) -> None:
+        """One-time import of threads.json/workflows.json into an empty database."""
+        if self._conn.execute("SELECT 1 FROM threads LIMIT 1").fetchone():
+            return
+        from .jsonsaver import THREADS_FILE, STATE_FILE, JsonSaver
+        if not (os.path.exists(THREADS_FILE) or os.path.exists(STATE_FILE)):
+            return
+
+        legacy = JsonSaver.__new__(JsonSaver)
+        threads = legacy.load_threads()
+        states = legacy.load_state()
+        if not threads and not states:
+            return
+
+        with self._transaction() as conn:
+            # Checked again inside the transaction: another process may have imported them meanwhile
+            if conn.execute("SELECT 1 FROM threads LIMIT 1").fetchone():
+                return
+            conn.executemany(
+                f"INSERT OR IGNORE INTO threads ({THREAD_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._thread_row(thread) for thread in threads.values()]
+            )
+            now = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT OR IGNORE INTO workflow_states (thread_id, state, updated_at) VALUES (?, ?, ?)",
+                [(thread_id, _dumps(state), now) for thread_id, state in states.items()]
+            )
+        print(f"Imported {len(threads)} threads and {len(states)} workflow states into '{self.db_file}'")
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in one write transaction."""
+        with self._lock:
+            self._reopen_if_closed()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            self._reopen_if_closed()
+            return self._conn.execute(sql, params)
+
+    @staticmethod
+    def _thread_row(thread: ThreadInfo) -> tuple:
+        return (
+            thread["thread_id"],
+            thread["name"],
+            _sql_value(thread["status"]),
+            thread.get("workflow_type"),
+            _dumps(thread["progress"]),
+            _json_default(thread["created_at"]),
+            _json_default(thread["updated_at"]),
+        )
+
+    @staticmethod
+    def _row_to_thread(row: sqlite3.Row) -> ThreadInfo:
+        """Converts a (possibly partial) thread row back into a ThreadInfo dict."""
+        thread = dict(row)
+        if "progress" in thread:
+            progress = json.loads(thread["progress"])
+            for key in ("start_time", "last_updated"):
+                if isinstance(progress.get(key), str):
+                    progress[key] = datetime.fromisoformat(progress[key])
+            thread["progress"] = progress
+        for key in ("created_at", "updated_at"):
+            if key in thread:
+                thread[key] = datetime.fromisoformat(thread[key])
+        return thread
+
+    @staticmethod
+    def _update_statement(thread_id: str, fields: Dict[str, Any], progress: Dict[str, Any]) -> tuple:
+        """Builds the UPDATE merging top-level fields and progress keys into a single thread row."""
+        assignments = [f"{column} = ?" for column in fields]
+        params = [_sql_value(value) for value in fields.values()]
+        assignments.append("progress = json_patch(progress, ?)")
+        params.append(_dumps(progress))
+        params.append(thread_id)
+        return f"UPDATE threads SET {', '.join(assignments)} WHERE thread_id = ?", tuple(params)
+
+    def _update_thread(self, thread_id: str, fields: Dict[str, Any], progress: Dict[str, Any]) -> bool:
+        return self._execute(*self._update_statement(thread_id, fields, progress)).rowcount > 0
+
+    def apply_thread_changes(self, changes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Applies a batch of coalesced thread changes in one transaction.
+
+        Each change is {"deleted": bool, "thread": full ThreadInfo or None,
+        "fields": {...}, "progress": {...}}, applied in that order, as queued
+        by WriteBehindSaver.
+        """
+        with self._transaction() as conn:
+            for thread_id, change in changes.items():
+                if change.get("deleted"):
+                    conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+                    conn.execute("DELETE FROM workflow_states WHERE thread_id = ?", (thread_id,))
+                if change.get("thread"):
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO threads ({THREAD_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        self._thread_row(change["thread"])
+                    )
+                if change.get("fields") or change.get("progress"):
+                    conn.execute(*self._update_statement(thread_id, change.get("fields", {}), change.get("progress", {})))
+
+    def put_states(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Saves several workflow states in one transaction."""
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO workflow_states (thread_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                [(thread_id, _dumps(state), now) for thread_id, state in states.items()]
+            )
+
+    def get_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieves a specific workflow state by its thread ID."""
+        row = self._execute("SELECT state FROM workflow_states WHERE thread_id = ?", (thread_id,)).fetchone()
+        return json.loads(row["state"]) if row else None
+
+    def put_by_thread_id(self, thread_id: str, state: Dict[str, Any]) -> None:
+        """Saves a new or updated workflow state for a given thread ID."""
+        self._execute(
+            "INSERT INTO workflow_states (thread_id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (thread_id, _dumps(state), datetime.now().isoformat())
+        )
+        print(f"Workflow state saved for thread ID: {thread_id}")
+
+    def create_thread(self, thread_id: str, name: str, workflow_type: str) -> ThreadInfo:
+        """Creates a new thread with initial progress tracking."""
+        thread_info = new_thread_info(thread_id, name, workflow_type)
+        self._execute(
+            f"INSERT OR REPLACE INTO threads ({THREAD_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._thread_row(thread_info)
+        )
+        print(f"New thread created: {thread_id}")
+        return thread_info
+
+    def update_thread_status(self, thread_id: str, status: ThreadStatus, current_step: str = None, error_message: str = None) -> bool:
+        """Updates the status and progress of a thread."""
+        updated = self._update_thread(thread_id, *status_patch(status, current_step, error_message))
+        if updated:
+            print(f"Thread {thread_id} status updated to: {status}")
+        return updated
+
+    def update_thread_progress(self, thread_id: str, completed_steps: int, total_steps: int, current_step: str) -> bool:
+        """Updates the progress of a thread."""
+        return self._update_thread(thread_id, *progress_patch(completed_steps, total_steps, current_step))
+
+    def update_thread(self, thread_id: str, **changes: Any) -> bool:
+        """Applies a combined status/progress update (see thread_patch) as one row update."""
+        return self._update_thread(thread_id, *thread_patch(**changes))
+
+    def get_all_threads(self) -> List[ThreadInfo]:
+        """Retrieves all threads, most recently updated first."""
+        rows = self._execute(f"SELECT {THREAD_COLUMNS} FROM threads ORDER BY updated_at DESC").fetchall()
+        return [self._row_to_thread(row) for row in rows]
+
+    def list_threads(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                     workflow_type: Optional[str] = None, sort: str = "updated_at", order: str = "desc",
+                     fields: Optional[str] = None) -> Dict[str, Any]:
+        """Retrieves one page of threads using keyset pagination over the composite indexes."""
+        validate_listing(sort, order, limit)
+        projection = parse_fields(fields)
+        columns = THREAD_COLUMNS if projection is None else ", ".join(dict.fromkeys(projection + [sort]))
+
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status_value(status))
+        if workflow_type:
+            conditions.append("workflow_type = ?")
+            params.append(workflow_type)
+        if cursor:
+            conditions.append(f"({sort}, thread_id) {'<' if order == 'desc' else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor, sort, order))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = order.upper()
+
+        # Fetch one extra row to know whether another page follows.
+        rows = self._execute(
+            f"SELECT {columns} FROM threads {where} ORDER BY {sort} {direction}, thread_id {direction} LIMIT ?",
+            tuple(params) + (limit + 1,)
+        ).fetchall()
+
+        threads = [project_thread(self._row_to_thread(row), projection) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(sort, order, last[sort], last["thread_id"])
+        return {"threads": threads, "next_cursor": next_cursor}
+
+    def get_thread_info(self, thread_id: str) -> Optional[ThreadInfo]:
+        """Retrieves thread information by ID."""
+        row = self._execute(f"SELECT {THREAD_COLUMNS} FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return self._row_to_thread(row) if row else None
+
+    def has_thread(self, thread_id: str) -> bool:
+        """Whether a thread exists."""
+        return self._execute("SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)).fetchone() is not None
+
+    def thread_ids(self) -> List[str]:
+        """Ids of all threads."""
+        return [row[0] for row in self._execute("SELECT thread_id FROM threads").fetchall()]
+
+    def delete_thread(self, thread_id: str) -> bool:
+        """Deletes a thread and its associated state."""
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,)).rowcount > 0
+            if deleted:
+                conn.execute("DELETE FROM workflow_states WHERE thread_id = ?", (thread_id,))
+        if deleted:
+            print(f"Thread {thread_id} deleted")
+        return deleted
+
+    # --- Run leases ---
+
+    def claim_run(self, thread_id: str, owner: str, ttl: float) -> bool:
+        """Leases a run to `owner` for `ttl` seconds, unless another owner holds an unexpired lease."""
+        now = time.time()
+        return self._execute(
+            "INSERT INTO run_leases (thread_id, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE run_leases.owner = excluded.owner OR run_leases.expires_at <= ?",
+            (thread_id, owner, now + ttl, now)
+        ).rowcount > 0
+
+    def renew_runs(self, thread_ids: List[str], owner: str, ttl: float) -> List[str]:
+        """Extends the leases `owner` still holds; returns the runs it holds."""
+        return [thread_id for thread_id in thread_ids if self.claim_run(thread_id, owner, ttl)]
+
+    def release_run(self, thread_id: str, owner: str) -> None:
+        """Gives up the lease of a run, if `owner` holds it, with any pause request of the run."""
+        with self._transaction() as conn:
+            if conn.execute("DELETE FROM run_leases WHERE thread_id = ? AND owner = ?", (thread_id, owner)).rowcount:
+                conn.execute("DELETE FROM run_pause_requests WHERE thread_id = ?", (thread_id,))
+
+    def expired_runs(self) -> List[str]:
+        """Runs whose lease was not renewed in time: their process is gone."""
+        return [row[0] for row in self._execute(
+            "SELECT thread_id FROM run_leases WHERE expires_at <= ?", (time.time(),)
+        ).fetchall()]
+
+    def request_run_pause(self, thread_id: str, requester: str) -> bool:
+        """Asks the process holding a run to pause it; False unless another live process holds the run."""
+        now = time.time()
+        with self._transaction() as conn:
+            held = conn.execute(
+                "SELECT 1 FROM run_leases WHERE thread_id = ? AND owner != ? AND expires_at > ?",
+                (thread_id, requester, now)
+            ).fetchone() is not None
+            if held:
+                conn.execute("INSERT OR REPLACE INTO run_pause_requests (thread_id, requested_at) VALUES (?, ?)",
+                             (thread_id, now))
+        return held
+
+    def withdraw_run_pause(self, thread_id: str) -> bool:
+        """Withdraws a pause request the process holding the run has not taken yet."""
+        return self._execute("DELETE FROM run_pause_requests WHERE thread_id = ?", (thread_id,)).rowcount > 0
+
+    def take_run_pauses(self, owner: str) -> List[str]:
+        """Returns (and clears) the pause requests of the runs `owner` holds."""
+        with self._transaction() as conn:
+            thread_ids = [row[0] for row in conn.execute(
+                "SELECT p.thread_id FROM run_pause_requests p JOIN run_leases l ON l.thread_id = p.thread_id "
+                "WHERE l.owner = ?", (owner,)
+            ).fetchall()]
+            conn.executemany("DELETE FROM run_pause_requests WHERE thread_id = ?", [(t,) for t in thread_ids])
+        return thread_ids
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+            self._closed = True
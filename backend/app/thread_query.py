@@ -0,0 +1,173 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from .Schemas.workflow_schema import ThreadStatus, ThreadInfo
+
+# Fields a thread listing can be projected onto and the keys it can be sorted by
+THREAD_FIELDS = ("thread_id", "name", "status", "workflow_type", "progress", "created_at", "updated_at")
+SORT_KEYS = ("updated_at", "created_at")
+
+def new_thread_info(thread_id: str, name: str, workflow_type: str) -> ThreadInfo:
+    """Builds a freshly created, pending thread."""
+    now = datetime.now()
+    return {
+        "thread_id": thread_id,
+        "name": name,
+        "status": ThreadStatus.PENDING,
+        "workflow_type": workflow_type,
+        "progress": {
+            "thread_id": thread_id,
+            "status": ThreadStatus.PENDING,
+            "current_step": "initializing",
+            "total_steps": 0,
+            "completed_steps": 0,
+            "start_time": now,
+            "last_updated": now,
+            "error_message": None
+        },
+        "created_at": now,
+        "updated_at": now
+    }
+
+def status_patch(status: ThreadStatus, current_step: str = None, error_message: str = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Returns the (thread fields, progress fields) a status update changes."""
+    now = datetime.now()
+    progress = {"status": status, "last_updated": now}
+    if current_step:
+        progress["current_step"] = current_step
+    if error_message:
+        progress["error_message"] = error_message
+    return {"status": status, "updated_at": now}, progress
+
+def progress_patch(completed_steps: int, total_steps: int, current_step: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Returns the (thread fields, progress fields) a progress update changes."""
+    now = datetime.now()
+    progress = {
+        "completed_steps": completed_steps,
+        "total_steps": total_steps,
+        "current_step": current_step,
+        "last_updated": now
+    }
+    return {"updated_at": now}, progress
+
+def thread_patch(status: ThreadStatus = None, completed_steps: int = None, total_steps: int = None,
+                 current_step: str = None, error_message: str = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Returns the (thread fields, progress fields) for a combined status and progress update."""
+    now = datetime.now()
+    fields: Dict[str, Any] = {"updated_at": now}
+    progress: Dict[str, Any] = {"last_updated": now}
+    if status is not None:
+        fields["status"] = status
+        progress["status"] = status
+    for key, value in (("completed_steps", completed_steps), ("total_steps", total_steps),
+                       ("current_step", current_step), ("error_message", error_message)):
+        if value is not None:
+            progress[key] = value
+    return fields, progress
+
+def sort_value(value: Any) -> str:
+    """Normalizes a timestamp to the ISO string both stores sort on."""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def status_value(status: Any) -> Optional[str]:
+    """Normalizes a ThreadStatus (or its string value) to the plain string."""
+    return None if status is None else str(getattr(status, "value", status))
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parses a comma separated `fields=` projection. thread_id is always included."""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in THREAD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown thread fields: {', '.join(unknown)}")
+    return ["thread_id"] + [field for field in requested if field != "thread_id"]
+
+def project_thread(thread: ThreadInfo, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Returns only the requested fields of a thread."""
+    if fields is None:
+        return thread
+    return {field: thread.get(field) for field in fields}
+
+def encode_cursor(sort: str, order: str, value: str, thread_id: str) -> str:
+    """Builds the opaque cursor pointing just after (value, thread_id)."""
+    raw = json.dumps([sort, order, value, thread_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[str, str]:
+    """Returns the (value, thread_id) position of a cursor issued for the same sort and order."""
+    try:
+        cursor_sort, cursor_order, value, thread_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Cursor was issued for a different sort order")
+    return value, thread_id
+
+def validate_listing(sort: str, order: str, limit: int) -> None:
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Cannot sort threads by '{sort}'")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown sort order '{order}'")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+class ThreadIndex:
+    """
+    In-memory secondary indexes over the threads of a JsonSaver.
+
+    For every sort key the index keeps a sorted list of (timestamp, thread_id)
+    per filter combination (none, status, workflow_type, both), so a listing
+    page is a bisect plus a slice and never scans the whole thread map.
+    """
+
+    def __init__(self):
+        self._lists: Dict[Tuple[str, Optional[str], Optional[str]], List[Tuple[str, str]]] = {}
+        self._entries: Dict[str, Dict[str, Optional[str]]] = {}
+
+    @staticmethod
+    def _groups(status: Optional[str], workflow_type: Optional[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+        return list(dict.fromkeys([(None, None), (status, None), (None, workflow_type), (status, workflow_type)]))
+
+    def add(self, thread: ThreadInfo) -> None:
+        """Indexes a thread, replacing any previous entry for it."""
+        thread_id = thread["thread_id"]
+        self.remove(thread_id)
+        entry = {
+            "status": status_value(thread.get("status")),
+            "workflow_type": thread.get("workflow_type"),
+        }
+        for key in SORT_KEYS:
+            entry[key] = sort_value(thread.get(key))
+        self._entries[thread_id] = entry
+
+        for key in SORT_KEYS:
+            for status, workflow_type in self._groups(entry["status"], entry["workflow_type"]):
+                insort(self._lists.setdefault((key, status, workflow_type), []), (entry[key], thread_id))
+
+    def remove(self, thread_id: str) -> None:
+        """Drops a thread from every index list."""
+        entry = self._entries.pop(thread_id, None)
+        if entry is None:
+            return
+        for key in SORT_KEYS:
+            item = (entry[key], thread_id)
+            for status, workflow_type in self._groups(entry["status"], entry["workflow_type"]):
+                items = self._lists.get((key, status, workflow_type))
+                if not items:
+                    continue
+                position = bisect_left(items, item)
+                if position < len(items) and items[position] == item:
+                    del items[position]
+
+    def page(self, sort: str, order: str, limit: int, after: Optional[Tuple[str, str]] = None,
+             status: Optional[str] = None, workflow_type: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Returns up to `limit` (timestamp, thread_id) pairs following the `after` position."""
+        items = self._lists.get((sort, status, workflow_type), [])
+        if order == "desc":
+            end = bisect_left(items, tuple(after)) if after else len(items)
+            return items[max(0, end - limit):end][::-1]
+        start = bisect_right(items, tuple(after)) if after else 0
+        return items[start:start + limit]
@@ -0,0 +1,393 @@
+import asyncio
+import copy
+import functools
+import threading
+import time
+from typing import Callable, Optional, Dict, Any, List, Set
+from .Schemas.workflow_schema import ThreadStatus, ThreadInfo
+from .Services.metrics import errors_total, store_write_duration
+from .Services.tracing import tracer
+from .thread_query import new_thread_info, status_patch, progress_patch, thread_patch, parse_fields, project_thread, status_value
+
+def _empty_change() -> Dict[str, Any]:
+    return {"thread": None, "fields": {}, "progress": {}, "deleted": False}
+
+def _combine(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Folds two queued changes of the same thread into one, the newer one winning."""
+    if newer["deleted"]:
+        return newer
+    if newer["thread"]:
+        # Re-created after a queued delete: the delete still has to reach the store.
+        return {**newer, "deleted": older["deleted"]}
+    combined = _empty_change()
+    combined["deleted"] = older["deleted"]
+    if older["thread"]:
+        thread = copy.deepcopy(older["thread"])
+        thread.update(newer["fields"])
+        thread["progress"].update(newer["progress"])
+        combined["thread"] = thread
+    else:
+        combined["fields"] = {**older["fields"], **newer["fields"]}
+        combined["progress"] = {**older["progress"], **newer["progress"]}
+    return combined
+
+def _overlay(thread: Optional[ThreadInfo], change: Dict[str, Any]) -> Optional[ThreadInfo]:
+    """Returns the thread as it will look once a queued change is written."""
+    if change["thread"]:
+        thread = change["thread"]
+    elif change["deleted"]:
+        return None
+    if thread is None:
+        return None
+    # Listed threads may be projected down to a few fields, progress included
+    thread = {**thread, "progress": dict(thread.get("progress") or {})}
+    thread.update(change["fields"])
+    thread["progress"].update(change["progress"])
+    return thread
+
+class WriteBehindSaver:
+    """
+    Wraps a thread store so that thread mutations never block the event loop.
+
+    Mutations are applied to an in-memory queue right away and reads see
+    them immediately. Once started, a single background task coalesces the
+    queued changes per thread and writes them to the underlying store in a
+    worker thread at most every `flush_interval` seconds. Until `start()` is
+    called (e.g. in scripts) every mutation is written through synchronously.
+
+    Given `open_store` instead of a store, the store is opened on first use, so
+    importing the app does not read the thread files or open the database.
+
+    Mutations check that their thread exists against the queued changes and
+    the ids of the stored threads, loaded once when the store is opened, so
+    they never read the store. A thread created by another process becomes
+    known once it is read; async callers read through `aget_thread_info` and
+    `alist_threads`, which run the store read in a worker thread.
+    """
+
+    def __init__(self, store=None, flush_interval: float = 0.0, open_store: Optional[Callable[[], Any]] = None):
+        if (store is None) == (open_store is None):
+            raise ValueError("WriteBehindSaver needs either a store or an open_store factory")
+        self._store = store
+        self._open_store = open_store
+        self._open_lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_states: Dict[str, Dict[str, Any]] = {}
+        # Changes taken by a running flush, still visible to reads until written
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._inflight_states: Dict[str, Dict[str, Any]] = {}
+        # Ids of the stored threads (plus queued creations), known once the store is opened
+        self._thread_ids: Set[str] = set()
+        self._thread_ids_loaded = False
+        if store is not None:
+            self._load_thread_ids(store)
+        self._task: Optional[asyncio.Task] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def store(self):
+        """The underlying store, opened on first use."""
+        if self._store is None:
+            with self._open_lock:
+                if self._store is None:
+                    store = self._open_store()
+                    self._load_thread_ids(store)
+                    self._store = store
+        return self._store
+
+    def _load_thread_ids(self, store) -> None:
+        # Nothing has been written yet, so ids added or removed before the store
+        # was opened are settled again when their queued change is written.
+        ids = set(store.thread_ids())
+        with self._lock:
+            self._thread_ids |= ids
+            self._thread_ids_loaded = True
+
+    def _remember(self, thread_id: str, exists: bool) -> None:
+        with self._lock:
+            if exists:
+                self._thread_ids.add(thread_id)
+            else:
+                self._thread_ids.discard(thread_id)
+
+    # --- Background writer ---
+
+    def start(self) -> None:
+        """Starts the background writer on the running event loop."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._dirty = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            if self._pending or self._pending_states:
+                self._dirty.set()
+            # Open the store (and load the thread ids) before the first request needs them
+            self._loop.run_in_executor(None, lambda: self.store)
+
+    async def _run(self) -> None:
+        while True:
+            await self._dirty.wait()
+            # Give concurrent mutations a moment to pile up so they share one write.
+            await asyncio.sleep(self.flush_interval)
+            self._dirty.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Writes every queued change to the store in a worker thread."""
+        if self._pending or self._pending_states:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush_sync)
+
+    def flush_sync(self) -> None:
+        """Writes every queued change to the store on the calling thread."""
+        with self._write_lock:
+            with self._lock:
+                changes, self._pending = self._pending, {}
+                states, self._pending_states = self._pending_states, {}
+                self._inflight, self._inflight_states = changes, states
+            if changes or states:
+                self._write(changes, states)
+            with self._lock:
+                self._inflight, self._inflight_states = {}, {}
+
+    async def aclose(self) -> None:
+        """Stops the background writer, flushes what is left and closes the store."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self.close()
+
+    def close(self) -> None:
+        self.flush_sync()
+        # A store that was never opened has nothing to close
+        if self._store is not None and hasattr(self._store, "close"):
+            self._store.close()
+
+    def _trace_write(self, changes: Dict[str, Dict[str, Any]], states: Dict[str, Dict[str, Any]], start_ns: int,
+                     error: Optional[Exception] = None) -> None:
+        """Records the write in the trace of every thread it carried changes for, under its running workflow run."""
+        if not tracer.enabled:
+            return
+        end_ns = time.time_ns()
+        attributes = {"store.backend": type(self.store).__name__, "store.threads": len(changes), "store.states": len(states)}
+        for thread_id in {*changes, *states}:
+            tracer.record_span("store.write", start_ns, end_ns, attributes, parent=tracer.run_span(thread_id),
+                               thread_id=thread_id, error=error)
+
+    def _write(self, changes: Dict[str, Dict[str, Any]], states: Dict[str, Dict[str, Any]]) -> None:
+        start_ns = time.time_ns()
+        try:
+            with store_write_duration.time(backend=getattr(self.store, "backend", type(self.store).__name__)):
+                if changes:
+                    self.store.apply_thread_changes(changes)
+                if states:
+                    self.store.put_states(states)
+            for thread_id, change in changes.items():
+                if change["thread"] or change["deleted"]:
+                    self._remember(thread_id, change["thread"] is not None)
+            self._trace_write(changes, states, start_ns)
+        except Exception as e:
+            errors_total.inc(component="store")
+            self._trace_write(changes, states, start_ns, e)
+            # Put the batch back underneath anything queued since, for the next flush.
+            print(f"Warning: failed to write {len(changes)} thread changes, will retry: {e}")
+            with self._lock:
+                for thread_id, change in changes.items():
+                    newer = self._pending.get(thread_id)
+                    self._pending[thread_id] = _combine(change, newer) if newer else change
+                for thread_id, state in states.items():
+                    self._pending_states.setdefault(thread_id, state)
+            if self._task is not None:
+                self._loop.call_soon_threadsafe(self._dirty.set)
+
+    def _mark_dirty(self) -> None:
+        if self._task is None:
+            self.flush_sync()
+        else:
+            self._loop.call_soon_threadsafe(self._dirty.set)
+
+    def _queue(self, thread_id: str, change: Dict[str, Any]) -> None:
+        with self._lock:
+            older = self._pending.get(thread_id)
+            self._pending[thread_id] = _combine(older, change) if older else change
+        self._mark_dirty()
+
+    # --- Reads see queued changes ---
+
+    def _queued_changes(self, thread_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [layer[thread_id] for layer in (self._inflight, self._pending) if thread_id in layer]
+
+    def _with_queued(self, thread_id: str, thread: Optional[ThreadInfo]) -> Optional[ThreadInfo]:
+        for change in self._queued_changes(thread_id):
+            thread = _overlay(thread, change)
+        return thread
+
+    def has_thread(self, thread_id: str) -> bool:
+        """Whether a thread exists, decided without reading the store."""
+        for change in reversed(self._queued_changes(thread_id)):
+            if change["thread"]:
+                return True
+            if change["deleted"]:
+                return False
+        if not self._thread_ids_loaded:
+            self.store  # opening the store loads the ids
+        with self._lock:
+            return thread_id in self._thread_ids
+
+    def get_thread_info(self, thread_id: str) -> Optional[ThreadInfo]:
+        """Retrieves thread information by ID."""
+        changes = self._queued_changes(thread_id)
+        if changes and (changes[-1]["deleted"] or changes[-1]["thread"]):
+            return _overlay(None, changes[-1])
+        thread = self.store.get_thread_info(thread_id)
+        if not changes:
+            self._remember(thread_id, thread is not None)
+        return self._with_queued(thread_id, thread)
+
+    def get_all_threads(self) -> List[ThreadInfo]:
+        """Retrieves all threads."""
+        with self._lock:
+            queued_ids = list(dict.fromkeys([*self._inflight, *self._pending]))
+        threads = {thread["thread_id"]: thread for thread in self.store.get_all_threads()}
+        with self._lock:
+            self._thread_ids.update(threads)
+        for thread_id in queued_ids:
+            thread = self._with_queued(thread_id, threads.get(thread_id))
+            if thread is None:
+                threads.pop(thread_id, None)
+            else:
+                threads[thread_id] = thread
+        return list(threads.values())
+
+    def list_threads(self, **kwargs) -> Dict[str, Any]:
+        """
+        Retrieves one page of threads from the store.
+
+        Queued changes to the threads on the page are overlaid; membership and
+        ordering of the page reflect the store, which lags by at most one flush.
+        """
+        page = self.store.list_threads(**kwargs)
+        projection = parse_fields(kwargs.get("fields"))
+        threads = []
+        for thread in page["threads"]:
+            thread_id = thread.get("thread_id")
+            changes = self._queued_changes(thread_id) if thread_id else []
+            if not changes:
+                threads.append(thread)
+                if thread_id:
+                    self._remember(thread_id, True)
+                continue
+            overlaid = self._with_queued(thread_id, thread)
+            if overlaid is not None:
+                threads.append(project_thread(overlaid, projection))
+        return {**page, "threads": threads}
+
+    def get_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieves a specific workflow state by its thread ID."""
+        with self._lock:
+            for layer in (self._pending_states, self._inflight_states):
+                if thread_id in layer:
+                    return layer[thread_id]
+        return self.store.get_by_thread_id(thread_id)
+
+    # --- Reads from the event loop run in a worker thread ---
+
+    async def _read(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
+
+    async def aget_thread_info(self, thread_id: str) -> Optional[ThreadInfo]:
+        return await self._read(self.get_thread_info, thread_id)
+
+    async def alist_threads(self, **kwargs: Any) -> Dict[str, Any]:
+        return await self._read(self.list_threads, **kwargs)
+
+    # --- Mutations are queued ---
+
+    def put_by_thread_id(self, thread_id: str, state: Dict[str, Any]) -> None:
+        """Saves a new or updated workflow state for a given thread ID."""
+        with self._lock:
+            self._pending_states[thread_id] = state
+        self._mark_dirty()
+
+    def create_thread(self, thread_id: str, name: str, workflow_type: str) -> ThreadInfo:
+        """Creates a new thread with initial progress tracking."""
+        thread_info = new_thread_info(thread_id, name, workflow_type)
+        change = _empty_change()
+        change["thread"] = copy.deepcopy(thread_info)
+        self._remember(thread_id, True)
+        self._queue(thread_id, change)
+        print(f"New thread created: {thread_id}")
+        return thread_info
+
+    def update_thread_status(self, thread_id: str, status: ThreadStatus, current_step: str = None, error_message: str = None) -> bool:
+        """Updates the status and progress of a thread."""
+        if not self.has_thread(thread_id):
+            return False
+        change = _empty_change()
+        change["fields"], change["progress"] = status_patch(status, current_step, error_message)
+        self._queue(thread_id, change)
+        print(f"Thread {thread_id} status updated to: {status_value(status)}")
+        return True
+
+    def update_thread_progress(self, thread_id: str, completed_steps: int, total_steps: int, current_step: str) -> bool:
+        """Updates the progress of a thread."""
+        if not self.has_thread(thread_id):
+            return False
+        change = _empty_change()
+        change["fields"], change["progress"] = progress_patch(completed_steps, total_steps, current_step)
+        self._queue(thread_id, change)
+        return True
+
+    def update_thread(self, thread_id: str, **changes: Any) -> bool:
+        """Applies a combined status/progress update (see thread_patch) as one change."""
+        if not self.has_thread(thread_id):
+            return False
+        change = _empty_change()
+        change["fields"], change["progress"] = thread_patch(**changes)
+        self._queue(thread_id, change)
+        return True
+
+    def delete_thread(self, thread_id: str) -> bool:
+        """Deletes a thread and its associated state."""
+        if not self.has_thread(thread_id):
+            return False
+        change = _empty_change()
+        change["deleted"] = True
+        with self._lock:
+            self._pending_states.pop(thread_id, None)
+            self._thread_ids.discard(thread_id)
+        self._queue(thread_id, change)
+        print(f"Thread {thread_id} deleted")
+        return True
+
+    # --- Run leases are written through ---
+
+    def claim_run(self, thread_id: str, owner: str, ttl: float) -> bool:
+        """Leases a run to `owner`; decided by the store, so it holds across processes."""
+        return self.store.claim_run(thread_id, owner, ttl)
+
+    def renew_runs(self, thread_ids: List[str], owner: str, ttl: float) -> List[str]:
+        return self.store.renew_runs(thread_ids, owner, ttl)
+
+    def release_run(self, thread_id: str, owner: str) -> None:
+        self.store.release_run(thread_id, owner)
+
+    def expired_runs(self) -> List[str]:
+        return self.store.expired_runs()
+
+    def request_run_pause(self, thread_id: str, requester: str) -> bool:
+        return self.store.request_run_pause(thread_id, requester)
+
+    def withdraw_run_pause(self, thread_id: str) -> bool:
+        return self.store.withdraw_run_pause(thread_id)
+
+    def take_run_pauses(self, owner: str) -> List[str]:
+        return self.store.take_run_pauses(owner)
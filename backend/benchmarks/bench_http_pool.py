@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark of outbound HTTP calls with and without the shared connection pool.
+Starts a local stub of the image API and times the same calls made with a new
+aiohttp session per call (the old call_image_api behaviour) and through the
+pooled HttpClientManager, sequentially and concurrently.
+Run this from the backend directory: python benchmarks/bench_http_pool.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.Services.http_client import HttpClientManager
+
+PAYLOAD = {"contents": [{"parts": [{"text": "benchmark prompt"}]}]}
+
+async def start_stub_server(delay: float) -> web.AppRunner:
+    """Serves a canned image API response on 127.0.0.1 after `delay` seconds."""
+    async def generate(request: web.Request) -> web.Response:
+        await request.read()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({"candidates": [{"content": {"parts": [{"inlineData": {"data": "AAAA"}}]}}]})
+
+    app = web.Application()
+    app.router.add_post("/generate", generate)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+async def call_fresh_session(url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=json.dumps(PAYLOAD)) as response:
+            response.raise_for_status()
+            await response.json()
+
+def pooled_caller(manager: HttpClientManager):
+    async def call(url: str) -> None:
+        async with manager.session().post(url, data=json.dumps(PAYLOAD)) as response:
+            response.raise_for_status()
+            await response.json()
+    return call
+
+async def measure(call, url: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call(url)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "total_s": round(total, 4),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+    }
+
+async def main(requests: int, concurrency: int, delay: float) -> dict:
+    runner = await start_stub_server(delay)
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/generate"
+    manager = HttpClientManager()
+    results = {}
+    try:
+        for level in sorted({1, concurrency}):
+            results[f"fresh_session_c{level}"] = await measure(call_fresh_session, url, requests, level)
+            results[f"pooled_c{level}"] = await measure(pooled_caller(manager), url, requests, level)
+    finally:
+        await manager.aclose()
+        await runner.cleanup()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent calls in the concurrent scenarios")
+    parser.add_argument("--delay", type=float, default=0.0, help="server-side processing time per call (seconds)")
+    args = parser.parse_args()
+
+    print("🏁 HTTP connection pool benchmark (local stub, plain HTTP; TLS handshakes make the gap larger)")
+    for name, result in asyncio.run(main(args.requests, args.concurrency, args.delay)).items():
+        print(f"{name:>20}: mean {result['mean_ms']:>8} ms  p50 {result['p50_ms']:>8} ms  "
+              f"p95 {result['p95_ms']:>8} ms  total {result['total_s']} s")
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Load test of the orchestrator and the thread store, with machine-readable results.
+Serves the app in-process (uvicorn on a local port, synthetic agent backend, data
+in a temporary directory) and measures:
+- workflow runs: N concurrent POST /api/run calls, each followed on its event
+  stream: events/sec and the latency of step events from emit to client
+- the thread store: write latency as it grows (1k, 10k and 100k threads by default)
+- GET /api/threads response time at each of those sizes
+Results are printed and, with --output, written as JSON. --compare prints the
+change against an earlier result file (e.g. from another commit) and, with
+--max-regression, fails when a metric got worse by more than that fraction.
+Run this from the backend directory: python benchmarks/bench_orchestrator.py
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+import aiohttp
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+PROMPTS = [
+    "Create a LinkedIn post about artificial intelligence",
+    "Make a video about climate change for YouTube",
+    "Create a social media campaign for a coffee brand",
+]
+STEP_EVENTS = ("progress", "step_start", "step_complete")
+TERMINAL_EVENTS = ("workflow_complete", "workflow_paused", "error")
+# Latency changes smaller than this never count as a regression
+NOISE_FLOOR_MS = 1.0
+
+def log(message: str) -> None:
+    # The app prints a line per thread change; progress goes to stderr, app output to /dev/null
+    print(message, file=sys.stderr, flush=True)
+
+def percentiles(values: List[float], scale: float = 1000.0) -> Dict[str, Any]:
+    """p50/p99/max of `values` (seconds) in milliseconds."""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return {
+        "count": len(values),
+        "p50_ms": round(pick(0.50) * scale, 3),
+        "p99_ms": round(pick(0.99) * scale, 3),
+        "max_ms": round(values[-1] * scale, 3),
+    }
+
+def configure_environment(args: argparse.Namespace, directory: str) -> None:
+    """Settings of the app under test; must run before the app is imported (config reads them at import)."""
+    os.environ.update({
+        "AGENT_BACKEND": "synthetic",
+        "LATENCY_MODE": "fixed",
+        "LATENCY_SCALE": str(args.latency_scale),
+        "THREAD_STORE_BACKEND": args.store,
+        "THREADS_STORAGE_MODE": args.json_mode,
+        "SQLITE_DB_FILE": os.path.join(directory, "orchestro.db"),
+        "WORKFLOW_WORKERS": str(args.workers or max(4, args.runs)),
+        "EVENT_HUB_MAX_THREADS": str(max(1000, args.runs)),
+        "RECOVER_INTERRUPTED_RUNS": "false",
+        "PREWARM_MODEL_CLIENTS": "false",
+    })
+    # The JSON store, blobs and event files live in the working directory
+    os.chdir(directory)
+
+async def serve(app) -> tuple:
+    """Starts uvicorn for `app` on a free local port in this event loop."""
+    import uvicorn
+    # IPPROTO_TCP: asyncio only sets TCP_NODELAY on connections of such sockets (else keep-alive requests stall ~40 ms)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="on"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server, task, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+async def read_sse(response: aiohttp.ClientResponse) -> AsyncIterator[Dict[str, Any]]:
+    """Parsed `data:` payloads of a text/event-stream response."""
+    data = []
+    async for raw in response.content:
+        line = raw.decode().rstrip("\r\n")
+        if line.startswith("data: "):
+            data.append(line[6:])
+        elif not line and data:
+            yield json.loads("\n".join(data))
+            data = []
+
+# --- Workflow runs ---
+
+async def bench_runs(base_url: str, runs: int) -> Dict[str, Any]:
+    """Starts `runs` workflows at once and follows every one of them to its end."""
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        async def one(index: int) -> Dict[str, Any]:
+            start = time.perf_counter()
+            async with session.post(f"{base_url}/api/run", params={"prompt": PROMPTS[index % len(PROMPTS)]}) as response:
+                response.raise_for_status()
+                run = await response.json()
+            events, latencies, outcome = 0, [], None
+            async with session.get(base_url + run["events_url"]) as response:
+                async for event in read_sse(response):
+                    events += 1
+                    if event.get("type") in STEP_EVENTS and event.get("timestamp"):
+                        latencies.append(time.time() - event["timestamp"])
+                    if event.get("type") in TERMINAL_EVENTS:
+                        outcome = event["type"]
+                        break
+            return {"events": events, "latencies": latencies, "duration": time.perf_counter() - start, "outcome": outcome}
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(index) for index in range(runs)))
+        wall = time.perf_counter() - start
+
+    events = sum(result["events"] for result in results)
+    return {
+        "runs": runs,
+        "completed": sum(1 for result in results if result["outcome"] == "workflow_complete"),
+        "wall_s": round(wall, 3),
+        "events": events,
+        "events_per_sec": round(events / wall, 1),
+        "runs_per_sec": round(runs / wall, 2),
+        "step_event_latency": percentiles([latency for result in results for latency in result["latencies"]]),
+        "run_duration": percentiles([result["duration"] for result in results]),
+    }
+
+# --- Thread store growth ---
+
+def grow_store(store, size: int, existing: List[str], batch: int = 5000) -> float:
+    """Adds threads until the store holds `size` of them; returns the seconds it took."""
+    from app.thread_query import new_thread_info
+    from app.Schemas.workflow_schema import ThreadStatus
+    statuses = [ThreadStatus.COMPLETED, ThreadStatus.COMPLETED, ThreadStatus.FAILED, ThreadStatus.PAUSED]
+    start = time.perf_counter()
+    while len(existing) < size:
+        changes = {}
+        for _ in range(min(batch, size - len(existing))):
+            thread_id = str(uuid.uuid4())
+            thread = new_thread_info(thread_id, random.choice(PROMPTS), random.choice(["linkedin_blog", "video_clipping", "social_media"]))
+            thread["status"] = thread["progress"]["status"] = random.choice(statuses)
+            changes[thread_id] = {"thread": thread, "fields": {}, "progress": {}, "deleted": False}
+            existing.append(thread_id)
+        store.apply_thread_changes(changes)
+    return time.perf_counter() - start
+
+def bench_writes(store, existing: List[str], samples: int, budget: float) -> Dict[str, Any]:
+    """Latency of single-thread writes straight to the store (what one write-behind flush costs)."""
+    from app.Schemas.workflow_schema import ThreadStatus
+    creates, updates = [], []
+    deadline = time.perf_counter() + budget
+    while len(updates) < samples and (len(updates) < 3 or time.perf_counter() < deadline):
+        thread_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        store.create_thread(thread_id, random.choice(PROMPTS), "linkedin_blog")
+        creates.append(time.perf_counter() - start)
+        existing.append(thread_id)
+
+        start = time.perf_counter()
+        store.update_thread_status(random.choice(existing), ThreadStatus.RUNNING, "benchmark")
+        updates.append(time.perf_counter() - start)
+    return {"create": percentiles(creates), "update": percentiles(updates)}
+
+async def bench_listing(base_url: str, requests: int) -> Dict[str, Any]:
+    """Response time of GET /api/threads: the first page, a filtered page and the next page via the cursor."""
+    timings = {"first_page": [], "status_filter": [], "next_page": []}
+    async with aiohttp.ClientSession() as session:
+        async def get(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+            start = time.perf_counter()
+            async with session.get(f"{base_url}/api/threads", params=params) as response:
+                response.raise_for_status()
+                page = await response.json()
+            timings[kind].append(time.perf_counter() - start)
+            return page
+
+        for _ in range(requests):
+            page = await get("first_page", {"limit": 50})
+            await get("status_filter", {"limit": 50, "status": "failed"})
+            if page["next_cursor"]:
+                await get("next_page", {"limit": 50, "cursor": page["next_cursor"]})
+    return {kind: percentiles(values) for kind, values in timings.items()}
+
+# --- Runner ---
+
+async def bench(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported only now: the app reads its configuration at import
+    from app.main import app
+    from app.jsonsaver import json_saver
+
+    server, task, base_url = await serve(app)
+    results: Dict[str, Any] = {}
+    try:
+        log(f"🏃 {args.runs} concurrent workflow runs...")
+        results["workflow_runs"] = await bench_runs(base_url, args.runs)
+
+        # Wait for the run's queued thread changes, then measure the store itself
+        await json_saver.flush()
+        store = json_saver.store
+        existing = [thread["thread_id"] for thread in store.get_all_threads()]
+        results["thread_store"] = {}
+        for size in args.sizes:
+            log(f"🗄️  growing the {args.store} store to {size} threads...")
+            before = len(existing)
+            grow_seconds = await asyncio.get_running_loop().run_in_executor(None, grow_store, store, size, existing)
+            results["thread_store"][str(size)] = {
+                "threads": len(existing),
+                "bulk_insert_per_sec": round((len(existing) - before) / grow_seconds, 1) if grow_seconds > 0 else None,
+                "writes": bench_writes(store, existing, args.samples, args.sample_seconds),
+                "list_threads": await bench_listing(base_url, args.list_requests),
+            }
+    finally:
+        server.should_exit = True
+        await task
+    return results
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric metrics of a result tree under dotted names."""
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = float(value)
+    return metrics
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> List[str]:
+    """Prints every metric next to its baseline; returns the metrics that regressed by more than allowed."""
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    regressions = []
+    print(f"\n📊 Against {baseline['meta'].get('commit') or 'the baseline'}:")
+    if baseline["meta"].get("args") != current["meta"]["args"]:
+        print("⚠️  The runs used different settings, so their numbers are not directly comparable")
+    for name in sorted(set(before) & set(after)):
+        # Only percentiles and rates are compared; counts describe the run and maxima are too noisy
+        higher_is_better = name.endswith("_per_sec")
+        if not (higher_is_better or name.endswith(("p50_ms", "p99_ms"))) or not before[name]:
+            continue
+        change = (after[name] - before[name]) / before[name]
+        worse = -change if higher_is_better else change
+        flag = ""
+        # Sub-millisecond differences are noise whatever their relative size
+        if max_regression and worse > max_regression and (higher_is_better or after[name] - before[name] > NOISE_FLOOR_MS):
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:>60}: {before[name]:>12.3f} -> {after[name]:>12.3f}  ({change:+.1%}){flag}")
+    return regressions
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def print_summary(results: Dict[str, Any]) -> None:
+    runs = results["workflow_runs"]
+    print(f"🏁 Workflow runs: {runs['completed']}/{runs['runs']} completed in {runs['wall_s']} s, "
+          f"{runs['events_per_sec']} events/s, {runs['runs_per_sec']} runs/s")
+    latency = runs["step_event_latency"]
+    print(f"   step event latency: p50 {latency.get('p50_ms')} ms  p99 {latency.get('p99_ms')} ms")
+    for size, result in results["thread_store"].items():
+        writes, listing = result["writes"], result["list_threads"]
+        print(f"🗄️  {size:>7} threads: create p50 {writes['create'].get('p50_ms')} ms p99 {writes['create'].get('p99_ms')} ms | "
+              f"update p50 {writes['update'].get('p50_ms')} ms p99 {writes['update'].get('p99_ms')} ms | "
+              f"GET /api/threads p50 {listing['first_page'].get('p50_ms')} ms p99 {listing['first_page'].get('p99_ms')} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50, help="concurrent workflow runs")
+    parser.add_argument("--workers", type=int, default=0, help="WORKFLOW_WORKERS (default: one per run)")
+    parser.add_argument("--latency-scale", type=float, default=0.01, help="LATENCY_SCALE of the synthetic agents")
+    parser.add_argument("--store", choices=("sqlite", "json"), default="sqlite", help="thread store backend")
+    parser.add_argument("--json-mode", choices=("snapshot", "log"), default="log", help="storage mode of the json store")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="thread counts to measure the store at")
+    parser.add_argument("--samples", type=int, default=200, help="writes timed at each store size")
+    parser.add_argument("--sample-seconds", type=float, default=10.0, help="time budget for the writes at each size")
+    parser.add_argument("--list-requests", type=int, default=50, help="GET /api/threads calls at each store size")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated threads")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.0,
+                        help="with --compare, fail if a metric got worse by more than this fraction (e.g. 0.2)")
+    args = parser.parse_args()
+    args.sizes = sorted(int(size) for size in args.sizes.split(",") if size.strip())
+    random.seed(args.seed)
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_file = os.path.abspath(args.compare) if args.compare else None
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(args, directory)
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results = asyncio.run(bench(args))
+        finally:
+            os.chdir(working_dir)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    print_summary(results)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {output}")
+    if baseline_file:
+        with open(baseline_file) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        if regressions:
+            print(f"❌ {len(regressions)} metrics regressed by more than {args.max_regression:.0%}")
+            sys.exit(1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the backend's cold start: how long `import app.main` takes, how long
+the lifespan takes to start, and the latency of the first request (GET /api/threads).
+Every run is a fresh interpreter without GOOGLE_API_KEY, which also checks that
+the app starts and serves threads without one and without loading the provider SDKs.
+Run this from the backend directory: python benchmarks/bench_startup.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be loaded just to start the app and list threads
+PROVIDER_MODULES = ("langchain_google_genai", "langchain_core", "google.generativeai")
+
+# Runs in the child interpreter and prints one JSON line of timings
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    status = client.get("/api/threads").status_code
+    answered = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": started - imported,
+    "first_request_s": answered - started,
+    "status": status,
+    "provider_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (PROVIDER_MODULES,)
+
+def run_once() -> dict:
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    # Nothing is written to the working directory, and the optional prewarm does not skew the numbers
+    env.update({"SQLITE_DB_FILE": ":memory:", "PREWARM_MODEL_CLIENTS": "false", "RECOVER_INTERRUPTED_RUNS": "false"})
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"the app failed to start:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_s"] = wall
+    return timings
+
+def summarize(runs: list) -> dict:
+    summary = {}
+    for key in ("import_s", "startup_s", "first_request_s", "process_s"):
+        values = sorted(run[key] for run in runs)
+        summary[key] = {
+            "median_ms": round(statistics.median(values) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+        }
+    summary["statuses"] = sorted({run["status"] for run in runs})
+    summary["provider_modules"] = sorted({name for run in runs for name in run["provider_modules"]})
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--max-import-ms", type=float, default=0.0,
+                        help="fail if the median import time exceeds this (0 = no limit)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize([run_once() for _ in range(args.runs)])
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"🏁 Cold start benchmark ({args.runs} runs, no GOOGLE_API_KEY)")
+        for key in ("import_s", "startup_s", "first_request_s", "process_s"):
+            print(f"{key:>16}: median {summary[key]['median_ms']:>8} ms  max {summary[key]['max_ms']:>8} ms")
+        print(f"{'statuses':>16}: {summary['statuses']}")
+        print(f"{'provider SDKs':>16}: {summary['provider_modules'] or 'not loaded'}")
+
+    # Regression guard: startup must not need a key, load the SDKs or get slower than allowed
+    failures = []
+    if summary["statuses"] != [200]:
+        failures.append(f"GET /api/threads answered {summary['statuses']}")
+    if summary["provider_modules"]:
+        failures.append(f"provider SDKs loaded at startup: {summary['provider_modules']}")
+    if args.max_import_ms and summary["import_s"]["median_ms"] > args.max_import_ms:
+        failures.append(f"median import time {summary['import_s']['median_ms']} ms > {args.max_import_ms} ms")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
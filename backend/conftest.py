@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for the backend tests.
+Loaded by pytest before any test module, so before anything imports app.config.
+"""
+
+import os
+
+# Keep the module-level stores of the app out of the working directory
+os.environ.setdefault("SQLITE_DB_FILE", ":memory:")
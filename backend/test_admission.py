@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the Gemini admission controller.
+Run this from the backend directory: python test_admission.py
+"""
+
+import asyncio
+import time
+
+from app.Services.admission import EndpointLimiter, use_lane, INTERACTIVE, BATCH
+
+def test_concurrency_is_capped():
+    limiter = EndpointLimiter("test", concurrency=2, rpm=0, tpm=0)
+    peak = {"now": 0, "max": 0}
+
+    async def call():
+        async with limiter.limit():
+            peak["now"] += 1
+            peak["max"] = max(peak["max"], peak["now"])
+            await asyncio.sleep(0.02)
+            peak["now"] -= 1
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak["max"] == 2
+    assert limiter.stats()["lanes"][BATCH]["admitted"] == 6
+
+def test_zero_concurrency_is_unlimited():
+    limiter = EndpointLimiter("test", concurrency=0, rpm=0, tpm=0)
+
+    async def scenario():
+        entered = asyncio.Event()
+
+        async def call():
+            async with limiter.limit():
+                if limiter.in_flight == 20:
+                    entered.set()
+                await entered.wait()
+
+        await asyncio.wait_for(asyncio.gather(*(call() for _ in range(20))), 1)
+
+    asyncio.run(scenario())
+
+def test_interactive_lane_goes_first():
+    limiter = EndpointLimiter("test", concurrency=1, rpm=0, tpm=0)
+    order = []
+
+    async def call(name, lane):
+        async with limiter.limit(lane=lane):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        blocker = asyncio.create_task(call("first", BATCH))
+        await asyncio.sleep(0)
+        batch = [asyncio.create_task(call(f"batch-{i}", BATCH)) for i in range(3)]
+        await asyncio.sleep(0)
+        with use_lane(INTERACTIVE):
+            chat = asyncio.create_task(call("chat", None))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queue_depth"] == {INTERACTIVE: 1, BATCH: 3}
+        await asyncio.gather(blocker, chat, *batch)
+
+    asyncio.run(run())
+    assert order[:2] == ["first", "chat"]
+
+def test_request_rate_is_limited():
+    # 600 RPM = one request every 0.1 s once the burst allowance is used up
+    limiter = EndpointLimiter("test", concurrency=10, rpm=600, tpm=0)
+    limiter.requests.level = 1
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(3):
+            async with limiter.limit():
+                pass
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.15 < elapsed < 0.5
+    assert limiter.stats()["lanes"][BATCH]["wait_max"] > 0.05
+
+def test_token_debt_delays_next_call():
+    limiter = EndpointLimiter("test", concurrency=10, rpm=0, tpm=6000)
+
+    async def run():
+        async with limiter.limit(tokens=10) as lease:
+            lease.charge(limiter.tokens.capacity)
+        start = time.monotonic()
+        async with limiter.limit(tokens=10):
+            pass
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) > 0.05
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = EndpointLimiter("test", concurrency=1, rpm=0, tpm=0)
+
+    async def hold(event):
+        async with limiter.limit():
+            await event.wait()
+
+    async def run():
+        event = asyncio.Event()
+        holder = asyncio.create_task(hold(event))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(event))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        event.set()
+        await holder
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["in_flight"] == 0 and stats["queue_depth"][BATCH] == 0
+
+if __name__ == "__main__":
+    print("🧪 Testing admission control...")
+    test_concurrency_is_capped()
+    test_zero_concurrency_is_unlimited()
+    test_interactive_lane_goes_first()
+    test_request_rate_is_limited()
+    test_token_debt_delays_next_call()
+    test_cancelled_waiter_leaves_the_queue()
+    print("✅ All admission control tests passed")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed blob store and the /api/blobs endpoint.
+Run this from the backend directory: python test_blob_store.py
+"""
+
+import asyncio
+import base64
+import hashlib
+import tempfile
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.agents import image_agent
+from app.Services.blob_store import BlobStore, blob_store, is_blob_ref
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+def test_blobs_are_stored_once_by_content_hash():
+    with tempfile.TemporaryDirectory() as directory:
+        store = BlobStore(directory)
+        ref = store.put(PNG, "image/png")
+        digest = hashlib.sha256(PNG).hexdigest()
+        assert ref == f"/api/blobs/{digest}" and is_blob_ref(ref)
+        assert store.put(PNG, "image/png") == ref
+        assert store.put_data_url("data:image/png;base64," + base64.b64encode(PNG).decode()) == ref
+        assert store.stat(digest) == (len(PNG), "image/png")
+        assert store.read(ref) == PNG
+        assert store.read(digest, 8, 11) == PNG[8:12]
+        assert store.stat("0" * 64) is None
+        assert store.stat("../../etc/passwd") is None
+
+def test_image_agent_keeps_only_a_reference_in_state():
+    original = (image_agent.generate_image_prompt, image_agent.call_image_api, blob_store.root)
+
+    async def fake_prompt(script):
+        return "a robot painting"
+
+    async def fake_api(image_prompt):
+        return PNG, "image/png"
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_agent.generate_image_prompt, image_agent.call_image_api, blob_store.root = fake_prompt, fake_api, directory
+        try:
+            update = asyncio.run(image_agent.image_generation_agent({"script": "A script about robots"}))
+        finally:
+            image_agent.generate_image_prompt, image_agent.call_image_api, blob_store.root = original
+        assert update["image_data"] == f"/api/blobs/{hashlib.sha256(PNG).hexdigest()}"
+        assert BlobStore(directory).read(update["image_data"]) == PNG
+
+def test_blob_endpoint_supports_etags_and_ranges():
+    original = blob_store.root
+    with tempfile.TemporaryDirectory() as directory:
+        blob_store.root = directory
+        try:
+            ref = blob_store.put(PNG, "image/png")
+            client = TestClient(app)
+
+            response = client.get(ref)
+            assert response.status_code == 200
+            assert response.content == PNG
+            assert response.headers["content-type"] == "image/png"
+            etag = response.headers["etag"]
+            assert response.headers["accept-ranges"] == "bytes"
+
+            assert client.get(ref, headers={"If-None-Match": etag}).status_code == 304
+
+            partial = client.get(ref, headers={"Range": "bytes=8-15"})
+            assert partial.status_code == 206
+            assert partial.content == PNG[8:16]
+            assert partial.headers["content-range"] == f"bytes 8-15/{len(PNG)}"
+            assert client.get(ref, headers={"Range": "bytes=-4"}).content == PNG[-4:]
+            assert client.get(ref, headers={"Range": f"bytes={len(PNG)}-"}).status_code == 416
+
+            assert client.get("/api/blobs/" + "0" * 64).status_code == 404
+        finally:
+            blob_store.root = original
+
+if __name__ == "__main__":
+    print("🧪 Testing the blob store...")
+    test_blobs_are_stored_once_by_content_hash()
+    test_image_agent_keeps_only_a_reference_in_state()
+    test_blob_endpoint_supports_etags_and_ranges()
+    print("✅ All blob store tests passed")
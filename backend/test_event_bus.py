@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the event bus sharing workflow events between server processes.
+Run this from the backend directory: python test_event_bus.py
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+
+from app.Services.event_bus import InProcessEventBus, SqliteEventBus
+from app.Services.event_hub import EventHub
+
+def collect(bus, thread_id, last_event_id=0, timeout=5.0):
+    async def run():
+        items = []
+        async def follow():
+            async for item in bus.subscribe(thread_id, last_event_id):
+                items.append(item)
+        await asyncio.wait_for(follow(), timeout)
+        return items
+    return run()
+
+def event(kind, thread_id="t1", **fields):
+    return {"type": kind, "thread_id": thread_id, **fields}
+
+def test_in_process_bus_numbers_events_per_thread():
+    bus = InProcessEventBus(EventHub())
+    bus.open("t1")
+    bus.publish(event("step_start"))
+    bus.publish(event("workflow_complete"))
+    bus.publish({"type": "no thread"})
+    items = asyncio.run(collect(bus, "t1"))
+    assert [(event_id, item["type"]) for event_id, item in items] == [(1, "step_start"), (2, "workflow_complete")]
+
+def test_any_process_can_stream_a_thread_another_one_runs():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "events.db")
+        runner = SqliteEventBus(EventHub(), db_file, origin="runner")
+        watcher = SqliteEventBus(EventHub(), db_file, poll_interval=0.01, origin="watcher")
+
+        async def run():
+            watcher.start()
+            runner.publish(event("workflow_start"))
+            # The watcher has not seen the thread yet: it is backfilled from the table, then followed live
+            subscriber = asyncio.create_task(collect(watcher, "t1"))
+            await asyncio.sleep(0.05)
+            runner.publish(event("step_complete", node="ideation_agent"))
+            runner.publish(event("workflow_complete"))
+            items = await subscriber
+            await watcher.aclose()
+            return items
+
+        items = asyncio.run(run())
+        assert [item["type"] for _, item in items] == ["workflow_start", "step_complete", "workflow_complete"]
+        ids = [event_id for event_id, _ in items]
+        assert ids == sorted(ids) and len(set(ids)) == 3
+
+        # Reconnecting to the watcher with Last-Event-ID replays the rest, with the runner's ids
+        replay = asyncio.run(collect(watcher, "t1", last_event_id=ids[0]))
+        assert [event_id for event_id, _ in replay] == ids[1:]
+
+def test_run_resumed_in_another_process_continues_its_stream():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "events.db")
+        first = SqliteEventBus(EventHub(), db_file, origin="first")
+        second = SqliteEventBus(EventHub(), db_file, origin="second")
+
+        first.publish(event("workflow_paused"))
+        paused = asyncio.run(collect(first, "t1"))
+        second.open("t1")
+        second.publish(event("workflow_start", resumed_from=["ideation_agent"]))
+        second.publish(event("workflow_complete"))
+        first.poll()
+
+        items = asyncio.run(collect(first, "t1", last_event_id=paused[-1][0]))
+        assert [item["type"] for _, item in items] == ["workflow_start", "workflow_complete"]
+        assert items[0][0] > paused[-1][0]
+
+def test_started_bus_writes_events_in_batches_off_the_loop():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "events.db")
+        bus = SqliteEventBus(EventHub(), db_file, origin="runner")
+
+        async def run():
+            bus.start()
+            bus.open("t1")
+            subscriber = asyncio.create_task(collect(bus, "t1"))
+            await asyncio.sleep(0.05)
+            for step in range(50):
+                bus.publish(event("step_delta", delta=str(step)))
+            bus.publish(event("workflow_complete"))
+            # Nothing has been written on the loop yet
+            assert bus.history("t1") == []
+            items = await subscriber
+            await bus.aclose()
+            return items
+
+        items = asyncio.run(run())
+        assert [item.get("delta") for _, item in items] == [str(step) for step in range(50)] + [None]
+        ids = [event_id for event_id, _ in items]
+        assert ids == sorted(ids) and len(set(ids)) == 51
+        assert [event_id for event_id, _ in bus.history("t1")] == ids
+
+def test_reconnect_reads_every_stored_event_after_its_last_id():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "events.db")
+        runner = SqliteEventBus(EventHub(buffer_size=10), db_file, origin="runner")
+        for step in range(600):
+            runner.publish(event("progress", step=step))
+            runner.publish(event("step_delta", delta="chunk"))
+        runner.publish(event("workflow_complete"))
+        watcher = SqliteEventBus(EventHub(buffer_size=10), db_file, origin="watcher")
+
+        for bus in (runner, watcher):
+            items = asyncio.run(collect(bus, "t1", last_event_id=5))
+            # Every step event after the last id, beyond one page and the replay buffer; no deltas
+            assert [item.get("step") for _, item in items] == list(range(3, 600)) + [None]
+            assert items[0][0] == 7
+
+def publish_run(db_file, thread_id):
+    bus = SqliteEventBus(EventHub(), db_file, origin="child")
+    for step in range(5):
+        bus.publish(event("progress", thread_id, step=step))
+    bus.publish(event("workflow_complete", thread_id))
+
+def test_events_cross_real_process_boundaries():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "events.db")
+        bus = SqliteEventBus(EventHub(), db_file, poll_interval=0.01, origin="parent")
+
+        async def run():
+            bus.start()
+            bus.open("child-run")
+            subscriber = asyncio.create_task(collect(bus, "child-run", timeout=30))
+            process = multiprocessing.get_context("spawn").Process(target=publish_run, args=(db_file, "child-run"))
+            process.start()
+            items = await subscriber
+            await asyncio.get_running_loop().run_in_executor(None, process.join)
+            await bus.aclose()
+            return items, process.exitcode
+
+        items, exitcode = asyncio.run(run())
+        assert exitcode == 0
+        assert [item.get("step") for _, item in items] == [0, 1, 2, 3, 4, None]
+
+if __name__ == "__main__":
+    print("🧪 Testing the event bus...")
+    test_in_process_bus_numbers_events_per_thread()
+    test_any_process_can_stream_a_thread_another_one_runs()
+    test_run_resumed_in_another_process_continues_its_stream()
+    test_started_bus_writes_events_in_batches_off_the_loop()
+    test_reconnect_reads_every_stored_event_after_its_last_id()
+    test_events_cross_real_process_boundaries()
+    print("✅ All event bus tests passed")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-thread event hub and the SSE workflow stream.
+Run this from the backend directory: python test_event_hub.py
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import workflow
+from app.Services.event_hub import EventHub, format_sse
+from app.Services.workflow_service import WorkflowService
+
+def collect(hub, thread_id, last_event_id=0, heartbeat=None, limit=100):
+    async def run():
+        items = []
+        async for item in hub.subscribe(thread_id, last_event_id, heartbeat):
+            items.append(item)
+            if len(items) >= limit:
+                break
+        return items
+    return run()
+
+def test_replay_after_last_event_id_then_live():
+    hub = EventHub(buffer_size=10)
+
+    async def run():
+        hub.open("t1")
+        for step in range(3):
+            hub.publish({"type": "progress", "step": step, "thread_id": "t1"})
+        subscriber = asyncio.create_task(collect(hub, "t1", last_event_id=1))
+        await asyncio.sleep(0)
+        hub.publish({"type": "step_complete", "thread_id": "t1"})
+        hub.publish({"type": "workflow_complete", "thread_id": "t1"})
+        return await subscriber
+
+    items = asyncio.run(run())
+    assert [event_id for event_id, _ in items] == [2, 3, 4, 5]
+    assert items[-1][1]["type"] == "workflow_complete"
+
+def test_ring_buffer_is_bounded():
+    hub = EventHub(buffer_size=3)
+    for step in range(5):
+        hub.publish({"type": "progress", "step": step, "thread_id": "t1"})
+    hub.publish({"type": "error", "thread_id": "t1"})
+    items = asyncio.run(collect(hub, "t1"))
+    assert [event_id for event_id, _ in items] == [None, 4, 5, 6]
+    assert items[0][1] == {"type": "replay_truncated", "thread_id": "t1", "first_event_id": 4}
+
+    # Nothing was dropped after the last id seen, so there is nothing to signal
+    items = asyncio.run(collect(hub, "t1", last_event_id=4))
+    assert [event_id for event_id, _ in items] == [5, 6]
+
+def test_step_deltas_are_delivered_live_but_not_replayed():
+    hub = EventHub(buffer_size=3)
+
+    async def run():
+        hub.open("t1")
+        hub.publish({"type": "step_start", "thread_id": "t1"})
+        live = asyncio.create_task(collect(hub, "t1"))
+        await asyncio.sleep(0)
+        for chunk in range(10):
+            hub.publish({"type": "step_delta", "delta": str(chunk), "thread_id": "t1"})
+        hub.publish({"type": "step_complete", "thread_id": "t1"})
+        hub.publish({"type": "workflow_complete", "thread_id": "t1"})
+        return await live
+
+    live = asyncio.run(run())
+    assert [event["type"] for _, event in live].count("step_delta") == 10
+    # The deltas never pushed the step events out of the buffer
+    replay = asyncio.run(collect(hub, "t1"))
+    assert [(event_id, event["type"]) for event_id, event in replay] == [
+        (1, "step_start"), (12, "step_complete"), (13, "workflow_complete")]
+    assert format_sse((None, {"type": "x"})) == 'data: {"type": "x"}\n\n'
+
+def test_idle_stream_gets_heartbeats():
+    hub = EventHub()
+    hub.open("t1")
+    items = asyncio.run(collect(hub, "t1", heartbeat=0.01, limit=2))
+    assert items == [None, None]
+    assert format_sse(None) == ": heartbeat\n\n"
+    assert format_sse((7, {"type": "x"})) == 'id: 7\ndata: {"type": "x"}\n\n'
+
+def parse_frames(body):
+    frames = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if fields:
+            frames.append(fields)
+    return frames
+
+def test_events_stream_sse_and_reconnect_replays_missed_events():
+    original = workflow.workflow_service
+    workflow.workflow_service = WorkflowService(agent_backend="synthetic")
+    try:
+        with TestClient(app) as client:
+            started = client.post("/api/run", params={"prompt": "Create a social media campaign", "thread_id": "sse-test"})
+            assert started.json()["thread_id"] == "sse-test"
+            response = client.get("/api/threads/sse-test/events")
+            assert response.headers["content-type"].startswith("text/event-stream")
+            frames = parse_frames(response.text)
+            ids = [int(frame["id"]) for frame in frames]
+            assert ids == list(range(1, len(ids) + 1))
+            assert '"workflow_complete"' in frames[-1]["data"]
+
+            replay = client.get("/api/threads/sse-test/events", headers={"Last-Event-ID": "3"})
+            assert [int(frame["id"]) for frame in parse_frames(replay.text)] == ids[3:]
+            assert client.get("/api/threads/unknown/events").status_code == 404
+            client.delete("/api/threads/sse-test")
+    finally:
+        workflow.workflow_service = original
+
+if __name__ == "__main__":
+    print("🧪 Testing event hub and SSE stream...")
+    test_replay_after_last_event_id_then_live()
+    test_ring_buffer_is_bounded()
+    test_step_deltas_are_delivered_live_but_not_replayed()
+    test_idle_stream_gets_heartbeats()
+    test_events_stream_sse_and_reconnect_replays_missed_events()
+    print("✅ All event hub tests passed")
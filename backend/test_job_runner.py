@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the background workflow job runner.
+Run this from the backend directory: python test_job_runner.py
+"""
+
+import asyncio
+
+from app.Services.job_runner import JobRunner
+
+def test_jobs_run_on_a_bounded_pool():
+    runner = JobRunner(workers=2)
+    active = {"now": 0, "max": 0}
+
+    def job():
+        async def run():
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+        return run()
+
+    async def run():
+        for index in range(5):
+            assert runner.submit(f"job-{index}", job)
+        assert runner.stats()["queue_depth"] == 5
+        while runner.stats()["completed"] < 5:
+            await asyncio.sleep(0.01)
+        stats = runner.stats()
+        await runner.aclose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert active["max"] == 2
+    assert stats["queue_depth"] == 0 and stats["busy_workers"] == 0
+    assert stats["wait_max"] > 0 and 0 < stats["utilization"] <= 1
+
+def test_duplicate_and_cancelled_jobs():
+    runner = JobRunner(workers=1)
+
+    async def run():
+        assert runner.submit("slow", lambda: asyncio.sleep(10))
+        assert not runner.submit("slow", lambda: asyncio.sleep(10))
+        await asyncio.sleep(0.01)
+        assert runner.cancel("slow")
+        await asyncio.sleep(0.01)
+        assert not runner.is_active("slow")
+
+        async def failing():
+            raise RuntimeError("boom")
+        runner.submit("failing", failing)
+        await asyncio.sleep(0.01)
+        stats = runner.stats()
+        await runner.aclose()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["cancelled"] == 1 and stats["failed"] == 1
+
+def test_close_stops_running_jobs():
+    runner = JobRunner(workers=1)
+    finished = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            finished.append("stopped")
+
+    async def run():
+        runner.submit("slow", slow)
+        await asyncio.sleep(0.01)
+        await runner.aclose()
+
+    asyncio.run(run())
+    assert finished == ["stopped"]
+
+if __name__ == "__main__":
+    print("🧪 Testing workflow job runner...")
+    test_jobs_run_on_a_bounded_pool()
+    test_duplicate_and_cancelled_jobs()
+    test_close_stops_running_jobs()
+    print("✅ All job runner tests passed")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only log storage mode of the JSON thread store.
+Run this from the backend directory: python test_jsonsaver.py
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+from app import jsonsaver
+from app.jsonsaver import JsonSaver, THREADS_FILE, THREADS_LOG_FILE, THREADS_COMPACTING_FILE
+from app.Schemas.workflow_schema import ThreadStatus
+from app.thread_query import status_value
+
+def in_directory(test):
+    """Runs the test inside an empty working directory (the store files are relative paths)."""
+    def run():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                test()
+            finally:
+                os.chdir(cwd)
+    run.__name__ = test.__name__
+    return run
+
+def snapshot_threads():
+    with open(THREADS_FILE) as f:
+        return json.load(f)
+
+@in_directory
+def test_log_is_replayed_after_a_restart():
+    saver = JsonSaver(storage_mode="log", compact_threshold=10 ** 9)
+    saver.create_thread("t1", "first", "linkedin_blog")
+    saver.create_thread("t2", "second", "social_media")
+    saver.update_thread_status("t1", ThreadStatus.RUNNING, "ideation_agent")
+    saver.delete_thread("t2")
+    saver.update_thread_progress("t1", 1, 3, "image_agent")
+    saver.create_thread("t2", "second again", "video_clipping")
+    saver.create_thread("t3", "third", "linkedin_blog")
+    saver.update_thread("t3", status=ThreadStatus.COMPLETED, current_step="completed")
+    saver.close()
+    # Nothing was compacted: every change only lives in the log
+    assert not os.path.exists(THREADS_FILE)
+
+    restarted = JsonSaver(storage_mode="log", compact_threshold=10 ** 9)
+    t1, t2, t3 = (restarted.get_thread_info(thread_id) for thread_id in ("t1", "t2", "t3"))
+    assert status_value(t1["status"]) == "running"
+    assert t1["progress"]["completed_steps"] == 1 and t1["progress"]["current_step"] == "image_agent"
+    assert t2["name"] == "second again" and t2["workflow_type"] == "video_clipping"
+    assert status_value(t3["status"]) == "completed"
+    # The replayed records were folded into the snapshot and the log starts empty
+    assert set(snapshot_threads()) == {"t1", "t2", "t3"}
+    assert os.path.getsize(THREADS_LOG_FILE) == 0
+    assert [page["thread_id"] for page in restarted.list_threads(status="completed")["threads"]] == ["t3"]
+    restarted.close()
+
+@in_directory
+def test_log_left_compacting_by_a_crash_is_replayed_before_the_new_log():
+    saver = JsonSaver(storage_mode="log", compact_threshold=10 ** 9)
+    saver.create_thread("t1", "first", "linkedin_blog")
+    saver.create_thread("t2", "second", "linkedin_blog")
+    saver.close()
+    # The process died after rotating the log, before the snapshot was written;
+    # records appended after the rotation went to a fresh log
+    os.replace(THREADS_LOG_FILE, THREADS_COMPACTING_FILE)
+    with open(THREADS_LOG_FILE, "w") as f:
+        f.write(json.dumps({"op": "update", "thread_id": "t1", "fields": {"status": "completed"}, "progress": {}}) + "\n")
+        f.write(json.dumps({"op": "delete", "thread_id": "t2"}) + "\n")
+        # A record torn by the crash
+        f.write('{"op": "create", "thread_id": "t3", "thr')
+
+    restarted = JsonSaver(storage_mode="log", compact_threshold=10 ** 9)
+    assert status_value(restarted.get_thread_info("t1")["status"]) == "completed"
+    assert restarted.get_thread_info("t2") is None and restarted.get_thread_info("t3") is None
+    assert not os.path.exists(THREADS_COMPACTING_FILE)
+    assert set(snapshot_threads()) == {"t1"}
+    restarted.close()
+
+@in_directory
+def test_compaction_while_writes_continue():
+    saver = JsonSaver(storage_mode="log", compact_threshold=4096)
+    compactions = []
+    start_compaction = saver._start_compaction
+
+    def counting_compaction():
+        compactions.append(1)
+        return start_compaction()
+
+    saver._start_compaction = counting_compaction
+
+    def write(worker):
+        for index in range(100):
+            thread_id = f"w{worker}-{index}"
+            saver.create_thread(thread_id, thread_id, "linkedin_blog")
+            saver.update_thread_progress(thread_id, 1, 3, "image_agent")
+            if index % 10 == 0:
+                saver.delete_thread(thread_id)
+
+    writers = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    saver.close()
+    assert compactions, "the log never crossed the compaction threshold"
+    # Compaction folded records into the snapshot; the log only holds those written since
+    assert snapshot_threads()
+    with open(THREADS_LOG_FILE) as f:
+        assert sum(1 for _ in f) < 4 * 210
+    assert not os.path.exists(THREADS_COMPACTING_FILE)
+
+    restarted = JsonSaver(storage_mode="log", compact_threshold=4096)
+    threads = {thread["thread_id"]: thread for thread in restarted.get_all_threads()}
+    assert len(threads) == 4 * 90
+    assert all(thread["progress"]["completed_steps"] == 1 for thread in threads.values())
+    assert "w0-0" not in threads and "w3-99" in threads
+    restarted.close()
+
+@in_directory
+def test_explicit_compactions_never_overlap_threshold_ones():
+    saver = JsonSaver(storage_mode="log", compact_threshold=2048)
+    compact = saver._compact
+    running, overlaps = [], []
+
+    def tracking_compact(snapshot):
+        overlaps.append(len(running))
+        running.append(1)
+        try:
+            compact(snapshot)
+        finally:
+            running.pop()
+
+    saver._compact = tracking_compact
+
+    def write(worker):
+        for index in range(100):
+            thread_id = f"w{worker}-{index}"
+            saver.create_thread(thread_id, thread_id, "linkedin_blog")
+            saver.update_thread_progress(thread_id, 1, 3, "image_agent")
+
+    def compact_repeatedly():
+        for _ in range(20):
+            saver.compact()
+
+    workers = [threading.Thread(target=write, args=(worker,)) for worker in range(3)]
+    workers.append(threading.Thread(target=compact_repeatedly))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    saver.compact()
+    saver.close()
+    assert overlaps and not any(overlaps), overlaps
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+    assert len(snapshot_threads()) == 3 * 100
+    assert os.path.getsize(THREADS_LOG_FILE) == 0
+
+@in_directory
+def test_pause_requests_follow_the_run_lease():
+    store = JsonSaver(storage_mode="snapshot")
+    assert store.claim_run("t1", "worker-a", ttl=60)
+    assert not store.request_run_pause("t1", "worker-a") and not store.request_run_pause("t2", "worker-b")
+    assert store.request_run_pause("t1", "worker-b")
+    # The request stays with the run while its lease is renewed
+    assert store.renew_runs(["t1"], "worker-a", ttl=60) == ["t1"]
+    assert store.take_run_pauses("worker-b") == []
+    assert store.take_run_pauses("worker-a") == ["t1"] and store.take_run_pauses("worker-a") == []
+    assert store.request_run_pause("t1", "worker-b") and store.withdraw_run_pause("t1")
+    assert not store.withdraw_run_pause("t1")
+    # Releasing the run drops its request, so the next run of the thread is not paused
+    assert store.request_run_pause("t1", "worker-b")
+    store.release_run("t1", "worker-a")
+    assert store.claim_run("t1", "worker-b", ttl=60) and store.take_run_pauses("worker-b") == []
+
+if __name__ == "__main__":
+    print("🧪 Testing the JSON thread store log...")
+    test_log_is_replayed_after_a_restart()
+    test_log_left_compacting_by_a_crash_is_replayed_before_the_new_log()
+    test_compaction_while_writes_continue()
+    test_explicit_compactions_never_overlap_threshold_ones()
+    test_pause_requests_follow_the_run_lease()
+    print("✅ All JSON thread store tests passed")
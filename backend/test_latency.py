@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the latency policy that replaces the agents' artificial sleeps.
+Run this from the backend directory: python test_latency.py
+"""
+
+import asyncio
+
+from app.Services.latency import LatencyPolicy
+from app.Services.step_metrics import measure_step
+
+def test_none_mode_never_sleeps():
+    policy = LatencyPolicy("none")
+    assert policy.delay_for("image_api") == 0.0
+
+    async def run():
+        with measure_step() as metrics:
+            await policy.wait("image_api")
+        return metrics
+
+    metrics = asyncio.run(run())
+    assert metrics.injected_delay == 0.0
+    assert metrics.wall_time < 0.05
+
+def test_fixed_delay_is_reported_in_step_metrics():
+    policy = LatencyPolicy("fixed", scale=0.01)
+
+    async def run():
+        with measure_step() as metrics:
+            await policy.wait("image_api")
+            await policy.wait("social_post")
+        return metrics
+
+    metrics = asyncio.run(run())
+    assert abs(metrics.injected_delay - 0.09) < 1e-9
+    assert metrics.as_dict()["injected_delay"] == 0.09
+    assert metrics.wall_time >= 0.09
+
+def test_sampled_delays_are_repeatable():
+    first = LatencyPolicy("sampled", seed=7)
+    second = LatencyPolicy("sampled", seed=7)
+    samples = [first.delay_for("linkedin_post") for _ in range(5)]
+    assert samples == [second.delay_for("linkedin_post") for _ in range(5)]
+    assert len(set(samples)) > 1
+
+def test_unknown_mode_is_rejected():
+    try:
+        LatencyPolicy("random")
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
+
+if __name__ == "__main__":
+    print("🧪 Testing latency policy...")
+    test_none_mode_never_sleeps()
+    test_fixed_delay_is_reported_in_step_metrics()
+    test_sampled_delays_are_repeatable()
+    test_unknown_mode_is_rejected()
+    print("✅ All latency policy tests passed")
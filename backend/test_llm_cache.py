@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache.
+Run this from the backend directory: python test_llm_cache.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.Services import llm_service
+from app.Services.llm_cache import LLMCache, cache_key
+from app.Services.model_clients import LazyClient
+from app.providers.registry import get_provider
+
+# Fake chat models stand in for the client of the Gemini provider
+gemini = get_provider("gemini")
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+class FakeModel:
+    """Stands in for the Gemini chat model and counts calls."""
+    model = "fake-model"
+    temperature = 0.7
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return FakeResponse(f"answer {self.calls}")
+
+def test_key_ignores_whitespace_but_not_parameters():
+    base = cache_key("m", {"temperature": 0.7}, [("human", "Write a post\r\nabout AI  ")])
+    assert base == cache_key("m", {"temperature": 0.7}, [("human", "Write a post\nabout AI")])
+    assert base != cache_key("m", {"temperature": 0.2}, [("human", "Write a post\nabout AI")])
+    assert base != cache_key("other", {"temperature": 0.7}, [("human", "Write a post\nabout AI")])
+
+def test_lru_and_ttl_eviction():
+    async def run():
+        cache = LLMCache(max_entries=2, ttl=60)
+        await cache.put("a", "1")
+        await cache.put("b", "2")
+        await cache.get("a")
+        await cache.put("c", "3")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "1"
+
+        cache.ttl = 0
+        await asyncio.sleep(0.01)
+        assert await cache.get("a") is None
+        return cache.stats()
+
+    stats = asyncio.run(run())
+    assert stats["evictions"] == 1 and stats["expired"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 2
+
+def test_disk_tier_survives_a_new_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "llm_cache.db")
+
+        async def run():
+            first = LLMCache(db_file=db_file, max_disk_entries=2)
+            for key in ("a", "b", "c"):
+                await first.put(key, key.upper())
+            first.close()
+            second = LLMCache(db_file=db_file)
+            values = [await second.get(key) for key in ("a", "b", "c")]
+            second.close()
+            return values, second.stats()
+
+        values, stats = asyncio.run(run())
+        assert values == [None, "B", "C"]
+        assert stats["disk_hits"] == 2
+
+def test_generate_text_uses_cache_unless_fresh():
+    model, cache = FakeModel(), LLMCache()
+    original_model, original_cache = gemini.chat_model, llm_service.llm_cache
+    gemini.chat_model, llm_service.llm_cache = LazyClient("gemini_chat", lambda: model), cache
+    try:
+        async def run():
+            return [
+                await llm_service.generate_text("Ideas about AI"),
+                await llm_service.generate_text("Ideas about AI "),
+                await llm_service.generate_text("Ideas about AI", fresh=True),
+                await llm_service.generate_text("Ideas about AI"),
+            ]
+
+        answers = asyncio.run(run())
+    finally:
+        gemini.chat_model, llm_service.llm_cache = original_model, original_cache
+
+    assert answers == ["answer 1", "answer 1", "answer 2", "answer 2"]
+    assert model.calls == 2
+    assert cache.stats()["bypassed"] == 1
+
+if __name__ == "__main__":
+    print("🧪 Testing LLM response cache...")
+    test_key_ignores_whitespace_but_not_parameters()
+    test_lru_and_ttl_eviction()
+    test_disk_tier_survives_a_new_cache()
+    test_generate_text_uses_cache_unless_fresh()
+    print("✅ All LLM cache tests passed")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics and the /metrics endpoint.
+Run this from the backend directory: python test_metrics.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+import aiohttp
+from fastapi.testclient import TestClient
+from tenacity import wait_none
+from app import jsonsaver
+from app.main import app
+from app.agents import image_agent
+from app.Services import metrics
+from app.Services.blob_store import blob_store
+from app.Services.progress_tracker import ProgressTracker
+from app.Services.workflow_service import WorkflowService
+from app.sqlitesaver import SqliteSaver
+from app.write_behind import WriteBehindSaver
+from app.providers import registry
+from test_progress_tracker import CountingStore
+
+PROMPT = "Create a social media campaign about renewable energy"
+
+def test_text_exposition_format():
+    registry_ = metrics.MetricsRegistry()
+    latency = registry_.histogram("test_latency_seconds", "Test latency", ("agent",), buckets=(0.1, 1.0))
+    calls = registry_.counter("test_calls_total", "Test calls", ("path",))
+    open_streams = registry_.gauge("test_streams", "Open streams")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, agent="ideation_agent")
+    calls.inc(path='say "hi"\n')
+    calls.inc(2, path='say "hi"\n')
+    open_streams.inc()
+    open_streams.inc()
+    open_streams.dec()
+
+    lines = registry_.render().splitlines()
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{agent="ideation_agent",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{agent="ideation_agent",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{agent="ideation_agent",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{agent="ideation_agent"} 4.05' in lines
+    assert 'test_latency_seconds_count{agent="ideation_agent"} 4' in lines
+    assert 'test_calls_total{path="say \\"hi\\"\\n"} 3' in lines
+    assert "test_streams 1" in lines
+
+    try:
+        latency.observe(1.0)
+        assert False, "missing labels must be rejected"
+    except ValueError:
+        pass
+    try:
+        registry_.counter("test_calls_total", "Again")
+        assert False, "duplicate metric names must be rejected"
+    except ValueError:
+        pass
+
+def test_workflow_run_is_measured_and_served():
+    metrics.metrics.reset()
+    stub = registry.get_provider("stub")
+    settings = dict(vars(stub))
+    original_root = blob_store.root
+    stub.latency_mean, stub.image_latency_mean, stub.tokens_per_second, stub.error_rate = 0.01, 0.01, 0, 0
+    registry.WORKFLOW_PROVIDERS["social_media"] = "stub"
+    service = WorkflowService(ProgressTracker(CountingStore()))
+
+    async def run():
+        return [event async for event in service.orchestrate_workflow(PROMPT, "metrics-run")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        blob_store.root = directory
+        try:
+            service.tracker.create("metrics-run", PROMPT, service.detect_workflow_type(PROMPT))
+            events = asyncio.run(run())
+        finally:
+            del registry.WORKFLOW_PROVIDERS["social_media"]
+            vars(stub).update(settings)
+            blob_store.root = original_root
+
+    assert events[-1]["type"] == "workflow_complete"
+    for agent in ("ideation_agent", "image_agent", "posting_agent"):
+        assert metrics.step_duration.count(agent=agent, workflow_type="social_media") == 1
+    assert metrics.llm_call_duration.count(provider="stub", call="image_prompt") == 1
+    assert metrics.llm_tokens.sum(provider="stub", direction="completion") > 0
+    assert metrics.image_call_duration.count(provider="stub") == 1
+    assert metrics.image_payload_bytes.sum(provider="stub") > 0
+
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert ('orchestro_step_duration_seconds_count{agent="image_agent",workflow_type="social_media"} 1'
+            in response.text.splitlines())
+    assert "# TYPE orchestro_sse_streams_active gauge" in response.text
+
+def test_json_store_writes_are_measured():
+    metrics.metrics.reset()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            snapshot = jsonsaver.JsonSaver(storage_mode="snapshot", shared=False)
+            snapshot.create_thread("t1", "first", "linkedin_blog")
+            threads_size = os.path.getsize(jsonsaver.THREADS_FILE)
+            log = jsonsaver.JsonSaver(storage_mode="log", shared=False)
+            log.create_thread("t2", "second", "linkedin_blog")
+            log.update_thread_status("t2", "running")
+            log_size = os.path.getsize(jsonsaver.THREADS_LOG_FILE)
+            log.close()
+        finally:
+            os.chdir(cwd)
+
+    assert metrics.store_file_write_duration.count(file=jsonsaver.THREADS_FILE) >= 1
+    assert metrics.store_file_bytes.value(file=jsonsaver.THREADS_FILE) == threads_size
+    assert metrics.store_file_write_duration.count(file=jsonsaver.THREADS_LOG_FILE) == 2
+    assert metrics.store_write_bytes.sum(file=jsonsaver.THREADS_LOG_FILE) == log_size
+    assert metrics.store_file_bytes.value(file=jsonsaver.THREADS_LOG_FILE) == log_size
+
+def test_write_behind_batches_are_measured_per_backend():
+    metrics.metrics.reset()
+    saver = WriteBehindSaver(store=SqliteSaver(":memory:"), flush_interval=0.0)
+    saver.create_thread("t1", "first", "linkedin_blog")
+    saver.update_thread_status("t1", "running")
+    saver.put_by_thread_id("t1", {"step": 1})
+    saver.close()
+    assert metrics.store_write_duration.count(backend="sqlite") == 3
+    assert metrics.store_write_duration.sum(backend="sqlite") > 0
+
+def test_retries_and_errors_are_counted():
+    metrics.metrics.reset()
+
+    class Flaky(registry.get_provider("stub").__class__):
+        failures = 1
+
+        async def generate_image(self, prompt):
+            if self.failures:
+                self.failures -= 1
+                raise aiohttp.ClientError("connection reset")
+            return b"image", "image/png"
+
+    original = registry._instances["stub"]
+    original_wait = image_agent.call_image_api.retry.wait
+    registry._instances["stub"] = Flaky(distribution="fixed", latency_mean=0)
+    image_agent.call_image_api.retry.wait = wait_none()
+
+    async def run():
+        with registry.use_provider("stub"):
+            return await image_agent.call_image_api("a flaky robot")
+
+    try:
+        assert asyncio.run(run()) == (b"image", "image/png")
+    finally:
+        registry._instances["stub"] = original
+        image_agent.call_image_api.retry.wait = original_wait
+
+    assert metrics.retries_total.value(operation="call_image_api") == 1
+    assert metrics.errors_total.value(component="image_api") == 1
+    assert metrics.image_call_duration.count(provider="stub") == 2
+    assert metrics.image_payload_bytes.count(provider="stub") == 1
+
+if __name__ == "__main__":
+    print("🧪 Testing the metrics...")
+    test_text_exposition_format()
+    test_workflow_run_is_measured_and_served()
+    test_json_store_writes_are_measured()
+    test_write_behind_batches_are_measured_per_backend()
+    test_retries_and_errors_are_counted()
+    print("✅ All metrics tests passed")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests that workflow runs persist thread progress through the ProgressTracker only,
+with no duplicate or no-op writes.
+Run this from the backend directory: python test_progress_tracker.py
+"""
+
+import asyncio
+
+from app.agents.registry import AGENTS
+from app.Services.progress_tracker import ProgressTracker
+from app.Services.workflow_service import WorkflowService
+from app.Schemas.workflow_schema import ThreadStatus
+
+class CountingStore:
+    """In-memory thread store that records every write it receives."""
+
+    def __init__(self):
+        self.threads = {}
+        self.states = {}
+        self.writes = []
+
+    def create_thread(self, thread_id, name, workflow_type):
+        self.writes.append(("create_thread", thread_id))
+        self.threads[thread_id] = {"thread_id": thread_id, "status": ThreadStatus.PENDING, "progress": {}}
+        return self.threads[thread_id]
+
+    def update_thread(self, thread_id, **changes):
+        self.writes.append(("update_thread", changes))
+        thread = self.threads[thread_id]
+        if "status" in changes:
+            thread["status"] = changes["status"]
+        thread["progress"].update(changes)
+        return True
+
+    def get_thread_info(self, thread_id):
+        return self.threads.get(thread_id)
+
+    def has_thread(self, thread_id):
+        return thread_id in self.threads
+
+    def put_by_thread_id(self, thread_id, state):
+        self.writes.append(("put_by_thread_id", thread_id))
+        self.states[thread_id] = state
+
+    def get_by_thread_id(self, thread_id):
+        return self.states.get(thread_id)
+
+async def run_workflow(service, prompt, thread_id):
+    events = []
+    async for event in service.orchestrate_workflow(prompt, thread_id):
+        events.append(event)
+    return events
+
+def test_write_budget_per_step():
+    """
+    A run costs one progress write per step plus the start and completion transitions,
+    and one checkpoint per step plus the initial one and one before each side-effect step.
+    """
+    store = CountingStore()
+    tracker = ProgressTracker(store)
+    service = WorkflowService(tracker, agent_backend="synthetic")
+
+    async def no_work(agent_name):
+        return None
+    service.simulate_agent_work = no_work
+
+    prompt = "Create a LinkedIn post about artificial intelligence"
+    tracker.create("run-1", prompt, service.detect_workflow_type(prompt))
+    events = asyncio.run(run_workflow(service, prompt, "run-1"))
+
+    steps = service.workflows["linkedin_blog"]["steps"]
+    total_steps = len(steps)
+    side_effect_steps = [step for step in steps if AGENTS[step].get("side_effect")]
+    updates = [changes for name, changes in store.writes if name == "update_thread"]
+    checkpoints = [name for name, _ in store.writes if name == "put_by_thread_id"]
+    assert events[-1]["node"] == "__end__"
+    assert len(updates) <= total_steps + 2, updates
+    assert len(checkpoints) == 1 + total_steps + len(side_effect_steps), store.writes
+    assert updates[-1]["status"] == ThreadStatus.COMPLETED
+    assert store.threads["run-1"]["progress"]["completed_steps"] == total_steps
+
+def test_noop_transitions_are_dropped():
+    """Re-emitting an event that changes nothing does not touch the store."""
+    store = CountingStore()
+    tracker = ProgressTracker(store)
+    tracker.create("run-2", "prompt", "linkedin_blog")
+
+    event = {"type": "progress", "thread_id": "run-2",
+             "progress": {"completed": 1, "total": 3, "current_step": "image_agent"}}
+    tracker.emit(dict(event))
+    tracker.emit(dict(event))
+    assert tracker.set_status("run-2", ThreadStatus.PAUSED, "paused")
+    assert tracker.set_status("run-2", ThreadStatus.PAUSED, "paused")
+
+    updates = [changes for name, changes in store.writes if name == "update_thread"]
+    assert len(updates) == 2, updates
+
+def test_subscribers_receive_every_event():
+    store = CountingStore()
+    tracker = ProgressTracker(store)
+    tracker.create("run-3", "prompt", "linkedin_blog")
+    received = []
+    unsubscribe = tracker.subscribe(received.append)
+
+    tracker.emit({"type": "step_start", "node": "ideation_agent", "thread_id": "run-3"})
+    unsubscribe()
+    tracker.emit({"type": "step_complete", "node": "ideation_agent", "thread_id": "run-3"})
+
+    assert [event["type"] for event in received] == ["step_start"]
+    assert not [name for name, _ in store.writes if name != "create_thread"]
+
+if __name__ == "__main__":
+    for test in (test_write_budget_per_step, test_noop_transitions_are_dropped, test_subscribers_receive_every_event):
+        test()
+        print(f"✅ {test.__name__}")
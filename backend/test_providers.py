@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable model providers and the deterministic stub provider.
+Run this from the backend directory: python test_providers.py
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+
+from app.Services import llm_service
+from app.Services.admission import admission
+from app.Services.blob_store import blob_store
+from app.Services.progress_tracker import ProgressTracker
+from app.Services.workflow_service import WorkflowService
+from app.providers import registry
+from app.providers.base import LLMProvider, ProviderError
+from app.providers.stub_provider import StubProvider
+from test_progress_tracker import CountingStore
+
+PROMPT = "Create a social media campaign about renewable energy"
+
+def test_stub_outputs_are_deterministic():
+    first = StubProvider(distribution="fixed", latency_mean=0, tokens_per_second=0, output_tokens=20)
+    second = StubProvider(distribution="fixed", latency_mean=0, tokens_per_second=0, output_tokens=20, seed=7)
+
+    async def run():
+        messages = [("system", "Be brief"), ("human", "Ideas about AI")]
+        streamed = "".join([chunk async for chunk in first.stream(messages)])
+        return (await first.generate(messages), await second.generate(messages), streamed,
+                await first.generate([("human", "Something else")]),
+                await first.generate_image("a robot"), await second.generate_image("a robot"))
+
+    answer, same, streamed, other, image, same_image = asyncio.run(run())
+    assert answer == same == streamed and len(answer.split()) == 20
+    assert other != answer
+    assert image == same_image and image[0].startswith(b"\x89PNG") and image[1] == "image/png"
+
+def test_stub_latency_distributions_and_errors():
+    fixed = StubProvider(distribution="fixed", latency_mean=0.2)
+    assert fixed.sample_latency(0.2) == 0.2
+    for distribution in ("exponential", "lognormal"):
+        provider = StubProvider(distribution=distribution, latency_mean=0.2, seed=1)
+        samples = [provider.sample_latency(0.2) for _ in range(5000)]
+        assert abs(statistics.mean(samples) - 0.2) < 0.02
+        repeated = StubProvider(distribution=distribution, seed=1)
+        assert samples == [repeated.sample_latency(0.2) for _ in range(5000)]
+
+    failing = StubProvider(distribution="fixed", latency_mean=0, tokens_per_second=0, error_rate=0.5, seed=3)
+
+    async def attempt():
+        try:
+            await failing.generate([("human", "hi")])
+            return True
+        except ProviderError:
+            return False
+
+    async def run():
+        return [await attempt() for _ in range(400)]
+
+    failures = sum(1 for ok in asyncio.run(run()) if not ok)
+    assert 150 < failures < 250
+
+def test_stub_streams_at_its_token_rate():
+    provider = StubProvider(distribution="fixed", latency_mean=0.05, tokens_per_second=200, output_tokens=40)
+
+    async def run():
+        start = time.perf_counter()
+        arrivals = []
+        async for _ in provider.stream([("human", "Say something")]):
+            arrivals.append(time.perf_counter() - start)
+        return arrivals
+
+    arrivals = asyncio.run(run())
+    assert len(arrivals) == 10
+    assert 0.05 <= arrivals[0] < 0.15
+    # 36 more tokens at 200 tokens per second
+    assert arrivals[-1] - arrivals[0] >= 0.17
+
+def test_workflow_uses_its_configured_provider():
+    stub = registry.get_provider("stub")
+    settings = dict(vars(stub))
+    original_root = blob_store.root
+    stub.latency_mean, stub.image_latency_mean, stub.tokens_per_second, stub.error_rate = 0.01, 0.01, 0, 0
+    registry.WORKFLOW_PROVIDERS["social_media"] = "stub"
+    store = CountingStore()
+    service = WorkflowService(ProgressTracker(store))
+    admitted = {name: limiter.stats()["lanes"]["batch"]["admitted"] for name, limiter in admission.limiters.items()}
+
+    async def run():
+        return [event async for event in service.orchestrate_workflow(PROMPT, "stub-run")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        blob_store.root = directory
+        try:
+            service.tracker.create("stub-run", PROMPT, service.detect_workflow_type(PROMPT))
+            events = asyncio.run(run())
+        finally:
+            del registry.WORKFLOW_PROVIDERS["social_media"]
+            vars(stub).update(settings)
+            blob_store.root = original_root
+
+    assert events[0]["provider"] == "stub"
+    assert events[-1]["type"] == "workflow_complete"
+    state = store.get_by_thread_id("stub-run")
+    assert state["image_data"].startswith("/api/blobs/")
+    assert state["script"] and "error" not in state["script"].lower()
+    # The stub's calls are admitted against its own limits, not the Gemini quotas
+    now_admitted = {name: limiter.stats()["lanes"]["batch"]["admitted"] for name, limiter in admission.limiters.items()}
+    assert now_admitted["stub_text"] > admitted["stub_text"] and now_admitted["stub_image"] > admitted["stub_image"]
+    assert now_admitted["gemini_text"] == admitted["gemini_text"]
+    assert now_admitted["gemini_image"] == admitted["gemini_image"]
+    # Outside the run, model calls still go to the default provider
+    assert registry.get_provider().name == registry.LLM_PROVIDER
+
+def test_prompts_accept_text_pairs_and_message_objects():
+    class Message:
+        def __init__(self, type, content):
+            self.type, self.content = type, content
+
+    assert llm_service.to_messages("hi") == [("human", "hi")]
+    assert llm_service.to_messages([("system", "a"), Message("human", "b")]) == [("system", "a"), ("human", "b")]
+
+def test_incomplete_provider_fails_when_built():
+    class TextOnly(LLMProvider):
+        def text_model(self):
+            return "text-only"
+
+        async def generate(self, messages):
+            return "answer"
+
+    try:
+        TextOnly()
+    except TypeError as e:
+        assert "generate_image" in str(e)
+    else:
+        raise AssertionError("a provider without image generation was built")
+
+if __name__ == "__main__":
+    print("🧪 Testing the model providers...")
+    test_stub_outputs_are_deterministic()
+    test_stub_latency_distributions_and_errors()
+    test_stub_streams_at_its_token_rate()
+    test_workflow_uses_its_configured_provider()
+    test_prompts_accept_text_pairs_and_message_objects()
+    test_incomplete_provider_fails_when_built()
+    print("✅ All provider tests passed")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for crash recovery of interrupted workflow runs.
+Run this from the backend directory: python test_recovery.py
+"""
+
+import asyncio
+
+from app.jsonsaver import json_saver
+from app.routes import workflow
+from app.Services.job_runner import job_runner
+from app.Services.run_leases import run_leases
+from app.Services.progress_tracker import ProgressTracker, progress_tracker
+from app.Services.workflow_service import WorkflowService
+from app.Schemas.workflow_schema import ThreadStatus
+from test_progress_tracker import CountingStore
+
+PROMPT = "Create a LinkedIn post about artificial intelligence"
+
+def test_interrupted_side_effect_step_is_not_repeated():
+    store = CountingStore()
+    service = WorkflowService(ProgressTracker(store), agent_backend="synthetic")
+    service.tracker.create("crashed", PROMPT, "linkedin_blog")
+    state = service.initial_state(PROMPT, "crashed")
+    state.update({"script": "script", "image_data": "image"})
+    # The process died while linkedin_agent was posting
+    service.checkpoint("crashed", state, "linkedin_blog", ["ideation_agent", "image_agent"], ["linkedin_agent"])
+
+    async def run():
+        return [event async for event in service.orchestrate_workflow(PROMPT, "crashed", resume=True)]
+
+    events = asyncio.run(run())
+    assert not [event for event in events if event["type"] == "step_start"]
+    interrupted = [event for event in events if event.get("interrupted")]
+    assert [event["node"] for event in interrupted] == ["linkedin_agent"]
+    assert "not run again" in interrupted[0]["output"]
+    assert events[-1]["node"] == "__end__"
+    assert store.threads["crashed"]["status"] == ThreadStatus.COMPLETED
+
+def test_startup_recovery_requeues_running_threads():
+    original = workflow.workflow_service
+    workflow.workflow_service = WorkflowService(agent_backend="synthetic")
+    try:
+        async def run():
+            progress_tracker.create("stuck", PROMPT, "linkedin_blog")
+            progress_tracker.set_status("stuck", ThreadStatus.RUNNING, "image_agent")
+            state = workflow.workflow_service.initial_state(PROMPT, "stuck")
+            state["script"] = "script"
+            workflow.workflow_service.checkpoint("stuck", state, "linkedin_blog", ["ideation_agent"])
+
+            recovered = await workflow.recover_interrupted_runs(startup=True)
+            while job_runner.is_active("stuck"):
+                await asyncio.sleep(0.01)
+            await job_runner.aclose()
+            return recovered
+
+        recovered = asyncio.run(run())
+        assert "stuck" in recovered
+        thread = json_saver.get_thread_info("stuck")
+        assert thread["status"] == ThreadStatus.COMPLETED
+        assert json_saver.get_by_thread_id("stuck")["progress"]["completed_steps"] == [
+            "ideation_agent", "image_agent", "linkedin_agent"
+        ]
+    finally:
+        workflow.workflow_service = original
+        json_saver.delete_thread("stuck")
+
+def test_recovery_requeues_runs_that_never_started():
+    original = workflow.workflow_service
+    workflow.workflow_service = WorkflowService(agent_backend="synthetic")
+    try:
+        # Queued by a process that died before a worker picked the run up
+        progress_tracker.create("queued", PROMPT, "linkedin_blog")
+        assert json_saver.get_thread_info("queued")["status"] == ThreadStatus.PENDING
+        assert json_saver.claim_run("queued", "dead-process", ttl=-1)
+
+        async def run():
+            recovered = await workflow.recover_interrupted_runs()
+            while job_runner.is_active("queued"):
+                await asyncio.sleep(0.01)
+            await job_runner.aclose()
+            return recovered
+
+        assert "queued" in asyncio.run(run())
+        assert json_saver.get_thread_info("queued")["status"] == ThreadStatus.COMPLETED
+        assert json_saver.get_by_thread_id("queued")["progress"]["completed_steps"] == [
+            "ideation_agent", "image_agent", "linkedin_agent"
+        ]
+    finally:
+        workflow.workflow_service = original
+        json_saver.delete_thread("queued")
+
+def test_recovery_skips_runs_leased_by_a_live_process():
+    original = workflow.workflow_service
+    workflow.workflow_service = WorkflowService(agent_backend="synthetic")
+    try:
+        progress_tracker.create("elsewhere", PROMPT, "linkedin_blog")
+        progress_tracker.set_status("elsewhere", ThreadStatus.RUNNING, "ideation_agent")
+        # Another server process is executing this run
+        assert json_saver.claim_run("elsewhere", "other-process", ttl=60)
+        assert not run_leases.acquire("elsewhere")
+
+        async def recover():
+            recovered = await workflow.recover_interrupted_runs()
+            await job_runner.aclose()
+            return recovered
+
+        assert "elsewhere" not in asyncio.run(recover())
+
+        # Once its lease expires, the run is taken over
+        assert json_saver.claim_run("elsewhere", "other-process", ttl=-1)
+
+        async def take_over():
+            recovered = await workflow.recover_interrupted_runs()
+            while job_runner.is_active("elsewhere"):
+                await asyncio.sleep(0.01)
+            await job_runner.aclose()
+            return recovered
+
+        assert "elsewhere" in asyncio.run(take_over())
+        assert json_saver.get_thread_info("elsewhere")["status"] == ThreadStatus.COMPLETED
+        assert "elsewhere" not in run_leases.held
+    finally:
+        workflow.workflow_service = original
+        json_saver.delete_thread("elsewhere")
+
+def test_startup_recovery_skips_runs_without_lease_or_checkpoint():
+    try:
+        # Imported from threads.json: nothing says it ever ran
+        progress_tracker.create("legacy", PROMPT, "linkedin_blog")
+        progress_tracker.set_status("legacy", ThreadStatus.RUNNING, "ideation_agent")
+        # Finished, but its process died before giving up the lease
+        progress_tracker.create("finished", PROMPT, "linkedin_blog")
+        progress_tracker.set_status("finished", ThreadStatus.COMPLETED)
+        assert json_saver.claim_run("finished", "dead-process", ttl=-1)
+
+        async def recover():
+            recovered = await workflow.recover_interrupted_runs(startup=True)
+            await job_runner.aclose()
+            return recovered
+
+        assert asyncio.run(recover()) == []
+        assert json_saver.get_thread_info("legacy")["status"] == ThreadStatus.RUNNING
+        assert "finished" not in json_saver.expired_runs()
+    finally:
+        json_saver.delete_thread("legacy")
+        json_saver.delete_thread("finished")
+
+def test_async_lease_operations_track_held_runs():
+    async def scenario():
+        assert await run_leases.aacquire("leased")
+        assert "leased" in run_leases.held
+        assert await run_leases.arenew() == []
+        # Taken over by another process after this one missed its renewals
+        assert json_saver.claim_run("leased", run_leases.owner, ttl=-1)
+        assert json_saver.claim_run("leased", "new-owner", ttl=60)
+        assert await run_leases.arenew() == ["leased"]
+        assert "leased" not in run_leases.held
+        assert not await run_leases.aacquire("leased")
+        json_saver.release_run("leased", "new-owner")
+
+        assert await run_leases.aacquire("leased")
+        await run_leases.arelease("leased")
+        assert "leased" not in run_leases.held
+        assert json_saver.claim_run("leased", "other-process", ttl=60)
+        json_saver.release_run("leased", "other-process")
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing crash recovery...")
+    test_interrupted_side_effect_step_is_not_repeated()
+    test_startup_recovery_requeues_running_threads()
+    test_recovery_requeues_runs_that_never_started()
+    test_recovery_skips_runs_leased_by_a_live_process()
+    test_startup_recovery_skips_runs_without_lease_or_checkpoint()
+    test_async_lease_operations_track_held_runs()
+    print("✅ All recovery tests passed")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight deduplication of identical in-flight calls.
+Run this from the backend directory: python test_single_flight.py
+"""
+
+import asyncio
+
+from app.Services import llm_service
+from app.Services.llm_cache import LLMCache
+from app.Services.model_clients import LazyClient
+from app.providers.registry import get_provider
+from app.Services.single_flight import SingleFlight
+from app.Services.step_metrics import measure_step
+from app.Services.token_stream import stream_to
+
+# Fake chat models stand in for the client of the Gemini provider
+gemini = get_provider("gemini")
+
+def slow_call(counter, result="result", delay=0.05):
+    async def call():
+        counter["runs"] += 1
+        await asyncio.sleep(delay)
+        return result
+    return call
+
+def test_identical_calls_share_one_execution():
+    flights, counter = SingleFlight("test"), {"runs": 0}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", slow_call(counter)) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert counter["runs"] == 1
+    assert flights.stats()["coalesced"] == 4 and flights.in_flight() == 0
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flights, counter = SingleFlight("test"), {"runs": 0}
+
+    async def run():
+        first = asyncio.create_task(flights.do("key", slow_call(counter)))
+        second = asyncio.create_task(flights.do("key", slow_call(counter)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        assert first.cancelled()
+        return result
+
+    assert asyncio.run(run()) == "result"
+    assert counter["runs"] == 1
+    assert flights.stats()["cancelled_waiters"] == 1 and flights.stats()["abandoned"] == 0
+
+def test_call_is_abandoned_when_every_caller_cancels():
+    flights, counter = SingleFlight("test"), {"runs": 0}
+
+    async def run():
+        callers = [asyncio.create_task(flights.do("key", slow_call(counter, delay=1))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights.in_flight()
+
+    assert asyncio.run(run()) == 0
+    assert flights.stats()["abandoned"] == 1
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_generate_text_coalesces_concurrent_prompts():
+    class SlowModel:
+        model = "fake-model"
+        calls = 0
+
+        async def ainvoke(self, messages):
+            SlowModel.calls += 1
+            await asyncio.sleep(0.05)
+            return type("Response", (), {"content": "ideas"})()
+
+    original_model, original_cache = gemini.chat_model, llm_service.llm_cache
+    gemini.chat_model, llm_service.llm_cache = LazyClient("gemini_chat", SlowModel), LLMCache(enabled=False)
+    try:
+        async def run():
+            return await asyncio.gather(*(llm_service.generate_text("Trending topic") for _ in range(4)))
+
+        assert asyncio.run(run()) == ["ideas"] * 4
+    finally:
+        gemini.chat_model, llm_service.llm_cache = original_model, original_cache
+    assert SlowModel.calls == 1
+
+def test_coalesced_callers_get_the_stream_and_metrics():
+    class Chunk:
+        def __init__(self, content):
+            self.content = content
+
+    class StreamingModel:
+        model = "fake-model"
+        calls = 0
+
+        async def astream(self, messages):
+            StreamingModel.calls += 1
+            for text in ("Hook", " and ", "caption"):
+                await asyncio.sleep(0.02)
+                yield Chunk(text)
+
+    async def step(delay):
+        await asyncio.sleep(delay)
+        chunks = []
+        with measure_step() as metrics, stream_to(chunks.append):
+            text = await llm_service.generate_text("Write a post")
+        return text, chunks, metrics
+
+    original_model, original_cache = gemini.chat_model, llm_service.llm_cache
+    gemini.chat_model, llm_service.llm_cache = LazyClient("gemini_chat", StreamingModel), LLMCache(enabled=False)
+    try:
+        async def run():
+            # The second step joins after the first chunk has been streamed
+            return await asyncio.gather(step(0), step(0.03))
+
+        results = asyncio.run(run())
+    finally:
+        gemini.chat_model, llm_service.llm_cache = original_model, original_cache
+    assert StreamingModel.calls == 1
+    for text, chunks, metrics in results:
+        assert text == "Hook and caption" and "".join(chunks) == text
+        assert metrics.llm_calls == 1 and metrics.llm_time > 0
+        assert metrics.first_token_time is not None
+    assert llm_service._streams == {}
+
+if __name__ == "__main__":
+    print("🧪 Testing single-flight deduplication...")
+    test_identical_calls_share_one_execution()
+    test_cancelled_caller_does_not_cancel_shared_call()
+    test_call_is_abandoned_when_every_caller_cancels()
+    test_errors_reach_every_caller()
+    test_generate_text_coalesces_concurrent_prompts()
+    test_coalesced_callers_get_the_stream_and_metrics()
+    print("✅ All single-flight tests passed")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite thread/state store.
+Run this from the backend directory: python test_sqlitesaver.py
+"""
+
+import json
+import os
+import tempfile
+
+from app.jsonsaver import JsonSaver, THREADS_FILE
+from app.sqlitesaver import SqliteSaver
+from app.thread_query import new_thread_info, status_value
+from app.Schemas.workflow_schema import ThreadStatus
+
+def test_json_files_are_imported_once():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            legacy = JsonSaver(storage_mode="snapshot")
+            legacy.create_thread("old-1", "first", "linkedin_blog")
+            legacy.create_thread("old-2", "second", "social_media")
+            legacy.update_thread_status("old-1", ThreadStatus.COMPLETED, "completed")
+            legacy.put_by_thread_id("old-1", {"script": "a script"})
+
+            store = SqliteSaver("orchestro.db")
+            thread = store.get_thread_info("old-1")
+            assert status_value(thread["status"]) == "completed"
+            assert thread["progress"]["current_step"] == "completed"
+            assert store.get_thread_info("old-2")["workflow_type"] == "social_media"
+            assert store.get_by_thread_id("old-1") == {"script": "a script"}
+            store.delete_thread("old-2")
+            store.close()
+
+            # A database that already holds threads never imports the files again
+            legacy.create_thread("old-3", "third", "linkedin_blog")
+            with open(THREADS_FILE) as f:
+                assert "old-3" in json.load(f)
+            reopened = SqliteSaver("orchestro.db")
+            assert reopened.get_thread_info("old-2") is None and reopened.get_thread_info("old-3") is None
+            assert [thread["thread_id"] for thread in reopened.get_all_threads()] == ["old-1"]
+            reopened.close()
+        finally:
+            os.chdir(cwd)
+
+def test_batch_deletes_then_recreates_then_patches():
+    store = SqliteSaver(":memory:")
+    store.create_thread("t1", "original", "linkedin_blog")
+    store.update_thread_status("t1", ThreadStatus.FAILED, "image_agent", "boom")
+    store.put_by_thread_id("t1", {"script": "old"})
+    store.create_thread("t2", "untouched", "linkedin_blog")
+
+    recreated = new_thread_info("t1", "recreated", "social_media")
+    store.apply_thread_changes({
+        "t1": {"deleted": True, "thread": recreated,
+               "fields": {"status": ThreadStatus.RUNNING}, "progress": {"status": ThreadStatus.RUNNING, "current_step": "ideation_agent"}},
+        "t2": {"deleted": True, "thread": None, "fields": {}, "progress": {}},
+        # A patch of a thread that does not exist changes nothing
+        "t3": {"deleted": False, "thread": None, "fields": {"status": ThreadStatus.RUNNING}, "progress": {}},
+    })
+
+    thread = store.get_thread_info("t1")
+    assert thread["name"] == "recreated" and thread["workflow_type"] == "social_media"
+    assert status_value(thread["status"]) == "running"
+    assert thread["progress"]["current_step"] == "ideation_agent"
+    # The failed run's progress and state went with the delete
+    assert thread["progress"]["error_message"] is None and thread["progress"]["completed_steps"] == 0
+    assert store.get_by_thread_id("t1") is None
+    assert store.get_thread_info("t2") is None and store.get_thread_info("t3") is None
+
+def test_put_states_inserts_and_replaces():
+    store = SqliteSaver(":memory:")
+    store.put_by_thread_id("a", {"script": "first"})
+    store.put_states({"a": {"script": "second", "image_data": "/api/blobs/x"}, "b": {"script": "other"}})
+    assert store.get_by_thread_id("a") == {"script": "second", "image_data": "/api/blobs/x"}
+    assert store.get_by_thread_id("b") == {"script": "other"}
+    store.put_states({})
+    assert store.get_by_thread_id("missing") is None
+
+def test_progress_updates_merge_into_the_stored_progress():
+    store = SqliteSaver(":memory:")
+    created = store.create_thread("t1", "thread", "linkedin_blog")
+    assert store.update_thread_progress("t1", 1, 3, "image_agent")
+    assert store.update_thread_status("t1", ThreadStatus.RUNNING)
+    assert store.update_thread("t1", completed_steps=2, error_message="slow image API")
+    assert not store.update_thread_progress("missing", 1, 3, "image_agent")
+
+    progress = store.get_thread_info("t1")["progress"]
+    # Only the patched keys changed; the rest of the progress document is kept
+    assert progress["completed_steps"] == 2 and progress["total_steps"] == 3
+    assert progress["current_step"] == "image_agent"
+    assert status_value(progress["status"]) == "running"
+    assert progress["error_message"] == "slow image API"
+    assert progress["start_time"] == created["progress"]["start_time"]
+    assert progress["last_updated"] > created["progress"]["last_updated"]
+
+def test_pause_requests_follow_the_run_lease():
+    store = SqliteSaver(":memory:")
+    assert store.claim_run("t1", "worker-a", ttl=60)
+    assert not store.request_run_pause("t1", "worker-a") and not store.request_run_pause("t2", "worker-b")
+    assert store.request_run_pause("t1", "worker-b")
+    # The request stays with the run while its lease is renewed
+    assert store.renew_runs(["t1"], "worker-a", ttl=60) == ["t1"]
+    assert store.take_run_pauses("worker-b") == []
+    assert store.take_run_pauses("worker-a") == ["t1"] and store.take_run_pauses("worker-a") == []
+    assert store.request_run_pause("t1", "worker-b") and store.withdraw_run_pause("t1")
+    assert not store.withdraw_run_pause("t1")
+    # Releasing the run drops its request, so the next run of the thread is not paused
+    assert store.request_run_pause("t1", "worker-b")
+    store.release_run("t1", "worker-a")
+    assert store.claim_run("t1", "worker-b", ttl=60) and store.take_run_pauses("worker-b") == []
+
+if __name__ == "__main__":
+    print("🧪 Testing the SQLite thread store...")
+    test_json_files_are_imported_once()
+    test_batch_deletes_then_recreates_then_patches()
+    test_put_states_inserts_and_replaces()
+    test_progress_updates_merge_into_the_stored_progress()
+    test_pause_requests_follow_the_run_lease()
+    print("✅ All SQLite thread store tests passed")
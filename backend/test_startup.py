@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazy startup: model clients and the thread store are only built when used.
+Run this from the backend directory: python test_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from app.Services.model_clients import LazyClient
+from app.write_behind import WriteBehindSaver
+
+def test_app_starts_without_api_key_or_provider_sdks():
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    env.update({"SQLITE_DB_FILE": ":memory:", "PREWARM_MODEL_CLIENTS": "false"})
+    code = (
+        "import json, sys\n"
+        "import app.main\n"
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app.main.app) as client:\n"
+        "    status = client.get('/api/threads').status_code\n"
+        "print(json.dumps({'status': status, 'loaded': [name for name in "
+        "('langchain_google_genai', 'langchain_core', 'google.generativeai') if name in sys.modules]}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {"status": 200, "loaded": []}
+
+def test_lazy_client_is_built_once_on_first_use():
+    builds = []
+
+    def factory():
+        time.sleep(0.05)
+        builds.append(1)
+        return object()
+
+    client = LazyClient("test", factory)
+    assert not client.built and builds == []
+    clients = []
+    workers = [threading.Thread(target=lambda: clients.append(client.get())) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(builds) == 1 and len({id(built) for built in clients}) == 1
+    client.reset()
+    assert client.get() is not clients[0] and len(builds) == 2
+
+def test_thread_store_is_opened_on_first_use():
+    opened = []
+
+    class Store:
+        def __init__(self):
+            opened.append(self)
+
+        def get_thread_info(self, thread_id):
+            return None
+
+        def thread_ids(self):
+            return []
+
+    saver = WriteBehindSaver(flush_interval=0.0, open_store=Store)
+    assert opened == []
+    saver.close()
+    assert opened == []
+    assert saver.get_thread_info("missing") is None
+    assert len(opened) == 1 and saver.store is opened[0]
+
+if __name__ == "__main__":
+    print("🧪 Testing the lazy startup...")
+    test_app_starts_without_api_key_or_provider_sdks()
+    test_lazy_client_is_built_once_on_first_use()
+    test_thread_store_is_opened_on_first_use()
+    print("✅ All startup tests passed")
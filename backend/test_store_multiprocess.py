@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test of the thread stores: several processes create,
+update and delete threads and race for run leases on the same store, as
+uvicorn workers do, and no update may be lost.
+Run this from the backend directory: python test_store_multiprocess.py
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+from app.jsonsaver import JsonSaver
+from app.sqlitesaver import SqliteSaver
+from app.write_behind import WriteBehindSaver
+from app.Schemas.workflow_schema import ThreadStatus
+
+WORKERS = 4
+THREADS_PER_WORKER = 30
+RACED_RUNS = 20
+
+def open_store(backend, directory):
+    # Unstarted, the write-behind saver writes through, the way a request handler's change ends up in the store
+    os.chdir(directory)
+    if backend == "sqlite":
+        return WriteBehindSaver(SqliteSaver(os.path.join(directory, "orchestro.db")), 0.2)
+    return WriteBehindSaver(JsonSaver(shared=True), 0.2)
+
+def worker(backend, directory, worker_id, start, results):
+    store = open_store(backend, directory)
+    start.wait()
+    won = []
+    for i in range(THREADS_PER_WORKER):
+        thread_id = f"w{worker_id}-{i}"
+        store.create_thread(thread_id, f"prompt {thread_id}", "linkedin_blog")
+        store.update_thread_status(thread_id, ThreadStatus.RUNNING, "ideation_agent")
+        store.update_thread_progress(thread_id, i, THREADS_PER_WORKER, "image_agent")
+        store.put_by_thread_id(thread_id, {"owner": worker_id, "step": i})
+        if i % 5 == 0:
+            store.delete_thread(thread_id)
+        if i < RACED_RUNS and store.claim_run(f"race-{i}", f"worker-{worker_id}", ttl=60):
+            won.append(f"race-{i}")
+    store.close()
+    results.put((worker_id, won))
+
+def run_stress(backend):
+    context = multiprocessing.get_context("spawn")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        start, results = context.Event(), context.Queue()
+        processes = [
+            context.Process(target=worker, args=(backend, directory, worker_id, start, results))
+            for worker_id in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        start.set()
+        won = dict(results.get(timeout=120) for _ in processes)
+        for process in processes:
+            process.join(timeout=30)
+            assert process.exitcode == 0
+
+        store = open_store(backend, directory)
+        try:
+            threads = {thread["thread_id"]: thread for thread in store.get_all_threads()}
+            for worker_id in range(WORKERS):
+                for i in range(THREADS_PER_WORKER):
+                    thread_id = f"w{worker_id}-{i}"
+                    if i % 5 == 0:
+                        assert thread_id not in threads, thread_id
+                        assert store.get_by_thread_id(thread_id) is None
+                        continue
+                    thread = threads[thread_id]
+                    assert thread["status"] == ThreadStatus.RUNNING
+                    assert thread["progress"]["completed_steps"] == i
+                    assert thread["progress"]["current_step"] == "image_agent"
+                    assert store.get_by_thread_id(thread_id) == {"owner": worker_id, "step": i}
+            assert len(threads) == WORKERS * (THREADS_PER_WORKER - THREADS_PER_WORKER // 5)
+
+            # Every raced run was leased to exactly one process
+            claimed = sorted(run for runs in won.values() for run in runs)
+            assert claimed == sorted(f"race-{i}" for i in range(RACED_RUNS))
+        finally:
+            store.close()
+            os.chdir(cwd)
+
+def test_sqlite_store_loses_no_updates_across_processes():
+    run_stress("sqlite")
+
+def test_shared_json_store_loses_no_updates_across_processes():
+    run_stress("json")
+
+if __name__ == "__main__":
+    print("🧪 Stress testing the thread stores with several processes...")
+    test_sqlite_store_loses_no_updates_across_processes()
+    test_shared_json_store_loses_no_updates_across_processes()
+    print("✅ No updates lost")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming model output (chat stream and step_delta events).
+Run this from the backend directory: python test_streaming.py
+"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.Services import llm_service
+from app.Services.llm_cache import LLMCache
+from app.Services.model_clients import LazyClient
+from app.providers.registry import get_provider
+from app.Services.workflow_graph import WorkflowGraph
+from app.agents.registry import AGENTS
+
+# Fake chat models stand in for the client of the Gemini provider
+gemini = get_provider("gemini")
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+class StreamingModel:
+    """Stands in for the Gemini chat model and streams a fixed answer in three chunks."""
+    model = "fake-model"
+
+    async def astream(self, messages):
+        for text in ("Hello", ", ", "world"):
+            await asyncio.sleep(0.01)
+            yield Chunk(text)
+
+    async def ainvoke(self, messages):
+        return Chunk("Hello, world")
+
+def with_fake_model(test):
+    def wrapper():
+        original_model, original_cache = gemini.chat_model, llm_service.llm_cache
+        gemini.chat_model, llm_service.llm_cache = LazyClient("gemini_chat", StreamingModel), LLMCache()
+        try:
+            test()
+        finally:
+            gemini.chat_model, llm_service.llm_cache = original_model, original_cache
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+@with_fake_model
+def test_stream_text_yields_chunks_then_cached_answer():
+    async def run():
+        first = [chunk async for chunk in llm_service.stream_text("Say hello")]
+        second = [chunk async for chunk in llm_service.stream_text("Say hello")]
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == ["Hello", ", ", "world"]
+    assert second == ["Hello, world"]
+
+@with_fake_model
+def test_chat_stream_endpoint_reports_time_to_first_token():
+    with TestClient(app) as client:
+        response = client.post("/api/chat/stream", json={"message": "Say hello, again"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "".join(line["content"] for line in lines if line["type"] == "token") == "Hello, world"
+    done = lines[-1]
+    assert done["type"] == "done"
+    assert 0 < done["time_to_first_token"] <= done["total_latency"]
+
+@with_fake_model
+def test_graph_forwards_step_deltas():
+    graph = WorkflowGraph(['ideation_agent'], AGENTS)
+
+    async def run_node(step, state):
+        return {"script": await llm_service.generate_text(f"Ideas for {state['topic']}")}
+
+    async def run():
+        return [record async for record in graph.run({"topic": "AI"}, run_node)]
+
+    records = asyncio.run(run())
+    deltas = [record["text"] for record in records if record["kind"] == "delta"]
+    complete = next(record for record in records if record["kind"] == "complete")
+    assert deltas == ["Hello", ", ", "world"]
+    assert complete["output"]["script"] == "Hello, world"
+    assert 0 < complete["metrics"]["first_token_time"] <= complete["metrics"]["wall_time"]
+
+if __name__ == "__main__":
+    print("🧪 Testing streaming output...")
+    test_stream_text_yields_chunks_then_cached_answer()
+    test_chat_stream_endpoint_reports_time_to_first_token()
+    test_graph_forwards_step_deltas()
+    print("✅ All streaming tests passed")
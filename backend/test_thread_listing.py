@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for paging, filtering, sorting and projecting thread listings (GET /api/threads),
+against both thread stores.
+Run this from the backend directory: python test_thread_listing.py
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.jsonsaver import JsonSaver
+from app.sqlitesaver import SqliteSaver
+from app.thread_query import new_thread_info, encode_cursor
+from app.Schemas.workflow_schema import ThreadStatus
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+
+def with_stores(test):
+    """Runs the test against a JSON store (in an empty directory) and a SQLite store."""
+    def run():
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                test(JsonSaver(storage_mode="snapshot"))
+            finally:
+                os.chdir(cwd)
+        test(SqliteSaver(":memory:"))
+    run.__name__ = test.__name__
+    return run
+
+def add_threads(store, count, tied=False):
+    """Adds threads t00..; with `tied` they all share one updated_at, otherwise t00 is the oldest."""
+    changes = {}
+    for index in range(count):
+        thread_id = f"t{index:02d}"
+        thread = new_thread_info(thread_id, f"thread {index}", "social_media" if index % 3 == 0 else "linkedin_blog")
+        moment = BASE if tied else BASE + timedelta(minutes=index)
+        thread["created_at"] = thread["updated_at"] = moment
+        if index % 2:
+            thread["status"] = thread["progress"]["status"] = ThreadStatus.COMPLETED
+        changes[thread_id] = {"deleted": False, "thread": thread, "fields": {}, "progress": {}}
+    store.apply_thread_changes(changes)
+
+def all_pages(store, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = store.list_threads(cursor=cursor, **kwargs)
+        ids.extend(thread["thread_id"] for thread in page["threads"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+@with_stores
+def test_cursor_pages_cover_every_thread_once(store):
+    add_threads(store, 23)
+    ids, pages = all_pages(store, limit=5)
+    assert ids == [f"t{index:02d}" for index in reversed(range(23))] and pages == 5
+    ids, _ = all_pages(store, limit=4, sort="created_at", order="asc")
+    assert ids == [f"t{index:02d}" for index in range(23)]
+    # A last page that is exactly full has no next cursor
+    assert store.list_threads(limit=23)["next_cursor"] is None
+
+@with_stores
+def test_ties_on_updated_at_are_paged_by_thread_id(store):
+    add_threads(store, 12, tied=True)
+    ids, _ = all_pages(store, limit=5)
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 12
+    ids, _ = all_pages(store, limit=5, order="asc")
+    assert ids == sorted(ids) and len(set(ids)) == 12
+
+@with_stores
+def test_filters_and_projection(store):
+    add_threads(store, 12)
+    completed, _ = all_pages(store, limit=2, status=ThreadStatus.COMPLETED)
+    assert completed == [f"t{index:02d}" for index in (11, 9, 7, 5, 3, 1)]
+    social, _ = all_pages(store, limit=2, workflow_type="social_media", order="asc")
+    assert social == ["t00", "t03", "t06", "t09"]
+    both, _ = all_pages(store, limit=10, status="completed", workflow_type="social_media")
+    assert both == ["t09", "t03"]
+
+    page = store.list_threads(limit=2, fields="name,status")
+    assert [sorted(thread) for thread in page["threads"]] == [["name", "status", "thread_id"]] * 2
+    # Projected pages still carry a usable cursor
+    assert store.list_threads(limit=2, fields="name", cursor=page["next_cursor"])["threads"][0]["thread_id"] == "t09"
+
+@with_stores
+def test_invalid_listings_are_rejected(store):
+    add_threads(store, 3)
+    for kwargs in ({"cursor": "not a cursor"}, {"fields": "name,secret"}, {"sort": "name"}, {"limit": 0},
+                   {"cursor": encode_cursor("created_at", "asc", BASE.isoformat(), "t00")}):
+        try:
+            store.list_threads(**kwargs)
+            assert False, f"{kwargs} must be rejected"
+        except ValueError:
+            pass
+
+def test_route_answers_bad_cursors_and_fields_with_400():
+    with TestClient(app) as client:
+        assert client.get("/api/threads", params={"limit": 1}).status_code == 200
+        assert client.get("/api/threads", params={"cursor": "garbage"}).status_code == 400
+        assert client.get("/api/threads", params={"fields": "name,secret"}).status_code == 400
+        other_order = encode_cursor("updated_at", "asc", BASE.isoformat(), "t00")
+        assert client.get("/api/threads", params={"cursor": other_order}).status_code == 400
+
+if __name__ == "__main__":
+    print("🧪 Testing thread listings...")
+    test_cursor_pages_cover_every_thread_once()
+    test_ties_on_updated_at_are_paged_by_thread_id()
+    test_filters_and_projection()
+    test_invalid_listings_are_rejected()
+    test_route_answers_bad_cursors_and_fields_with_400()
+    print("✅ All thread listing tests passed")
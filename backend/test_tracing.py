@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the tracing of workflow runs and the trace API.
+Run this from the backend directory: python test_tracing.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import aiohttp
+from fastapi.testclient import TestClient
+from tenacity import wait_none
+from app.main import app
+from app.jsonsaver import json_saver
+from app.sqlitesaver import SqliteSaver
+from app.write_behind import WriteBehindSaver
+from app.agents import image_agent
+from app.Services.blob_store import blob_store
+from app.Services.progress_tracker import ProgressTracker
+from app.Services.tracing import Tracer, tracer, trace_id_for
+from app.Services.workflow_service import WorkflowService
+from app.providers import registry
+
+PROMPT = "Create a social media campaign about observability"
+
+def find(spans, name):
+    """Every span of a tree with the given name, depth first."""
+    found = []
+    for span in spans:
+        if span["name"] == name:
+            found.append(span)
+        found.extend(find(span["children"], name))
+    return found
+
+def test_workflow_run_is_traced_per_step():
+    tracer.collector.clear()
+    stub = registry.get_provider("stub")
+    settings = dict(vars(stub))
+    original_root = blob_store.root
+    stub.latency_mean, stub.image_latency_mean, stub.tokens_per_second, stub.error_rate = 0.01, 0.01, 0, 0
+    registry.WORKFLOW_PROVIDERS["social_media"] = "stub"
+    saver = WriteBehindSaver(SqliteSaver(":memory:"))
+    service = WorkflowService(ProgressTracker(saver))
+
+    async def run():
+        return [event async for event in service.orchestrate_workflow(PROMPT, "traced-run")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        blob_store.root = directory
+        try:
+            service.tracker.create("traced-run", PROMPT, service.detect_workflow_type(PROMPT))
+            events = asyncio.run(run())
+        finally:
+            del registry.WORKFLOW_PROVIDERS["social_media"]
+            vars(stub).update(settings)
+            blob_store.root = original_root
+            saver.close()
+
+    assert events[-1]["type"] == "workflow_complete"
+    trace = tracer.trace("traced-run")
+    assert trace["trace_id"] == trace_id_for("traced-run")
+    [run_span] = find(trace["spans"], "workflow.run")
+    assert run_span["attributes"]["workflow.type"] == "social_media"
+    assert run_span["attributes"]["workflow.outcome"] == "completed"
+    assert not run_span["in_progress"] and run_span["status"] == "UNSET"
+
+    steps = [span["name"] for span in run_span["children"] if span["name"].startswith("step.")]
+    assert steps == ["step.ideation_agent", "step.image_agent", "step.posting_agent"]
+    [ideation] = find(run_span["children"], "step.ideation_agent")
+    [generate] = find(ideation["children"], "llm.generate_text")
+    assert generate["attributes"]["llm.cache"] == "miss"
+    assert [child["name"] for child in generate["children"]] == ["llm.model_call"]
+    [image_step] = find(run_span["children"], "step.image_agent")
+    assert [child["name"] for child in image_step["children"]] == ["llm.image_prompt", "image.call_image_api"]
+    [image_call] = find(image_step["children"], "image.call_image_api")
+    assert image_call["attributes"]["image.bytes"] > 0
+    assert find(image_call["children"], "image.model_call")
+    # Checkpoints and thread updates are written while the run is open, so they nest under it
+    assert find(run_span["children"], "store.write")
+    assert trace["time_by_span"]["workflow.run"] >= trace["time_by_span"]["step.image_agent"]
+
+def test_retry_backoff_and_failed_attempts_are_traced():
+    tracer.collector.clear()
+
+    class Flaky(registry.get_provider("stub").__class__):
+        failures = 1
+
+        async def generate_image(self, prompt):
+            if self.failures:
+                self.failures -= 1
+                raise aiohttp.ClientError("connection reset")
+            return b"image", "image/png"
+
+    original = registry._instances["stub"]
+    original_wait = image_agent.call_image_api.retry.wait
+    registry._instances["stub"] = Flaky(distribution="fixed", latency_mean=0)
+    image_agent.call_image_api.retry.wait = wait_none()
+
+    async def run():
+        with registry.use_provider("stub"), tracer.span("step.image_agent", thread_id="flaky-run"):
+            return await image_agent.call_image_api("a flaky robot")
+
+    try:
+        asyncio.run(run())
+    finally:
+        registry._instances["stub"] = original
+        image_agent.call_image_api.retry.wait = original_wait
+
+    [step] = tracer.trace("flaky-run")["spans"]
+    assert [child["name"] for child in step["children"]] == ["image.call_image_api", "retry.backoff", "image.call_image_api"]
+    failed, backoff, succeeded = step["children"]
+    assert failed["status"] == "ERROR" and "connection reset" in failed["status_message"]
+    assert failed["children"][0]["status"] == "ERROR"
+    assert backoff["attributes"]["retry.operation"] == "call_image_api"
+    assert backoff["attributes"]["retry.attempt"] == 1
+    assert succeeded["status"] == "UNSET"
+
+def test_trace_api():
+    tracer.collector.clear()
+    json_saver.create_thread("api-trace", "A traced thread", "linkedin_blog")
+    # Leased to a live server process, so startup recovery leaves it alone
+    assert json_saver.claim_run("api-trace", "other-process", ttl=60)
+    run = tracer.start_span("workflow.run", thread_id="api-trace")
+    with tracer.span("step.ideation_agent", parent=run):
+        pass
+
+    with TestClient(app) as client:
+        # The run is still going: its span is shown as in progress
+        in_progress = client.get("/api/threads/api-trace/trace")
+        run.end()
+        finished = client.get("/api/threads/api-trace/trace")
+        missing = client.get("/api/threads/no-such-thread/trace")
+        json_saver.create_thread("untraced", "Never ran", "linkedin_blog")
+        untraced = client.get("/api/threads/untraced/trace")
+    json_saver.release_run("api-trace", "other-process")
+
+    assert in_progress.status_code == 200 and find(in_progress.json()["spans"], "workflow.run")[0]["in_progress"]
+    body = finished.json()
+    assert body["thread_id"] == "api-trace" and body["trace_id"] == trace_id_for("api-trace")
+    [root] = find(body["spans"], "workflow.run")
+    assert not root["in_progress"] and find(root["children"], "step.ideation_agent")
+    assert body["duration_ms"] >= root["duration_ms"]
+    assert missing.status_code == 404 and untraced.status_code == 404
+
+def test_spans_export_to_an_otlp_file_and_need_a_thread():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "spans.jsonl")
+        file_tracer = Tracer(export_file=path, service_name="orchestro-test")
+        with file_tracer.span("workflow.run", {"workflow.type": "linkedin_blog"}, thread_id="exported"):
+            with file_tracer.span("step.ideation_agent"):
+                with file_tracer.span("llm.generate_text"):
+                    pass
+        # Outside of a thread's trace (e.g. a /api/chat call) nothing is recorded
+        assert file_tracer.start_span("llm.generate_text").trace_id is None
+        file_tracer.close()
+        with open(path) as f:
+            requests = [json.loads(line) for line in f]
+
+    spans = [request["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for request in requests]
+    resource = requests[0]["resourceSpans"][0]["resource"]["attributes"]
+    assert resource == [{"key": "service.name", "value": {"stringValue": "orchestro-test"}}]
+    generate, step, run = spans
+    assert run["name"] == "workflow.run" and run["parentSpanId"] == ""
+    assert run["traceId"] == step["traceId"] == trace_id_for("exported") and step["parentSpanId"] == run["spanId"]
+    assert generate["parentSpanId"] == step["spanId"]
+    assert {"key": "thread.id", "value": {"stringValue": "exported"}} in step["attributes"]
+    assert int(run["endTimeUnixNano"]) >= int(step["endTimeUnixNano"]) >= int(step["startTimeUnixNano"])
+
+def test_recorded_spans_never_replace_the_run_span():
+    tracer = Tracer()
+    # A store write recorded before any run of the thread started is a root of its own
+    tracer.record_span("store.write", 1, 2, thread_id="busy")
+    assert tracer.run_span("busy") is None
+
+    run = tracer.start_span("workflow.run", thread_id="busy")
+    tracer.record_span("store.write", 3, 4, thread_id="busy")
+    tracer.record_span("store.write", 5, 6, parent=tracer.run_span("busy"), thread_id="busy")
+    assert tracer.run_span("busy") is run
+    run.end()
+    assert tracer.run_span("busy") is None
+    roots = [span["name"] for span in tracer.trace("busy")["spans"]]
+    assert sorted(roots) == ["store.write", "store.write", "workflow.run"]
+
+if __name__ == "__main__":
+    print("🧪 Testing the tracing...")
+    test_workflow_run_is_traced_per_step()
+    test_retry_backoff_and_failed_attempts_are_traced()
+    test_trace_api()
+    test_spans_export_to_an_otlp_file_and_need_a_thread()
+    test_recorded_spans_never_replace_the_run_span()
+    print("✅ All tracing tests passed")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the dependency-graph workflow executor.
+Run this from the backend directory: python test_workflow_graph.py
+"""
+
+import asyncio
+
+from app.Services.workflow_graph import WorkflowGraph
+from app.agents.registry import AGENTS
+
+def test_dependencies_follow_state_keys():
+    graph = WorkflowGraph(['ideation_agent', 'image_agent', 'posting_agent'], AGENTS)
+    assert graph.dependencies == {
+        'ideation_agent': [],
+        'image_agent': ['ideation_agent'],
+        'posting_agent': ['ideation_agent'],
+    }
+
+def test_independent_steps_run_concurrently():
+    graph = WorkflowGraph(['ideation_agent', 'image_agent', 'posting_agent'], AGENTS)
+    delays = {'ideation_agent': 0.05, 'image_agent': 0.2, 'posting_agent': 0.1}
+
+    async def run_node(step, state):
+        await asyncio.sleep(delays[step])
+        return {key: f"{step} output" for key in AGENTS[step]['writes']}
+
+    async def run():
+        state = {"topic": "AI"}
+        records = [record async for record in graph.run(state, run_node)]
+        return state, records
+
+    state, records = asyncio.run(run())
+    order = [(record["kind"], record.get("step")) for record in records]
+    # Both followers start before either of them finishes
+    assert order[:4] == [("start", "ideation_agent"), ("complete", "ideation_agent"),
+                         ("start", "image_agent"), ("start", "posting_agent")]
+    assert state["script"] == "ideation_agent output"
+
+    timing = records[-1]["timing"]
+    assert timing["critical_path"] == ['ideation_agent', 'image_agent']
+    assert timing["wall_time"] < sum(delays.values())
+
+def test_failing_step_raises():
+    graph = WorkflowGraph(['video_clipping_agent', 'video_posting_agent'], AGENTS)
+
+    async def run_node(step, state):
+        raise RuntimeError(f"{step} failed")
+
+    async def run():
+        return [record async for record in graph.run({"topic": "AI"}, run_node)]
+
+    try:
+        asyncio.run(run())
+    except RuntimeError as e:
+        assert "video_clipping_agent" in str(e)
+    else:
+        raise AssertionError("expected the step failure to propagate")
+
+if __name__ == "__main__":
+    for test in (test_dependencies_follow_state_keys, test_independent_steps_run_concurrently, test_failing_step_raises):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for pausing workflows at step boundaries and resuming them from their checkpoint.
+Run this from the backend directory: python test_workflow_pause.py
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.jsonsaver import json_saver
+from app.Services.latency import LatencyPolicy
+from app.Services.progress_tracker import ProgressTracker, progress_tracker
+from app.Services.run_leases import RunLeases
+from app.Services.workflow_service import WorkflowService
+from app.Schemas.workflow_schema import ThreadStatus
+from test_progress_tracker import CountingStore
+
+PROMPT = "Create a LinkedIn post about artificial intelligence"
+
+def make_service():
+    store = CountingStore()
+    service = WorkflowService(ProgressTracker(store), agent_backend="synthetic",
+                              latency=LatencyPolicy("fixed", scale=0.01))
+    service.tracker.create("run-1", PROMPT, service.detect_workflow_type(PROMPT))
+    return store, service
+
+def run(service, resume=False, pause_after=None):
+    async def go():
+        events = []
+        async for event in service.orchestrate_workflow(PROMPT, "run-1", resume=resume):
+            events.append(event)
+            if event["type"] == "step_complete" and event["node"] == pause_after:
+                service.request_pause("run-1")
+        return events
+    return asyncio.run(go())
+
+def test_pause_stops_at_step_boundary_and_checkpoints():
+    store, service = make_service()
+    events = run(service, pause_after="ideation_agent")
+
+    started = [event["node"] for event in events if event["type"] == "step_start"]
+    assert started == ["ideation_agent"]
+    assert events[-1]["type"] == "workflow_paused"
+    assert store.threads["run-1"]["status"] == ThreadStatus.PAUSED
+
+    checkpoint = store.get_by_thread_id("run-1")
+    assert checkpoint["progress"]["completed_steps"] == ["ideation_agent"]
+    assert checkpoint["script"]
+
+def test_resume_skips_completed_steps():
+    store, service = make_service()
+    run(service, pause_after="ideation_agent")
+    events = run(service, resume=True)
+
+    started = [event["node"] for event in events if event["type"] == "step_start"]
+    assert started == ["image_agent", "linkedin_agent"]
+    assert events[0]["resumed_from"] == ["ideation_agent"]
+    assert events[-1]["node"] == "__end__"
+    assert store.threads["run-1"]["status"] == ThreadStatus.COMPLETED
+    assert store.get_by_thread_id("run-1")["progress"]["completed_steps"] == [
+        "ideation_agent", "image_agent", "linkedin_agent"
+    ]
+
+def test_resume_without_checkpoint_starts_over():
+    store, service = make_service()
+    events = run(service, resume=True)
+    started = [event["node"] for event in events if event["type"] == "step_start"]
+    assert started == ["ideation_agent", "image_agent", "linkedin_agent"]
+
+def test_pausing_a_run_held_by_another_process():
+    progress_tracker.create("remote-run", PROMPT, "linkedin_blog")
+    progress_tracker.set_status("remote-run", ThreadStatus.RUNNING, "ideation_agent")
+    # Another server process is executing this run
+    other = RunLeases(json_saver, owner="other-process", ttl=60)
+    assert other.acquire("remote-run")
+    try:
+        with TestClient(app) as client:
+            paused = client.post("/api/threads/remote-run/pause")
+            assert paused.status_code == 200 and "will pause" in paused.json()["message"]
+            assert client.get("/api/threads/remote-run").json()["status"] == "paused"
+
+            # Resumed before the other process took the request: the run never stopped
+            assert client.post("/api/threads/remote-run/resume").status_code == 200
+            assert client.get("/api/threads/remote-run").json()["status"] == "running"
+            assert other.take_pause_requests() == []
+
+            assert client.post("/api/threads/remote-run/pause").status_code == 200
+            assert other.take_pause_requests() == ["remote-run"]
+            assert other.take_pause_requests() == []
+            # The run is still stopping in the other process
+            assert client.post("/api/threads/remote-run/resume").status_code == 409
+    finally:
+        other.release("remote-run")
+        json_saver.delete_thread("remote-run")
+
+if __name__ == "__main__":
+    print("🧪 Testing workflow pause/resume...")
+    test_pause_stops_at_step_boundary_and_checkpoints()
+    test_resume_skips_completed_steps()
+    test_resume_without_checkpoint_starts_over()
+    test_pausing_a_run_held_by_another_process()
+    print("✅ All pause/resume tests passed")
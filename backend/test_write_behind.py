@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind thread store.
+Run this from the backend directory: python test_write_behind.py
+"""
+
+import asyncio
+import threading
+
+from app.sqlitesaver import SqliteSaver
+from app.write_behind import WriteBehindSaver, _combine, _empty_change, _overlay
+from app.thread_query import new_thread_info, status_patch, status_value
+from app.Schemas.workflow_schema import ThreadStatus
+
+class RecordingStore:
+    """Delegates to a real store and records the calls made to it."""
+
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+        self.allow_reads = True
+        self.fail_next_write = False
+        self.write_entered = threading.Event()
+        self.release_write = threading.Event()
+        self.release_write.set()
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def get_thread_info(self, thread_id):
+        assert self.allow_reads, f"read thread {thread_id} from the store"
+        self.calls.append(("get_thread_info", thread_id))
+        return self.store.get_thread_info(thread_id)
+
+    def apply_thread_changes(self, changes):
+        self.calls.append(("apply_thread_changes", sorted(changes)))
+        self.write_entered.set()
+        self.release_write.wait(5)
+        if self.fail_next_write:
+            self.fail_next_write = False
+            raise OSError("disk full")
+        self.store.apply_thread_changes(changes)
+
+    def close(self):
+        self.calls.append(("close",))
+
+def change(thread=None, deleted=False, status=None):
+    queued = _empty_change()
+    queued["thread"], queued["deleted"] = thread, deleted
+    if status is not None:
+        queued["fields"], queued["progress"] = status_patch(status, "image_agent")
+    return queued
+
+def test_queued_changes_fold_over_deletes_and_recreates():
+    thread = new_thread_info("t1", "prompt", "social_media")
+
+    # An update queued after a delete cannot bring the thread back
+    combined = _combine(change(deleted=True), change(status=ThreadStatus.RUNNING))
+    assert combined["deleted"] and combined["thread"] is None
+    assert _overlay(thread, change(deleted=True)) is None
+    assert _overlay(_overlay(thread, change(deleted=True)), change(status=ThreadStatus.RUNNING)) is None
+
+    # Re-created after a queued delete: the new thread wins, and the delete still reaches the store
+    recreated = new_thread_info("t1", "second prompt", "linkedin_blog")
+    combined = _combine(change(deleted=True), change(thread=recreated))
+    assert combined["deleted"] and combined["thread"]["name"] == "second prompt"
+    patched = _combine(combined, change(status=ThreadStatus.RUNNING))
+    assert patched["deleted"] and status_value(patched["thread"]["status"]) == "running"
+    assert _overlay(thread, patched)["progress"]["current_step"] == "image_agent"
+
+    # Listed threads may be projected without their progress
+    projected = _overlay({"thread_id": "t1", "status": ThreadStatus.PENDING}, change(status=ThreadStatus.RUNNING))
+    assert status_value(projected["status"]) == "running"
+
+def test_failed_batch_goes_back_under_newer_changes():
+    async def scenario():
+        store = RecordingStore(SqliteSaver(":memory:"))
+        saver = WriteBehindSaver(store=store, flush_interval=0.0)
+        saver.create_thread("t1", "prompt", "social_media")
+        saver.start()
+
+        store.fail_next_write = True
+        store.write_entered.clear()
+        store.release_write.clear()
+        assert saver.update_thread("t1", status=ThreadStatus.RUNNING, current_step="ideation_agent", total_steps=3)
+        await asyncio.get_running_loop().run_in_executor(None, store.write_entered.wait, 5)
+        # Queued while the failing write is in flight: it has to stay on top of the retried batch
+        assert saver.update_thread("t1", completed_steps=1, current_step="image_agent")
+        store.release_write.set()
+
+        await saver.aclose()
+        progress = store.store.get_thread_info("t1")["progress"]
+        assert status_value(progress["status"]) == "running"
+        assert progress["current_step"] == "image_agent"
+        assert progress["completed_steps"] == 1 and progress["total_steps"] == 3
+
+    asyncio.run(scenario())
+
+def test_aclose_writes_everything_before_closing_the_store():
+    async def scenario():
+        store = RecordingStore(SqliteSaver(":memory:"))
+        saver = WriteBehindSaver(store=store, flush_interval=60.0)
+        saver.start()
+        for index in range(20):
+            saver.create_thread(f"t{index}", "prompt", "social_media")
+            saver.put_by_thread_id(f"t{index}", {"step": index})
+        assert saver.update_thread_status("t3", ThreadStatus.COMPLETED)
+        assert saver.delete_thread("t4")
+        assert [call for call in store.calls if call[0] == "apply_thread_changes"] == []
+
+        await saver.aclose()
+        assert store.calls[-1] == ("close",)
+        assert len(store.store.get_all_threads()) == 19
+        assert status_value(store.store.get_thread_info("t3")["status"]) == "completed"
+        assert store.store.get_by_thread_id("t19") == {"step": 19}
+        assert store.store.get_by_thread_id("t4") is None
+
+    asyncio.run(scenario())
+
+def test_mutations_and_listings_do_not_read_the_store():
+    async def scenario():
+        inner = SqliteSaver(":memory:")
+        inner.create_thread("t1", "prompt", "social_media")
+        inner.create_thread("t2", "prompt", "social_media")
+        store = RecordingStore(inner)
+        saver = WriteBehindSaver(store=store, flush_interval=60.0)
+        saver.start()
+        store.allow_reads = False
+
+        assert saver.update_thread_status("t1", ThreadStatus.RUNNING, "ideation_agent")
+        assert saver.delete_thread("t2")
+        assert not saver.update_thread_progress("missing", 1, 3, "image_agent")
+        saver.create_thread("t3", "prompt", "linkedin_blog")
+        assert saver.update_thread("t3", status=ThreadStatus.RUNNING)
+
+        page = saver.list_threads(limit=10, fields="thread_id,status")
+        assert {thread["thread_id"]: status_value(thread["status"]) for thread in page["threads"]} == {"t1": "running"}
+
+        # Created by another process: unknown until read, then known
+        inner.create_thread("t4", "prompt", "social_media")
+        assert not saver.update_thread_status("t4", ThreadStatus.RUNNING)
+        store.allow_reads = True
+        assert (await saver.aget_thread_info("t4"))["thread_id"] == "t4"
+        store.allow_reads = False
+        assert saver.update_thread_status("t4", ThreadStatus.RUNNING)
+
+        await saver.aclose()
+        assert status_value(inner.get_thread_info("t3")["status"]) == "running"
+        assert inner.get_thread_info("t2") is None
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    print("🧪 Testing the write-behind thread store...")
+    test_queued_changes_fold_over_deletes_and_recreates()
+    test_failed_batch_goes_back_under_newer_changes()
+    test_aclose_writes_everything_before_closing_the_store()
+    test_mutations_and_listings_do_not_read_the_store()
+    print("✅ All write-behind thread store tests passed")